@@ -1,28 +1,43 @@
 from flask import Flask, render_template
 import logging
+import os
 from logging import Formatter, FileHandler
-from .extensions import db, migrate, moment
-from .utils import format_datetime
-from jinja2 import Environment, FileSystemLoader
+from .extensions import db, migrate, moment, cache, jobs
+from .utils import format_datetime, format_datetimes
 
-def create_app():
+def create_app(test_config=None, env=None):
     """
     Create and configure an instance of the Flask application.
 
     This function sets up the Flask app, including:
-    - Configuration
+    - Configuration, the settings of `config` and those of its environment
     - Database initialization
     - Custom Jinja2 filters
     - Blueprint registration
     - Error handlers
-    - Logging (in non-debug mode)
+    - Logging (outside debug and testing)
+
+    Args:
+        test_config (dict, optional): Settings applied on top of `config`,
+            e.g. a throwaway database URI for benchmarks.
+        env (str, optional): 'development', 'production' or 'testing',
+            defaults to the FYYUR_ENV environment variable, then 'development'.
 
     Returns:
         Flask: The configured Flask application instance.
     """
 
+    import config
+    env = env or os.environ.get('FYYUR_ENV', 'development')
+    if env not in config.ENVIRONMENTS:
+        raise ValueError(
+            f'Unknown FYYUR_ENV {env!r}, expected one of {tuple(config.ENVIRONMENTS)}')
+
     app = Flask(__name__)
     app.config.from_object('config')
+    app.config.from_object(config.ENVIRONMENTS[env])
+    if test_config:
+        app.config.from_mapping(test_config)
 
     def startswith(string, prefix):
         """
@@ -39,16 +54,34 @@ def create_app():
             return False
         return string.startswith(prefix)
 
-    env = Environment(loader=FileSystemLoader('templates'))
-    env.filters['startswith'] = startswith
-
     # Initialize extensions
+    from . import pool, profiling, templating
+    templating.init_app(app)
+    pool.init_app(app)
     db.init_app(app)
+    pool.attach_metrics(app, db)
+    profiling.init_app(app, db)
     migrate.init_app(app, db)
     moment.init_app(app)
+    cache.init_app(app)
+    jobs.init_app(app)
+
+    from .cache import register_invalidation_events
+    from .stats import register_summary_events
+    from .conditional import register_touch_events
+    from .jobs import register_job_events
+    from .listing import register_listing_events
+    from .search import register_search_events
+    register_invalidation_events()
+    register_summary_events()
+    register_touch_events()
+    register_job_events()
+    register_listing_events()
+    register_search_events()
 
     # Register custom Jinja2 filters
     app.jinja_env.filters['datetime'] = format_datetime
+    app.jinja_env.filters['datetimes'] = format_datetimes
     app.jinja_env.filters['startswith'] = startswith
 
     # Register blueprints
@@ -57,12 +90,33 @@ def create_app():
     from .blueprints.artists import artists_bp
     from .blueprints.shows import shows_bp
     from .blueprints.api import api_bp
+    from .blueprints.internal import internal_bp
 
     app.register_blueprint(main_bp, url_prefix='/home')
     app.register_blueprint(venues_bp, url_prefix='/venues')
     app.register_blueprint(artists_bp, url_prefix='/artists')
     app.register_blueprint(shows_bp, url_prefix='/shows')
     app.register_blueprint(api_bp, url_prefix='/api')
+    app.register_blueprint(internal_bp, url_prefix='/internal')
+
+    # Register CLI commands
+    from .advisor import db_advise_command
+    from .importer import import_command
+    from .listing import listing_rebuild_command
+    from .matchmaking import matches_rebuild_command
+    from .stats import stats_refresh_command
+    from .templating import templates_compile_command
+    from .jobs import jobs_worker_command, jobs_schedule_command, jobs_status_command
+
+    app.cli.add_command(db_advise_command)
+    app.cli.add_command(import_command)
+    app.cli.add_command(listing_rebuild_command)
+    app.cli.add_command(matches_rebuild_command)
+    app.cli.add_command(stats_refresh_command)
+    app.cli.add_command(templates_compile_command)
+    app.cli.add_command(jobs_worker_command)
+    app.cli.add_command(jobs_schedule_command)
+    app.cli.add_command(jobs_status_command)
 
     # Error handlers
     @app.errorhandler(404)
@@ -76,13 +130,15 @@ def create_app():
         return render_template('errors/500.html'), 500
 
     # Configure logging for production mode
-    if not app.debug:
-        file_handler = FileHandler('error.log')
-        file_handler.setFormatter(Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'))
+    if not app.debug and not app.testing:
+        # Every app created in a process shares the 'app' logger, add the file once.
+        if not any(isinstance(handler, FileHandler) for handler in app.logger.handlers):
+            file_handler = FileHandler('error.log')
+            file_handler.setFormatter(Formatter(
+                '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'))
+            file_handler.setLevel(logging.INFO)
+            app.logger.addHandler(file_handler)
         app.logger.setLevel(logging.INFO)
-        file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
         app.logger.info('errors')
 
     return app
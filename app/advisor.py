@@ -0,0 +1,150 @@
+""" Index advisor: EXPLAINs the main query of each blueprint and reports full scans.
+
+Run it against a database holding realistic data before deploying:
+
+    flask db-advise
+    flask db-advise --min-rows 0    # also report scans of tiny tables
+
+The command exits with status 1 when a query scans a table it is not
+expected to, so a dropped or missing index fails the deploy pipeline.
+"""
+
+import re
+from collections import namedtuple
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import desc, func, select
+
+from .directory import venue_directory_query
+from .extensions import db
+from .models import Venue, Artist, Show, show_duration
+from .scheduling import booking_probe
+from .search.postgres import PostgresSearchBackend
+
+# A query worth checking. `build(params)` returns the statement,
+# `expected_scans` names the tables it has to read in full by design and
+# `postgres_only` marks queries that only run in SQL on PostgreSQL.
+AdvisedQuery = namedtuple(
+    'AdvisedQuery', ['name', 'build', 'expected_scans', 'postgres_only'],
+    defaults=(frozenset(), False))
+
+Finding = namedtuple('Finding', ['query', 'plan', 'scans'])
+
+ADVISED_QUERIES = [
+    AdvisedQuery(
+        'venues.venues: directory',
+        lambda p: venue_directory_query(),
+        {'venue'}),
+    AdvisedQuery(
+        'venues.search_venues: ranked match',
+        lambda p: PostgresSearchBackend().match_query(Venue, p['term']).limit(20),
+        postgres_only=True),
+    AdvisedQuery(
+        'venues.show_venue: schedule',
+        lambda p: Venue.schedule_query(p['venue_id'])),
+    AdvisedQuery(
+        'artists.artists: latest artists',
+        lambda p: select(Artist).order_by(desc(Artist.id)).limit(10),
+        # A backwards primary key walk stopped by LIMIT, SQLite calls it SCAN.
+        {'artists'}),
+    AdvisedQuery(
+        'artists.search_artists: ranked match',
+        lambda p: PostgresSearchBackend().match_query(Artist, p['term']).limit(20),
+        postgres_only=True),
+    AdvisedQuery(
+        'artists.show_artist: schedule',
+        lambda p: Artist.schedule_query(p['artist_id'])),
+    AdvisedQuery(
+        'shows.shows: upcoming page',
+        lambda p: select(Show.id, Show.start_time)
+        .where(Show.start_time >= p['now'])
+        .order_by(Show.start_time, Show.id).limit(30)),
+    AdvisedQuery(
+        'shows.create_show_submission: booking probe',
+        lambda p: booking_probe(
+            p['artist_id'], p['venue_id'], p['now'], p['now'] + show_duration())),
+    AdvisedQuery(
+        'api.get_venues: id/name listing',
+        lambda p: select(Venue.id, Venue.name).order_by(Venue.id),
+        {'venue'}),
+]
+
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+).*?rows=(\d+)')
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)')
+
+
+def sample_parameters():
+    """Pick ids that exist in the current database to plug into the queries."""
+    return {
+        'now': datetime.now(),
+        'term': 'the',
+        'venue_id': db.session.scalar(select(func.min(Venue.id))) or 1,
+        'artist_id': db.session.scalar(select(func.min(Artist.id))) or 1,
+    }
+
+
+def explain(stmt):
+    """Return the plan of `stmt` on the current database as a list of lines."""
+    dialect = db.engine.dialect
+    sql = str(stmt.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    if dialect.name == 'postgresql':
+        rows = db.session.connection().exec_driver_sql('EXPLAIN ' + sql.replace('%', '%%'))
+        return [row[0] for row in rows]
+    rows = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + sql)
+    return [row[-1] for row in rows]
+
+
+def full_scans(plan, min_rows=0):
+    """Return the tables a plan reads in full.
+
+    Args:
+        plan (list): Plan lines from `explain`.
+        min_rows (int): On PostgreSQL, ignore scans the planner estimates
+            at fewer rows, the planner rightly prefers them on tiny tables.
+    """
+    tables = set(db.metadata.tables)
+    scans = set()
+    for line in plan:
+        match = _POSTGRES_SCAN.search(line)
+        if match and int(match.group(2)) >= min_rows:
+            scans.add(match.group(1))
+        match = _SQLITE_SCAN.search(line.strip())
+        if match:
+            scans.add(match.group(1))
+    return scans & tables
+
+
+def advise(min_rows=0):
+    """EXPLAIN every advised query and return one `Finding` per query."""
+    params = sample_parameters()
+    is_postgres = db.engine.dialect.name == 'postgresql'
+    findings = []
+    for query in ADVISED_QUERIES:
+        if query.postgres_only and not is_postgres:
+            continue
+        plan = explain(query.build(params))
+        findings.append(Finding(query, plan, full_scans(plan, min_rows)))
+    return findings
+
+
+@click.command('db-advise')
+@click.option('--min-rows', default=1000, show_default=True,
+              help='Ignore sequential scans estimated below this many rows.')
+@click.option('--verbose', '-v', is_flag=True, help='Print every plan.')
+@with_appcontext
+def db_advise_command(min_rows, verbose):
+    """Report sequential scans in the main query of each blueprint."""
+    failed = False
+    for finding in advise(min_rows):
+        unexpected = finding.scans - finding.query.expected_scans
+        status = 'SEQ SCAN ' + ', '.join(sorted(unexpected)) if unexpected else 'ok'
+        click.echo(f'{finding.query.name}: {status}')
+        if verbose or unexpected:
+            for line in finding.plan:
+                click.echo(f'    {line}')
+        failed = failed or bool(unexpected)
+
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,40 @@
+""" Async read-only JSON API served over ASGI next to the Flask app.
+
+    uvicorn asgi:app
+
+Requests under `ASYNC_API_PREFIX` are answered by the handlers in
+`routes` on an SQLAlchemy asyncio engine (asyncpg on PostgreSQL,
+aiosqlite on SQLite); everything else is passed to the Flask app through
+asgiref's WSGI adapter. Writes stay on Flask.
+"""
+
+from .. import create_app, serving
+from .asgi import AsyncAPI, PrefixDispatcher
+from .database import create_engine_for
+from .routes import router
+
+
+def create_asgi_app(test_config=None, env=None, prepare=False):
+    """Create the ASGI application serving the async API and the Flask app.
+
+    Args:
+        test_config (dict, optional): Passed to `create_app`, the async API
+            reads the resulting Flask config.
+        env (str, optional): Passed to `create_app`.
+        prepare (bool, optional): Get the Flask app ready to serve with
+            `serving.prepare`, self-check included.
+
+    Returns:
+        PrefixDispatcher: The ASGI callable.
+    """
+    flask_app = create_app(test_config, env)
+    if prepare:
+        serving.prepare(flask_app)
+    try:
+        from asgiref.wsgi import WsgiToAsgi
+    except ImportError as e:
+        raise RuntimeError('The async API needs asgiref: pip install asgiref') from e
+
+    api = AsyncAPI(flask_app.config, router, create_engine_for)
+    return PrefixDispatcher(flask_app.config.get('ASYNC_API_PREFIX', '/async'),
+                            api, WsgiToAsgi(flask_app))
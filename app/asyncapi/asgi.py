@@ -0,0 +1,179 @@
+""" Minimal ASGI plumbing: request parsing, routing and JSON responses. """
+
+import json
+import re
+from datetime import date, datetime
+from urllib.parse import parse_qs
+
+
+class HTTPError(Exception):
+    """Abort a handler with an HTTP status and a JSON error body."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    """The parts of an ASGI HTTP scope the handlers use."""
+
+    def __init__(self, scope, api):
+        self.scope = scope
+        self.api = api
+        self.method = scope['method']
+        self.path = scope['path']
+        self.args = {key: values[-1] for key, values in
+                     parse_qs(scope.get('query_string', b'').decode('latin-1')).items()}
+
+    @property
+    def engine(self):
+        return self.api.engine
+
+    @property
+    def config(self):
+        return self.api.config
+
+    def arg(self, name, default=None, type=str):
+        """Return a query string argument converted with `type`.
+
+        Raises:
+            HTTPError: 400 if the value does not convert.
+        """
+        value = self.args.get(name)
+        if value is None or value == '':
+            return default
+        try:
+            return type(value)
+        except ValueError:
+            raise HTTPError(400, f'Invalid value for {name!r}')
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def encode_json(payload):
+    return json.dumps(payload, default=_json_default).encode()
+
+
+class Router:
+    """Maps paths such as '/venues/<int:venue_id>' to async handlers."""
+
+    def __init__(self):
+        self.routes = []
+
+    def route(self, pattern, methods=('GET',)):
+        regex = re.compile('^' + re.sub(r'<int:(\w+)>', r'(?P<\1>\\d+)', pattern) + '/?$')
+
+        def decorator(handler):
+            self.routes.append((regex, methods, handler))
+            return handler
+        return decorator
+
+    def match(self, method, path):
+        """Return (handler, keyword arguments) for a request.
+
+        Raises:
+            HTTPError: 404 for an unknown path, 405 for a known path with
+                another method.
+        """
+        allowed = False
+        for regex, methods, handler in self.routes:
+            match = regex.match(path)
+            if match is None:
+                continue
+            if method in methods:
+                return handler, {name: int(value) for name, value in match.groupdict().items()}
+            allowed = True
+        if allowed:
+            raise HTTPError(405, 'Method not allowed')
+        raise HTTPError(404, 'Not found')
+
+
+class AsyncAPI:
+    """ASGI application serving `router` over one async engine.
+
+    The engine is created lazily on the first request so it binds to the
+    server's event loop, and disposed when the server shuts down.
+    """
+
+    def __init__(self, config, router, engine_factory):
+        self.config = config
+        self.router = router
+        self._engine_factory = engine_factory
+        self._engine = None
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = self._engine_factory(self.config)
+        return self._engine
+
+    async def dispose(self):
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise RuntimeError(f'Unsupported ASGI scope type {scope["type"]!r}')
+
+        try:
+            handler, kwargs = self.router.match(scope['method'], scope['path'])
+            status, payload = 200, await handler(Request(scope, self), **kwargs)
+        except HTTPError as e:
+            status, payload = e.status, {'error': e.message}
+        await send_json(send, status, payload)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+async def send_json(send, status, payload):
+    body = encode_json(payload)
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+class PrefixDispatcher:
+    """Send requests under `prefix` to `api` and everything else to `fallback`.
+
+    Lifespan events go to `api`, which owns the only resources to release.
+    """
+
+    def __init__(self, prefix, api, fallback):
+        self.prefix = prefix.rstrip('/')
+        self.api = api
+        self.fallback = fallback
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.api(scope, receive, send)
+            return
+        path = scope.get('path', '')
+        if path == self.prefix or path.startswith(self.prefix + '/'):
+            scope = dict(scope, path=path[len(self.prefix):] or '/',
+                         root_path=scope.get('root_path', '') + self.prefix)
+            await self.api(scope, receive, send)
+            return
+        await self.fallback(scope, receive, send)
@@ -0,0 +1,61 @@
+""" Async engine for the ASGI API, configured from the same settings as Flask's. """
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from ..pool import engine_options
+
+# Async driver used for each database backend.
+ASYNC_DRIVERS = {
+    'postgresql': 'asyncpg',
+    'sqlite': 'aiosqlite',
+}
+
+
+def async_database_url(url):
+    """Return `url` with the async driver of its backend, e.g. postgresql+asyncpg."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver configured for {backend!r} databases')
+    return url.set(drivername=f'{backend}+{ASYNC_DRIVERS[backend]}')
+
+
+def async_engine_options(config):
+    """Translate the `DB_*` pool profile to the async engine.
+
+    asyncpg takes session settings as `server_settings` rather than the
+    libpq `options` string used by psycopg2.
+    """
+    options = engine_options(config)
+    connect_args = options.pop('connect_args', None)
+    if connect_args:
+        server_settings = {'application_name': connect_args['application_name'] + '-async'}
+        statement_timeout = config.get('DB_STATEMENT_TIMEOUT_MS', 0)
+        if statement_timeout:
+            server_settings['statement_timeout'] = str(int(statement_timeout))
+        options['connect_args'] = {'server_settings': server_settings}
+    return options
+
+
+def create_engine_for(config):
+    """Create the async engine for `SQLALCHEMY_DATABASE_URI`."""
+    url = async_database_url(config['SQLALCHEMY_DATABASE_URI'])
+    return create_async_engine(url, **async_engine_options(config))
+
+
+async def fetch_all(engine, stmt):
+    """Run `stmt` on its own pooled connection and return every row.
+
+    Handlers pass several of these to `asyncio.gather`: each statement
+    holds a separate connection, so independent round trips overlap.
+    """
+    async with engine.connect() as connection:
+        return (await connection.execute(stmt)).all()
+
+
+async def fetch_one(engine, stmt):
+    """Run `stmt` on its own pooled connection and return the first row or `None`."""
+    async with engine.connect() as connection:
+        return (await connection.execute(stmt)).first()
+
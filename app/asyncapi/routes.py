@@ -0,0 +1,205 @@
+""" Read-only JSON endpoints of the async API.
+
+Handlers build the same statements as the Flask views and run them on
+the async engine. Statements a page needs that do not depend on each
+other go through `asyncio.gather`, each on its own connection, so a
+venue page costs the slowest of its queries instead of their sum.
+"""
+
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from ..blueprints.shows.routes import SHOW_MODES, show_listing_query
+from ..models import Venue, Artist, Availability, ShowListing
+from ..pagination import decode_cursor, keyset_page, keyset_query
+from ..search.document import escape_like, sqlite_document_expression
+from ..search.postgres import PostgresSearchBackend
+from .asgi import HTTPError, Router
+from .database import fetch_all, fetch_one
+
+router = Router()
+
+SEARCH_MODELS = {'venues': Venue, 'artists': Artist}
+
+
+def _bounded(request, name, default_key, max_key, fallback):
+    value = request.arg(name, request.config.get(default_key, fallback), int)
+    return min(max(value, 1), request.config.get(max_key, fallback))
+
+
+def _rows(rows):
+    return [row._asdict() for row in rows]
+
+
+async def _listing(request, model):
+    limit = _bounded(request, 'limit', 'ASYNC_API_PAGE_SIZE', 'ASYNC_API_MAX_PAGE_SIZE', 100)
+    after_id = request.arg('after_id', type=int)
+    stmt = select(model.id, model.name).order_by(model.id).limit(limit + 1)
+    if after_id is not None:
+        stmt = stmt.where(model.id > after_id)
+    rows = await fetch_all(request.engine, stmt)
+    return {
+        'data': _rows(rows[:limit]),
+        'next_after_id': rows[limit - 1].id if len(rows) > limit else None,
+    }
+
+
+def _split_schedule(model, record_id, now):
+    """The past (latest first) and upcoming (soonest first) show card queries."""
+    schedule = model.schedule_query(record_id)
+    past = (schedule.where(ShowListing.start_time < now)
+            .order_by(None).order_by(ShowListing.start_time.desc(), ShowListing.id.desc()))
+    upcoming = schedule.where(ShowListing.start_time >= now)
+    return past, upcoming
+
+
+async def _detail(request, model, record_id, *extra):
+    """Load a record, its past and upcoming shows and `extra` statements at once."""
+    now = datetime.now()
+    past, upcoming = _split_schedule(model, record_id, now)
+    record, past_shows, upcoming_shows, *extra_rows = await asyncio.gather(
+        fetch_one(request.engine, select(*model.__table__.columns).where(model.id == record_id)),
+        fetch_all(request.engine, past),
+        fetch_all(request.engine, upcoming),
+        *(fetch_all(request.engine, stmt) for stmt in extra),
+    )
+    if record is None:
+        raise HTTPError(404, f'No such {model.__name__.lower()}')
+    data = record._asdict()
+    data.update({
+        'past_shows': _rows(past_shows),
+        'upcoming_shows': _rows(upcoming_shows),
+        'past_shows_count': len(past_shows),
+        'upcoming_shows_count': len(upcoming_shows),
+    })
+    return data, extra_rows
+
+
+def _availability_query(request, artist_id):
+    start = request.arg('from', type=datetime.fromisoformat)
+    end = request.arg('to', type=datetime.fromisoformat)
+    stmt = (select(Availability.id, Availability.working_period_start,
+                   Availability.working_period_end)
+            .where(Availability.artist_id == artist_id)
+            .order_by(Availability.working_period_start, Availability.id))
+    if start is not None:
+        stmt = stmt.where(Availability.working_period_end > start)
+    if end is not None:
+        stmt = stmt.where(Availability.working_period_start < end)
+    return stmt
+
+
+@router.route('/venues')
+async def venues(request):
+    """Venue ids and names by id, `limit` and `after_id` page through them."""
+    return await _listing(request, Venue)
+
+
+@router.route('/venues/<int:venue_id>')
+async def venue(request, venue_id):
+    """A venue with its past and upcoming shows, three concurrent queries."""
+    data, _ = await _detail(request, Venue, venue_id)
+    return data
+
+
+@router.route('/artists')
+async def artists(request):
+    """Artist ids and names by id, `limit` and `after_id` page through them."""
+    return await _listing(request, Artist)
+
+
+@router.route('/artists/<int:artist_id>')
+async def artist(request, artist_id):
+    """An artist with shows and availability, four concurrent queries."""
+    data, (windows,) = await _detail(
+        request, Artist, artist_id, _availability_query(request, artist_id))
+    data['availability'] = _rows(windows)
+    return data
+
+
+@router.route('/artists/<int:artist_id>/availability')
+async def availability(request, artist_id):
+    """Availability windows of an artist overlapping the optional `from`/`to` range."""
+    exists, windows = await asyncio.gather(
+        fetch_one(request.engine, select(Artist.id).where(Artist.id == artist_id)),
+        fetch_all(request.engine, _availability_query(request, artist_id)),
+    )
+    if exists is None:
+        raise HTTPError(404, 'No such artist')
+    return {'artist_id': artist_id, 'data': _rows(windows)}
+
+
+@router.route('/shows')
+async def shows(request):
+    """One keyset page of upcoming or past shows, like the /shows/ page."""
+    mode = request.arg('mode', 'upcoming')
+    if mode not in SHOW_MODES:
+        raise HTTPError(400, f'mode must be one of {SHOW_MODES}')
+    per_page = _bounded(request, 'per_page', 'SHOWS_PAGE_SIZE', 'SHOWS_MAX_PAGE_SIZE', 30)
+    after = request.arg('after', type=decode_cursor)
+    before = request.arg('before', type=decode_cursor)
+
+    columns = (ShowListing.start_time, ShowListing.id)
+    stmt = keyset_query(show_listing_query(mode), columns, per_page,
+                        after, before, descending=(mode == 'past'))
+    page = keyset_page(await fetch_all(request.engine, stmt), columns, per_page, after, before)
+    return {
+        'data': _rows(page.items),
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+    }
+
+
+def _match_query(dialect, model, term):
+    """Ranked matches with their total, pg_trgm on PostgreSQL, LIKE elsewhere.
+
+    Both match the search document, genres included, like the memory backend.
+    """
+    if dialect == 'postgresql':
+        return PostgresSearchBackend().match_query(model, term)
+    pattern = f'%{escape_like(term.strip().lower())}%'
+    return (
+        select(model.id, func.count().over().label('total'))
+        .where(sqlite_document_expression(model).like(pattern, escape='\\'))
+        .order_by(model.name, model.id)
+    )
+
+
+@router.route('/search')
+async def search(request):
+    """Search venues or artists (`type`) for `q`, with upcoming show counts."""
+    model = SEARCH_MODELS.get(request.arg('type', 'venues'))
+    if model is None:
+        raise HTTPError(400, f'type must be one of {tuple(SEARCH_MODELS)}')
+    term = request.arg('q', '')
+    limit = _bounded(request, 'limit', 'SEARCH_PAGE_SIZE', 'SEARCH_MAX_PAGE_SIZE', 20)
+    offset = max(request.arg('offset', 0, int), 0)
+
+    stats = model.__stats__
+    matches = _match_query(request.engine.dialect.name, model, term)
+    stmt = (
+        matches
+        .add_columns(model.name,
+                     func.coalesce(stats.upcoming_shows, 0).label('num_upcoming_shows'))
+        .outerjoin(stats, model._stats_fk() == model.id)
+        .limit(limit).offset(offset)
+    )
+    rows = await fetch_all(request.engine, stmt)
+    if rows:
+        total = rows[0].total
+    elif offset:
+        # Paged past the end, the window total is not available.
+        total = (await fetch_one(request.engine, select(func.count()).select_from(
+            matches.order_by(None).subquery())))[0]
+    else:
+        total = 0
+    return {
+        'count': total,
+        'limit': limit,
+        'offset': offset,
+        'next_offset': offset + limit if offset + limit < total else None,
+        'data': [{'id': row.id, 'name': row.name, 'num_upcoming_shows': row.num_upcoming_shows}
+                 for row in rows],
+    }
@@ -1,13 +1,87 @@
-from flask import jsonify
-from ...models import Artist, Venue
+import json
+
+from flask import Response, abort, current_app, jsonify, request, stream_with_context
+from sqlalchemy import select
+from ...models import Artist, Venue, Show, Availability
+from ...extensions import db
+from ... import importer, matchmaking, timeline
+from ...conditional import conditional, table_validator
+from ..internal.routes import restrict_access
 from . import api_bp
 
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def _wants_ndjson():
+    """True when the client asked for newline-delimited JSON."""
+    if request.args.get('format') == 'ndjson':
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def _id_name_listing(model):
+    """Build the `id`/`name` listing of `model` honouring `limit` and `after_id`.
+
+    Only the two needed columns are selected, ordered by id so `after_id`
+    can resume a listing where the previous batch stopped.
+    """
+    limit = request.args.get('limit', type=int)
+    after_id = request.args.get('after_id', type=int)
+    if limit is not None and limit < 1:
+        abort(400)
+
+    stmt = select(model.id, model.name).order_by(model.id)
+    if after_id is not None:
+        stmt = stmt.where(model.id > after_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def _stream_rows(stmt):
+    """Stream the rows of `stmt` as a JSON array or as NDJSON.
+
+    Rows are read through a server-side cursor in batches of
+    `API_STREAM_BATCH_SIZE` and encoded one by one, so memory stays flat
+    and the first bytes leave before the query has finished.
+    """
+    ndjson = _wants_ndjson()
+    batch_size = current_app.config.get('API_STREAM_BATCH_SIZE', 1000)
+
+    def generate():
+        rows = db.session.execute(stmt.execution_options(yield_per=batch_size))
+        if ndjson:
+            for row in rows:
+                yield json.dumps(row._asdict()) + '\n'
+            return
+
+        yield '['
+        separator = ''
+        for row in rows:
+            yield separator + json.dumps(row._asdict())
+            separator = ','
+        yield ']'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=NDJSON_MIMETYPE if ndjson else 'application/json'
+    )
+
+
 @api_bp.route('/artists')
+@conditional(lambda: table_validator(Artist), tags=('artists',))
 def get_all_artists():
     """
     Retrieve a list of all artists.
 
-    This endpoint returns a JSON array containing the ID and name of all artists in the database.
+    This endpoint streams a JSON array containing the ID and name of all artists in the database.
+
+    Query parameters:
+        limit (int, optional): Maximum number of artists to return.
+        after_id (int, optional): Only return artists with a greater ID.
+        format (str, optional): 'ndjson' for one JSON object per line, also
+            selected by `Accept: application/x-ndjson`.
 
     Returns:
         JSON: A list of dictionaries, each containing:
@@ -21,15 +95,21 @@ def get_all_artists():
             ...
         ]
     """
-    artists = Artist.query.all()
-    return jsonify([{'id': artist.id, 'name': artist.name} for artist in artists])
+    return _stream_rows(_id_name_listing(Artist))
 
 @api_bp.route('/venues')
+@conditional(lambda: table_validator(Venue), tags=('venues',))
 def get_venues():
     """
     Retrieve a list of all venues.
 
-    This endpoint returns a JSON array containing the ID and name of all venues in the database.
+    This endpoint streams a JSON array containing the ID and name of all venues in the database.
+
+    Query parameters:
+        limit (int, optional): Maximum number of venues to return.
+        after_id (int, optional): Only return venues with a greater ID.
+        format (str, optional): 'ndjson' for one JSON object per line, also
+            selected by `Accept: application/x-ndjson`.
 
     Returns:
         JSON: A list of dictionaries, each containing:
@@ -43,6 +123,138 @@ def get_venues():
             ...
         ]
     """
-    venues = Venue.query.all()
-    return jsonify([{'id': venue.id, 'name': venue.name} for venue in venues])
+    return _stream_rows(_id_name_listing(Venue))
+
+
+def _matches(side, model, owner_id):
+    """Serve the precomputed matches of a venue or artist, best first."""
+    top_k = current_app.config.get('MATCH_TOP_K', 20)
+    limit = request.args.get('limit', top_k, type=int)
+    if limit < 1:
+        abort(400)
+    if db.session.get(model, owner_id) is None:
+        abort(404)
+    rows = db.session.execute(
+        matchmaking.matches_query(side, owner_id, min(limit, top_k))).all()
+    return jsonify([row._asdict() for row in rows])
+
+
+@api_bp.route('/venues/<int:venue_id>/matches')
+def get_venue_matches(venue_id):
+    """
+    Recommend artists to a venue seeking talent.
+
+    Matches are precomputed by `app.matchmaking` and read from the
+    (venue_id, score) index of `venue_matches`.
+
+    Query parameters:
+        limit (int, optional): Number of matches, at most `MATCH_TOP_K`.
+
+    Returns:
+        JSON: Artists, best match first, e.g.
+            [{"id": 4, "name": "Artist 4", "city": "Austin", "state": "TX",
+              "score": 0.82, "genre_score": 0.75, "location_score": 1.0,
+              "availability_score": 0.4}, ...]
+            An empty list if the venue is not seeking talent.
+    """
+    return _matches('venue', Venue, venue_id)
+
+
+@api_bp.route('/artists/<int:artist_id>/matches')
+def get_artist_matches(artist_id):
+    """
+    Recommend venues to an artist seeking a venue.
+
+    Matches are precomputed by `app.matchmaking` and read from the
+    (artist_id, score) index of `artist_matches`.
+
+    Query parameters:
+        limit (int, optional): Number of matches, at most `MATCH_TOP_K`.
+
+    Returns:
+        JSON: Venues, best match first, with the same fields as
+            /api/venues/<venue_id>/matches.
+            An empty list if the artist is not seeking a venue.
+    """
+    return _matches('artist', Artist, artist_id)
+
 
+def _calendar_span():
+    """The range served, the default month is not in the URL. `None` when unreadable."""
+    try:
+        return tuple(timeline.parse_range(request.args))
+    except ValueError:
+        return None
+
+
+@api_bp.route('/calendar')
+@conditional(lambda: table_validator(Show, Availability, Venue, Artist),
+             tags=('shows', 'availability', 'venues', 'artists'), vary=_calendar_span)
+def get_calendar():
+    """
+    Shows and availability windows over a time range, bucketed by day or week.
+
+    Built by `app.timeline` from one statement over the start time indexes
+    of `show_listing` and the period indexes of `availability`.
+
+    Query parameters:
+        from (str, optional): ISO date or datetime, the first day of the
+            current month by default. A time zone offset converts it to
+            server local time.
+        to (str, optional): Exclusive end, the first day of the next month
+            by default. The range is at most `CALENDAR_MAX_DAYS` long.
+        bucket (str, optional): 'day' (default) or 'week', weeks start on Monday.
+        venue_id (int, optional): Only shows at this venue, no availability.
+        artist_id (int, optional): Only this artist's shows and windows.
+
+    Returns:
+        JSON: Every bucket of the range, empty ones included, e.g.
+            {"from": "2026-10-01T00:00:00", "to": "2026-11-01T00:00:00", "bucket": "day",
+             "buckets": [{"start": "2026-10-01T00:00:00",
+                          "shows": [{"id": 7, "start_time": "2026-10-01T20:00:00",
+                                     "start_time_display": "Thursday October, 1, 2026 at 8:00PM",
+                                     "venue_id": 2, "venue_name": "The Dueling Pianos Bar",
+                                     "artist_id": 4, "artist_name": "Guns N Petals"}],
+                          "availability": [{"id": 3, "artist_id": 4,
+                                            "working_period_start": "2026-09-28T00:00:00",
+                                            "working_period_end": "2026-10-12T00:00:00"}]},
+                         ...]}
+    """
+    try:
+        span = timeline.parse_range(request.args)
+    except ValueError as e:
+        abort(400, description=str(e))
+    return jsonify(timeline.load_calendar(
+        span,
+        venue_id=request.args.get('venue_id', type=int),
+        artist_id=request.args.get('artist_id', type=int)))
+
+
+@api_bp.route('/import/<kind>', methods=['POST'])
+def import_records(kind):
+    """
+    Bulk import venues, artists, shows or availability.
+
+    The request body is streamed as CSV (`Content-Type: text/csv`) or as
+    NDJSON (`application/x-ndjson`), with one record per row using the
+    field names of the matching create form. Rows are validated and
+    inserted in batches, invalid rows are reported and skipped. Like the
+    internal endpoints it needs the `X-Internal-Token` header, or a
+    loopback client while debugging or testing without an `INTERNAL_TOKEN`.
+
+    Args:
+        kind (str): 'venues', 'artists', 'shows' or 'availability'.
+
+    Returns:
+        JSON: The import report, e.g.
+            {"kind": "shows", "read": 10000, "inserted": 9987, "rejected": 13,
+             "seconds": 4.2, "rows_per_second": 2380.9,
+             "errors": [{"line": 17, "errors": {"start_time": ["venue_busy"]}}, ...]}
+    """
+    restrict_access()
+    if kind not in importer.SPECS:
+        abort(404)
+    ndjson = request.mimetype == NDJSON_MIMETYPE or request.args.get('format') == 'ndjson'
+    format = 'ndjson' if ndjson else 'csv'
+    report = importer.import_stream(kind, request.stream, format)
+    return jsonify(report.as_dict())
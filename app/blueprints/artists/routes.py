@@ -1,10 +1,12 @@
-from flask import render_template, request, flash, redirect, url_for
-from ...models import Artist, Availability, Show
+from flask import render_template, request, flash, redirect, url_for, abort
+from ...models import Artist, Availability
 from ...forms import ArtistForm, AvailabilityForm
-from ...extensions import db
+from ...extensions import db, cache
+from ... import facets, search
+from ...conditional import conditional, record_validator, table_validator
+from sqlalchemy import select
 from sqlalchemy.sql import desc 
 from . import artists_bp
-from datetime import datetime
 
 @artists_bp.route('/artists/create', methods=['GET'])
 def create_artist_form():
@@ -39,8 +41,6 @@ def create_artist_submission():
             db.session.rollback()
             flash('The error occurred. Artist ' + form.name.data + ' could not be listed.')
             print(f'Error is {e}')
-        finally:
-            db.session.close()
     else:
         for field, errors in form.errors.items():
             for error in errors:
@@ -49,12 +49,20 @@ def create_artist_submission():
     return render_template('pages/home.html')
 
 @artists_bp.route('/artists')
+@conditional(lambda: table_validator(Artist), tags=('artists',))
+@cache.cached('artists')
 def artists():
     """Retrieve and display a list of artists.
+
+    Query string: the facet filters of `app.facets` (genre, state, city, seeking).
     """
     try:
-        data = Artist.query.order_by(desc(Artist.id)).limit(10).all()
-        return render_template('pages/artists.html', artists=data)
+        filters = facets.parse_filters(request.args)
+        data = Artist.query.where(*facets.conditions(facets.ARTISTS, filters)).order_by(
+            desc(Artist.id)).limit(10).all()
+        counts = facets.facets(select(Artist.id), facets.ARTISTS, filters, 'artists.artists')
+        return render_template('pages/artists.html', artists=data, facets=counts,
+                               seeking_title='Seeking a venue')
     except Exception as e:
         print(f"Error retrieving artists: {e}")
         return render_template('errors/500.html'), 500
@@ -65,18 +73,11 @@ def search_artists():
     """
     try:
         search_term = request.form.get('search_term', '')
-        artists = Artist.query.filter(Artist.name.ilike(f'%{search_term}%')).all()
-        response = {
-            "count": len(artists),
-            "data": [{
-                "id": artist.id,
-                "name": artist.name,
-                "num_upcoming_shows": Show.query.filter(
-                    Show.artist_id == artist.id,
-                    Show.start_time > datetime.now()
-                ).count()
-            } for artist in artists]
-        }
+        response = search.search_artists(
+            search_term,
+            limit=request.form.get('limit', type=int),
+            offset=request.form.get('offset', type=int)
+        )
         return render_template(
             'pages/search_artists.html',
             results=response,
@@ -87,20 +88,23 @@ def search_artists():
         return render_template('errors/500.html'), 500
 
 @artists_bp.route('/<int:artist_id>')
+@conditional(lambda artist_id: record_validator(Artist, artist_id),
+             tags=('artist:{artist_id}', 'venues'))
+@cache.cached('artist:{artist_id}', 'venues')
 def show_artist(artist_id):
     """Display details of a specific artist.
     """
-    try:
-        artist = Artist.query.get_or_404(artist_id)
-        # Fetch past and upcoming shows using model methods
-        past_shows = artist.get_past_shows()
-        upcoming_shows = artist.get_upcoming_shows()
+    loaded = Artist.get_with_schedule(artist_id)
+    if loaded is None:
+        abort(404)
+    artist, schedule = loaded
 
-        # Prepare data for rendering
+    try:
+        # Prepare data for rendering, show rows already carry the venue columns
         artist_data = {
             "id": artist.id,
             "name": artist.name,
-            "genres": artist.genres,
+            "genres": artist.genres or [],
             "city": artist.city,
             "state": artist.state,
             "phone": artist.phone,
@@ -108,20 +112,10 @@ def show_artist(artist_id):
             "seeking_venue": artist.seeking_venue,
             "seeking_description": artist.seeking_description,
             "image_link": artist.image_link,
-            "past_shows": [{
-                "venue_id": show.venue_id,
-                "venue_name": show.venue.name,
-                "venue_image_link": show.venue.image_link,
-                "start_time": show.start_time.strftime('%Y-%m-%d %H:%M:%S')
-            } for show in past_shows],
-            "upcoming_shows": [{
-                "venue_id": show.venue_id,
-                "venue_name": show.venue.name,
-                "venue_image_link": show.venue.image_link,
-                "start_time": show.start_time.strftime('%Y-%m-%d %H:%M:%S')
-            } for show in upcoming_shows],
-            "past_shows_count": len(past_shows),
-            "upcoming_shows_count": len(upcoming_shows)
+            "past_shows": schedule.past,
+            "upcoming_shows": schedule.upcoming,
+            "past_shows_count": len(schedule.past),
+            "upcoming_shows_count": len(schedule.upcoming)
         }
 
         # Render template with data
@@ -146,8 +140,6 @@ def edit_artist(artist_id):
         except Exception as e:
             db.session.rollback()
             flash(f'An error occurred. Artist {artist.name} could not be updated: {str(e)}')
-        finally:
-            db.session.close()
 
     return render_template('forms/edit_artist.html', form=form, artist=artist)
 
@@ -173,8 +165,6 @@ def edit_artist_availability(artist_id):
         except Exception as e:
             db.session.rollback()
             flash(f'An error occurred. Availability could not be updated: {str(e)}')
-        finally:
-            db.session.close()
 
     return render_template('forms/edit_availability.html', form=form, artist=artist)
 
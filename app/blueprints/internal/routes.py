@@ -0,0 +1,45 @@
+import hmac
+
+from flask import abort, current_app, jsonify, request
+
+from . import internal_bp
+
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1')
+
+
+@internal_bp.before_request
+def restrict_access():
+    """Only serve operators: a matching `X-Internal-Token`.
+
+    Without an INTERNAL_TOKEN nothing is served, except to loopback
+    clients while debugging or testing. Behind a reverse proxy every
+    client looks like loopback, so that is no check in production.
+    """
+    token = current_app.config.get('INTERNAL_TOKEN')
+    if token:
+        if not hmac.compare_digest(request.headers.get('X-Internal-Token', ''), token):
+            abort(403)
+    elif not (current_app.debug or current_app.testing) or \
+            request.remote_addr not in LOOPBACK_ADDRESSES:
+        abort(403)
+
+
+@internal_bp.route('/pool')
+def pool_metrics():
+    """Connection pool counters and live status of this worker process.
+
+    Multiply `size + max_overflow` by the number of workers to get the
+    connections the deployment may open at peak.
+    """
+    return jsonify(current_app.extensions['pool_metrics'].snapshot())
+
+
+@internal_bp.route('/jobs')
+def job_metrics():
+    """Job queue backlog and outcomes.
+
+    For the 'thread' backend the numbers are those of this worker process,
+    for 'database' those of the whole queue, including its lag, plus this
+    process's pool of local tasks.
+    """
+    return jsonify(current_app.extensions['jobs'].stats())
@@ -1,27 +1,105 @@
-from flask import render_template, request, flash, redirect, url_for, current_app
-from ...models import Show, Artist,Venue, Availability
+from flask import render_template, request, flash, redirect, url_for, current_app, abort
+from ...models import Show, Artist,Venue, ShowListing
 from ...forms import ShowForm
-from ...extensions import db
+from ...extensions import db, cache
+from ...pagination import keyset_paginate, decode_cursor
+from ... import facets, scheduling
+from ...conditional import conditional, show_listing_validator
 from . import shows_bp
-from sqlalchemy import and_
+from datetime import datetime
+from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 
+SHOW_MODES = ('upcoming', 'past')
+
+
+def show_listing_query(mode, now=None, filters=facets.NO_FILTERS):
+    """Build the show listing query for one mode, without order or limit.
+
+    Args:
+        mode (str): 'upcoming' for shows from now on, 'past' for earlier ones.
+        now (datetime, optional): Defaults to the current time.
+        filters (Filters, optional): Facet filters, on the artist's genres
+            and the venue's location.
+
+    Returns:
+        Select: Rows of the `show_listing` read model carrying everything
+            a show card needs, no join involved.
+    """
+    now = now or datetime.now()
+    when = ShowListing.start_time >= now if mode == 'upcoming' else ShowListing.start_time < now
+    return select(
+        ShowListing.id,
+        ShowListing.start_time,
+        ShowListing.start_time_display,
+        ShowListing.venue_id,
+        ShowListing.venue_name,
+        ShowListing.artist_id,
+        ShowListing.artist_name,
+        ShowListing.artist_image_link
+    ).where(when, *facets.conditions(facets.SHOWS, filters))
+
+
 @shows_bp.route('/')
+@conditional(show_listing_validator, tags=('shows', 'venues', 'artists'))
+@cache.cached('shows', 'venues', 'artists')
 def shows():
-    """ Shows all current shows on the page """
-    shows = db.session.query(Show, Venue, Artist).join(
-        Venue).join(Artist).all()
+    """ Shows one page of upcoming or past shows.
+
+    Query string:
+        mode: 'upcoming' (default, soonest first) or 'past' (latest first).
+        per_page: Page size, capped by SHOWS_MAX_PAGE_SIZE.
+        after / before: Cursors of the neighbouring pages.
+        genre / state / city: Facet filters of `app.facets`.
+    """
+    mode = request.args.get('mode', 'upcoming')
+    if mode not in SHOW_MODES:
+        abort(400)
+
+    per_page = request.args.get(
+        'per_page', current_app.config.get('SHOWS_PAGE_SIZE', 30), type=int)
+    per_page = min(max(per_page, 1), current_app.config.get('SHOWS_MAX_PAGE_SIZE', 100))
+
+    try:
+        after = request.args.get('after')
+        before = request.args.get('before')
+        after = decode_cursor(after) if after else None
+        before = decode_cursor(before) if before else None
+    except ValueError:
+        abort(400)
+
+    filters = facets.parse_filters(request.args)
+    page = keyset_paginate(
+        show_listing_query(mode, filters=filters),
+        (ShowListing.start_time, ShowListing.id),
+        per_page,
+        after=after,
+        before=before,
+        descending=(mode == 'past')
+    )
+
     data = []
-    for show, venue, artist in shows:
+    for show in page.items:
         data.append({
-            "venue_id": venue.id,
-            "venue_name": venue.name,
-            "artist_id": artist.id,
-            "artist_name": artist.name,
-            "artist_image_link": artist.image_link,
-            "start_time": show.start_time.isoformat()
+            "venue_id": show.venue_id,
+            "venue_name": show.venue_name,
+            "artist_id": show.artist_id,
+            "artist_name": show.artist_name,
+            "artist_image_link": show.artist_image_link,
+            "start_time": show.start_time,
+            "start_time_display": show.start_time_display
         })
-    return render_template('pages/shows.html', shows=data)
+    return render_template(
+        'pages/shows.html',
+        shows=data,
+        mode=mode,
+        per_page=per_page,
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor,
+        facets=facets.facets(show_listing_query(mode), facets.SHOWS, filters, 'shows.shows',
+                             mode=mode, per_page=per_page),
+        filter_args=facets.filter_args(filters)
+    )
 
 
 @shows_bp.route('/create')
@@ -33,51 +111,54 @@ def create_shows():
 
 @shows_bp.route('/create', methods=['POST'])
 def create_show_submission():
-    """ Creates a show checking against availability of the artists. """
+    """ Creates a show if the artist is available and neither the artist nor
+    the venue has another show overlapping it. """
     form = ShowForm()
-    if form.validate_on_submit():
-        try:
-            artist = Artist.query.get(form.artist_id.data)
-            venue = Venue.query.get(form.venue_id.data)
-
-            requested_start_time = form.start_time.data
-            availability = Availability.query.filter(
-                and_(
-                    Availability.artist_id == artist.id,
-                    Availability.working_period_start <= requested_start_time,
-                    Availability.working_period_end >= requested_start_time
-                )
-            ).first()
-
-            if not availability:
-                flash(f'{artist.name} is not available at the requested time.')
-                return render_template('forms/new_show.html', form=form)
-            
-            existing_show = Show.query.filter(
-                and_(
-                    Show.artist_id == artist.id,
-                    Show.venue_id==venue.id,
-                    Show.start_time == requested_start_time
-                )
-            ).first()
-
-            if existing_show:
-                flash(f'{artist.name} is alas busy at this time')
-                return render_template('forms/new_show.html',form=form)
-
-            new_show = Show(
-                artist_id=artist.id,
-                venue_id=venue.id,
-                start_time=form.start_time.data
-            )
-            db.session.add(new_show)
-            db.session.commit()
-            return redirect(url_for('shows.shows'))
-        
-        except SQLAlchemyError as e:
-            db.session.rollback()
-            current_app.logger.error(f"Database error creating show: {str(e)}")
+    if not form.validate_on_submit():
+        for field, errors in form.errors.items():
+            for error in errors:
+                flash(f'Error in {field}: {error}')
+        return render_template('forms/new_show.html', form=form)
+
+    # No explicit session.close(): Flask-SQLAlchemy removes the session
+    # when the app context ends, closing it here would only detach the
+    # objects of a caller sharing that context.
+    try:
+        artist = db.session.get(Artist, form.artist_id.data)
+        venue = db.session.get(Venue, form.venue_id.data)
+        if artist is None:
+            flash(f'There is no artist with ID {form.artist_id.data}.')
+        if venue is None:
+            flash(f'There is no venue with ID {form.venue_id.data}.')
+        if artist is None or venue is None:
+            return render_template('forms/new_show.html', form=form)
+
+        check = scheduling.check_booking(artist.id, venue.id, form.start_time.data)
+
+        if not check.artist_available:
+            flash(f'{artist.name} is not available at the requested time.')
             return render_template('forms/new_show.html', form=form)
-        finally:
-            db.session.close()
-    
\ No newline at end of file
+
+        if check.artist_busy:
+            flash(f'{artist.name} is alas busy at this time')
+            return render_template('forms/new_show.html',form=form)
+
+        if check.venue_busy:
+            flash(f'{venue.name} already has a show at this time')
+            return render_template('forms/new_show.html', form=form)
+
+        new_show = Show(
+            artist_id=artist.id,
+            venue_id=venue.id,
+            start_time=check.start_time,
+            end_time=check.end_time
+        )
+        db.session.add(new_show)
+        db.session.commit()
+        return redirect(url_for('shows.shows'))
+
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.error(f"Database error creating show: {str(e)}")
+        flash('An error occurred. The show could not be listed.')
+        return render_template('forms/new_show.html', form=form)
@@ -1,45 +1,33 @@
 from flask import render_template, request, flash, redirect, url_for, abort, current_app
-from ...models import Venue,Show
+from ...models import Venue
 from ...forms import VenueForm
-from ...extensions import db
-from sqlalchemy.sql import func, desc
+from ...extensions import db, cache
+from ...directory import venue_areas
+from ... import facets
+from ... import search
+from ...conditional import conditional, record_validator, venue_directory_validator
+from sqlalchemy import select
+from sqlalchemy.sql import desc
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.exc import SQLAlchemyError
-from datetime import datetime
 from . import venues_bp
 
 
 
 @venues_bp.route('/venues')
+@conditional(venue_directory_validator, tags=('venues', 'shows'))
+@cache.cached('venues', 'shows')
 def venues():
-    """ Shows all current venues in database and groups them by city and state. """
+    """ Shows all current venues in database and groups them by city and state.
+
+    Query string: the facet filters of `app.facets` (genre, state, city, seeking).
+    """
     try:
-        locations = db.session.query(Venue.city, Venue.state).distinct().all()
-
-        areas = []
-        for city, state in locations:
-            venues = Venue.query.filter(Venue.city == city, Venue.state == state).all()
-            if venues:  
-                venue_data = []
-                for venue in venues:
-                   
-                    past_shows = venue.get_past_shows()
-                    upcoming_shows = venue.get_upcoming_shows()
-
-                    venue_data.append({
-                        "id": venue.id,
-                        "name": venue.name,
-                        "num_upcoming_shows": len(upcoming_shows),
-                        "num_past_shows": len(past_shows)
-                    })
-
-                areas.append({
-                    "city": city,
-                    "state": state,
-                    "venues": venue_data
-                })
-
-        return render_template('pages/venues.html', areas=areas)
+        filters = facets.parse_filters(request.args)
+        areas = venue_areas(filters)
+        counts = facets.facets(select(Venue.id), facets.VENUES, filters, 'venues.venues')
+        return render_template('pages/venues.html', areas=areas, facets=counts,
+                               seeking_title='Seeking talent')
 
     except Exception as e:
         print(f"Error retrieving venues: {e}")
@@ -53,23 +41,11 @@ def search_venues():
     """ Searches for venues. """
 
     search_term = request.form.get('search_term', '')
-    current_time = datetime.now()
-
-    venues = Venue.query.filter(
-        func.lower(Venue.name).contains(func.lower(search_term))
-    ).all()
-
-    response = {
-        "count": len(venues),
-        "data": [{
-            "id": venue.id,
-            "name": venue.name,
-            "num_upcoming_shows": Show.query.filter(
-                Show.venue_id == venue.id,
-                Show.start_time > current_time
-            ).count()
-        } for venue in venues]
-    }
+    response = search.search_venues(
+        search_term,
+        limit=request.form.get('limit', type=int),
+        offset=request.form.get('offset', type=int)
+    )
 
     return render_template(
         'pages/search_venues.html',
@@ -79,20 +55,22 @@ def search_venues():
 
 
 @venues_bp.route('/<int:venue_id>')
+@conditional(lambda venue_id: record_validator(Venue, venue_id),
+             tags=('venue:{venue_id}', 'artists'))
+@cache.cached('venue:{venue_id}', 'artists')
 def show_venue(venue_id):
     """Shows specific venue with a given id."""
-    try:
-        venue = Venue.query.get_or_404(venue_id)
-        
-        # Fetch past and upcoming shows using the updated methods
-        past_shows = venue.get_past_shows()
-        upcoming_shows = venue.get_upcoming_shows()
+    loaded = Venue.get_with_schedule(venue_id)
+    if loaded is None:
+        abort(404)
+    venue, schedule = loaded
 
-        # Prepare data for rendering
+    try:
+        # Prepare data for rendering, show rows already carry the artist columns
         venue_data = {
             "id": venue.id,
             "name": venue.name,
-            "genres": venue.genres,
+            "genres": venue.genres or [],
             "address": venue.address,
             "city": venue.city,
             "state": venue.state,
@@ -102,20 +80,10 @@ def show_venue(venue_id):
             "seeking_talent": venue.seeking_talent,
             "seeking_description": venue.seeking_description,
             "image_link": venue.image_link,
-            "past_shows": [{
-                "artist_id": show.artist_id,
-                "artist_name": show.artist.name,
-                "artist_image_link": show.artist.image_link,
-                "start_time": show.start_time.strftime('%Y-%m-%d %H:%M:%S')
-            } for show in past_shows],
-            "upcoming_shows": [{
-                "artist_id": show.artist_id,
-                "artist_name": show.artist.name,
-                "artist_image_link": show.artist.image_link,
-                "start_time": show.start_time.strftime('%Y-%m-%d %H:%M:%S')
-            } for show in upcoming_shows],
-            "past_shows_count": len(past_shows),
-            "upcoming_shows_count": len(upcoming_shows)
+            "past_shows": schedule.past,
+            "upcoming_shows": schedule.upcoming,
+            "past_shows_count": len(schedule.past),
+            "upcoming_shows_count": len(schedule.upcoming)
         }
 
         return render_template('pages/show_venue.html', venue=venue_data)
@@ -163,8 +131,6 @@ def create_venue_submission():
                 request.form['name'] +
                 ' could not be listed.')
             print(e)
-        finally:
-            db.session.close()
     else:
         for field, errors in venue_form.errors.items():
             for error in errors:
@@ -220,8 +186,6 @@ def edit_venue_submission(venue_id):
             flash(
                 f'The error occurred. Venue {venue.name} could not be updated.')
             print(e)
-        finally:
-            db.session.close()
     else:
         for field, errors in form.errors.items():
             for error in errors:
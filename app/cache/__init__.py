@@ -0,0 +1,183 @@
+""" Response cache for read-heavy pages, invalidated by model writes.
+
+Cached views declare the tags their output depends on, for example
+`venue:{venue_id}` or `shows`. Every tag has a version counter in the
+cache backend and a response is stored under a key that includes the
+current version of each of its tags. Committing a change to a `Venue`,
+`Artist`, `Show` or `Availability` bumps the versions of the tags it
+touches, so the next request misses and re-renders while stale entries
+simply age out. Serving a hit costs no database access at all.
+
+Settings:
+    CACHE_BACKEND: 'local' (per-process TTL+LRU), 'shared' or 'null'.
+    CACHE_SHARED_URL: Redis URL for 'shared', 'memory://' for a local fake.
+    CACHE_DEFAULT_TTL: Seconds a response is kept.
+    CACHE_MAX_ENTRIES: Size of the local LRU.
+"""
+
+import hashlib
+from functools import wraps
+from threading import Lock
+
+from flask import current_app, has_app_context, make_response, request, session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from .backends import LocalCache, NullCache, SharedCache, shared_client
+
+
+class ViewCache:
+    """Flask extension holding the cache backend and the view decorator."""
+
+    def __init__(self, app=None):
+        # Striped locks so concurrent misses on one key render it only once.
+        self._render_locks = [Lock() for _ in range(64)]
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CACHE_BACKEND', 'local')
+        app.config.setdefault('CACHE_DEFAULT_TTL', 60)
+        app.config.setdefault('CACHE_MAX_ENTRIES', 1024)
+        app.config.setdefault('CACHE_SHARED_URL', 'memory://')
+
+        name = app.config['CACHE_BACKEND']
+        ttl = app.config['CACHE_DEFAULT_TTL']
+        if name == 'local':
+            backend = LocalCache(app.config['CACHE_MAX_ENTRIES'], ttl)
+        elif name == 'shared':
+            backend = SharedCache(shared_client(app.config['CACHE_SHARED_URL']), default_ttl=ttl)
+        elif name == 'null':
+            backend = NullCache()
+        else:
+            raise ValueError(f'Unknown CACHE_BACKEND {name!r}')
+        app.extensions['cache'] = backend
+
+    @property
+    def backend(self):
+        return current_app.extensions['cache']
+
+    def tag_versions(self, tags):
+        """Return the current version of every tag, in order."""
+        versions = self.backend.get_many([f'tag:{tag}' for tag in tags])
+        return [version or 0 for version in versions]
+
+    def invalidate(self, *tags):
+        """Bump the version of `tags`, orphaning every entry depending on them."""
+        for tag in tags:
+            self.backend.incr(f'tag:{tag}')
+
+    def clear(self):
+        self.backend.clear()
+
+    def _cacheable_request(self):
+        # Pending flash messages are rendered into the page, never share them.
+        return request.method == 'GET' and not session.get('_flashes')
+
+    def _key(self, tags):
+        versions = self.tag_versions(tags)
+        query = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+        raw = f'{request.path}?{query}|' + ','.join(
+            f'{tag}={version}' for tag, version in zip(tags, versions))
+        return 'view:' + hashlib.sha1(raw.encode()).hexdigest()
+
+    def cached(self, *tags, ttl=None):
+        """Cache a view's successful GET responses.
+
+        Args:
+            *tags (str): Tags the response depends on, formatted with the
+                view arguments, e.g. 'venue:{venue_id}'.
+            ttl (int, optional): Seconds to keep the response, defaults to
+                `CACHE_DEFAULT_TTL`. It also bounds how long the past and
+                upcoming split of a page can lag behind the clock.
+
+        Example:
+            @venues_bp.route('/<int:venue_id>')
+            @cache.cached('venue:{venue_id}', 'artists')
+            def show_venue(venue_id):
+                ...
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self._cacheable_request():
+                    return view(*args, **kwargs)
+
+                key = self._key([tag.format(**kwargs) for tag in tags])
+                entry = self.backend.get(key)
+                if entry is None:
+                    with self._render_locks[hash(key) % len(self._render_locks)]:
+                        entry = self.backend.get(key)
+                        if entry is None:
+                            response = make_response(view(*args, **kwargs))
+                            if response.status_code != 200 or response.is_streamed:
+                                return response
+                            entry = (response.get_data(), response.status_code,
+                                     response.headers.get('Content-Type'))
+                            self.backend.set(key, entry, ttl)
+                            response.headers['X-Cache'] = 'MISS'
+                            return response
+
+                body, status, content_type = entry
+                response = current_app.response_class(body, status=status, content_type=content_type)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+            return wrapper
+        return decorator
+
+
+def tags_for(target):
+    """Return the cache tags a write to `target` invalidates."""
+    from ..models import Venue, Artist, Show, Availability
+
+    if isinstance(target, Venue):
+        return {'venues', f'venue:{target.id}'}
+    if isinstance(target, Artist):
+        return {'artists', f'artist:{target.id}'}
+    if isinstance(target, Show):
+        tags = {'shows'}
+        # A show moved to another venue or artist changes the old page too,
+        # one orphaned by a deleted venue or artist has no page left there.
+        state = inspect(target)
+        for column in ('venue_id', 'artist_id'):
+            prefix = column.split('_')[0]
+            ids = {getattr(target, column), *state.attrs[column].history.deleted}
+            tags.update(f'{prefix}:{owner_id}' for owner_id in ids if owner_id is not None)
+        return tags
+    if isinstance(target, Availability):
+        tags = {'availability'}
+        if target.artist_id is not None:
+            tags.add(f'artist:{target.artist_id}')
+        return tags
+    return set()
+
+
+def _collect_tags(mapper, connection, target):
+    """Remember the tags touched by a flushed write until the commit."""
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault('cache_tags', set()).update(tags_for(target))
+
+
+def _invalidate_on_commit(session):
+    tags = session.info.pop('cache_tags', None)
+    if tags and has_app_context() and 'cache' in current_app.extensions:
+        from ..extensions import cache
+        cache.invalidate(*sorted(tags))
+
+
+def _discard_on_rollback(session, previous_transaction):
+    session.info.pop('cache_tags', None)
+
+
+def register_invalidation_events():
+    """Bump cache tags whenever a commit writes a cached model."""
+    from ..models import Venue, Artist, Show, Availability
+
+    for model in (Venue, Artist, Show, Availability):
+        for name in ('after_insert', 'after_update', 'after_delete'):
+            if not event.contains(model, name, _collect_tags):
+                event.listen(model, name, _collect_tags)
+    if not event.contains(Session, 'after_commit', _invalidate_on_commit):
+        event.listen(Session, 'after_commit', _invalidate_on_commit)
+        event.listen(Session, 'after_soft_rollback', _discard_on_rollback)
@@ -0,0 +1,217 @@
+""" Cache storage backends: in-process TTL+LRU and a shared key-value store. """
+
+import pickle
+import re
+import time
+from collections import OrderedDict
+from threading import Lock
+
+# Characters a Redis SCAN pattern treats as wildcards, escaped in a literal prefix.
+_GLOB_SPECIAL = re.compile(r'[*?\[\]\\]')
+
+
+class NullCache:
+    """Backend that stores nothing, used when caching is disabled."""
+
+    def get(self, key):
+        return None
+
+    def get_many(self, keys):
+        return [None] * len(keys)
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def incr(self, key):
+        return 0
+
+    def clear(self):
+        pass
+
+
+class LocalCache:
+    """Thread-safe in-process cache with a TTL per entry and LRU eviction.
+
+    Args:
+        max_entries (int): Least recently used entries are evicted past this.
+        default_ttl (int): Seconds an entry lives when `set` gives no ttl,
+            `None` or 0 means forever.
+    """
+
+    def __init__(self, max_entries=1024, default_ttl=300):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key):
+        with self._lock:
+            return self._get(key, time.monotonic())
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            return [self._get(key, now) for key in keys]
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def incr(self, key):
+        """Atomically increment a counter that never expires, return the new value."""
+        with self._lock:
+            value = (self._get(key, time.monotonic()) or 0) + 1
+            self._entries[key] = (value, None)
+            self._entries.move_to_end(key)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SharedCache:
+    """Backend over a Redis-like client shared by every worker process.
+
+    The client needs `get`, `mget`, `set(key, value, ex=None)`,
+    `delete(*keys)`, `incr` and `scan_iter(match, count)`. Values are
+    pickled, counters are stored raw so `incr` stays atomic on the server.
+    """
+
+    clear_batch_size = 500
+
+    def __init__(self, client, prefix='fyyur:', default_ttl=300):
+        self.client = client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+
+    def _load(self, raw):
+        if raw is None:
+            return None
+        try:
+            return pickle.loads(raw)
+        except (pickle.UnpicklingError, EOFError, TypeError, ValueError):
+            # Counters written by incr are plain integers.
+            return int(raw)
+
+    def get(self, key):
+        return self._load(self.client.get(self.prefix + key))
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        return [self._load(raw) for raw in self.client.mget([self.prefix + key for key in keys])]
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl or None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key):
+        return int(self.client.incr(self.prefix + key))
+
+    def clear(self):
+        """Delete the keys under `prefix`, other users of the database keep theirs."""
+        pattern = _GLOB_SPECIAL.sub(r'\\\g<0>', self.prefix) + '*'
+        batch = []
+        for key in self.client.scan_iter(match=pattern, count=self.clear_batch_size):
+            batch.append(key)
+            if len(batch) >= self.clear_batch_size:
+                self.client.delete(*batch)
+                batch = []
+        if batch:
+            self.client.delete(*batch)
+
+
+class FakeSharedClient:
+    """In-memory stand-in for a Redis client, for tests and local runs.
+
+    Select it with `CACHE_SHARED_URL = 'memory://'`.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = Lock()
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry else None
+
+    def mget(self, keys):
+        with self._lock:
+            return [entry[0] if entry else None for entry in map(self._live, keys)]
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            entry = self._live(key)
+            value = int(entry[0]) + 1 if entry else 1
+            self._data[key] = (str(value).encode(), None)
+            return value
+
+    def scan_iter(self, match='*', count=None):
+        """Yield the live keys matching a glob of `*`, `?` and backslash escapes."""
+        pattern = re.compile(''.join(
+            re.escape(part[1:]) if part.startswith('\\') else
+            '.*' if part == '*' else '.' if part == '?' else re.escape(part)
+            for part in re.findall(r'\\.|.', match, re.DOTALL)), re.DOTALL)
+        with self._lock:
+            keys = [key for key in list(self._data)
+                    if self._live(key) and pattern.fullmatch(key)]
+        yield from keys
+
+
+def shared_client(url):
+    """Return a client for `CACHE_SHARED_URL`, 'memory://' gives a `FakeSharedClient`."""
+    if url.startswith('memory://'):
+        return FakeSharedClient()
+    try:
+        import redis
+    except ImportError as e:
+        raise RuntimeError(
+            'CACHE_BACKEND = "shared" needs the redis package: pip install redis') from e
+    return redis.Redis.from_url(url)
@@ -0,0 +1,277 @@
+""" Conditional GET: ETag and Last-Modified validators answered with 304.
+
+A view decorated with `conditional` first runs a validator, a single
+aggregate query over `updated_at` columns, counts and the latest show
+start that has passed, and answers `If-None-Match` or
+`If-Modified-Since` with 304 Not Modified before the view renders
+anything. Otherwise the view runs and its response carries the
+validator, so the next request from the same client, CDN or poller
+costs that one query.
+
+Every model has an `updated_at` column, set from the application clock
+like show start times. Writing a show or an availability window also
+touches `updated_at` of its venue and artist, and so does renaming or
+deleting an artist or venue for the venues or artists it has shows
+with, so a detail page only looks at its own row and the clock. No
+timestamp records a deleted row, so listing validators include row
+counts and produce an ETag but no Last-Modified.
+
+Views that are also cached pass their cache tags: while a cache is
+configured their ETag is made of the tag versions instead, and a
+revalidation costs no database access at all.
+
+Settings:
+    ETAG_VERSION: Part of every ETag, bump it when a deploy changes how
+        pages render so clients do not keep stale copies.
+"""
+
+import hashlib
+import os
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+from sqlalchemy import event, func, inspect, select, update
+
+from .cache.backends import LocalCache, NullCache
+from .extensions import db
+from .models import Venue, Artist, Show, Availability
+
+Validator = namedtuple('Validator', ['parts', 'last_modified'])
+
+# Fields of a venue or artist on the show cards of the other side's pages.
+CARD_FIELDS = ('name', 'image_link')
+
+
+def _newest(values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def _table_version(model):
+    """Row count and newest `updated_at` of a whole table."""
+    return (
+        select(func.count()).select_from(model).scalar_subquery(),
+        select(func.max(model.updated_at)).scalar_subquery(),
+    )
+
+
+def _passed_show(now):
+    """Start of the latest show that has begun, it moves shows from upcoming to past."""
+    return select(func.max(Show.start_time)).where(Show.start_time < now).scalar_subquery()
+
+
+def table_validator(*models):
+    """Validator of a listing that depends on whole tables, ETag only."""
+    row = db.session.execute(select(*(
+        column for model in models for column in _table_version(model)))).one()
+    return Validator(tuple(row), None)
+
+
+def record_validator(model, record_id, now=None):
+    """Validator of a venue or artist page: the record and the clock.
+
+    A counterpart edit that shows on the page touches the record, so its
+    row and the latest show of the record that has begun, one probe of
+    the (venue_id, start_time) or (artist_id, start_time) index, are all
+    there is to read.
+
+    Returns:
+        Validator: Or `None` if there is no such record.
+    """
+    now = now or datetime.now()
+    passed = (
+        select(func.max(Show.start_time))
+        .where(model._show_fk() == record_id, Show.start_time < now)
+        .scalar_subquery()
+    )
+    row = db.session.execute(
+        select(model.updated_at, passed).where(model.id == record_id)).first()
+    if row is None:
+        return None
+    return Validator(tuple(row), _newest(row))
+
+
+def venue_directory_validator():
+    """The directory lists every venue with the show counts of its summary row."""
+    row = db.session.execute(select(
+        *_table_version(Venue),
+        *_table_version(Show),
+        select(func.max(Venue.__stats__.refreshed_at)).scalar_subquery(),
+    )).one()
+    return Validator(tuple(row), None)
+
+
+def show_listing_validator(now=None):
+    """Show cards carry venue and artist names, and pages shift as shows start."""
+    now = now or datetime.now()
+    row = db.session.execute(select(
+        *_table_version(Show),
+        select(func.max(Venue.updated_at)).scalar_subquery(),
+        select(func.max(Artist.updated_at)).scalar_subquery(),
+        _passed_show(now),
+    )).one()
+    return Validator(tuple(row), None)
+
+
+def _etag(parts):
+    raw = '|'.join([str(current_app.config.get('ETAG_VERSION', '')), request.full_path,
+                    *(part.isoformat() if isinstance(part, datetime) else str(part)
+                      for part in parts)])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _http_date(moment):
+    # Timestamps are naive local times, like the show start times they are compared with.
+    return moment.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _not_modified(etag, last_modified):
+    # If-None-Match takes precedence, If-Modified-Since is only consulted without it.
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return _http_date(last_modified) <= request.if_modified_since
+    return False
+
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    # HTTP dates have whole seconds, a change later in the same second
+    # would look unmodified. Fresh pages are validated by ETag alone.
+    if last_modified is not None and datetime.now() - last_modified >= timedelta(seconds=1):
+        response.last_modified = _http_date(last_modified)
+    # Cache, but check back every time: the 304 keeps the check cheap.
+    response.cache_control.no_cache = True
+    return response
+
+
+def _tag_validator(tags, kwargs):
+    """Validator from the versions of cache tags, `None` without a cache.
+
+    The versions change on every commit the cached page depends on. The
+    TTL bucket bounds how long the past and upcoming split of a page can
+    lag behind the clock, as it does for the cached page itself.
+    """
+    from .extensions import cache
+    if isinstance(cache.backend, NullCache):
+        return None
+    tags = [tag.format(**kwargs) for tag in tags]
+    parts = [*tags, *cache.tag_versions(tags),
+             int(time.time() // current_app.config['CACHE_DEFAULT_TTL'])]
+    if isinstance(cache.backend, LocalCache):
+        # Versions count the writes of this process only, another one can
+        # reach the same versions with other content.
+        parts.append(os.getpid())
+    return Validator(tuple(parts), None)
+
+
+def conditional(validator, tags=(), vary=None):
+    """Answer conditional GETs of a view from `validator` before it renders.
+
+    Args:
+        validator (callable): Called with the view arguments, returns a
+            `Validator` or `None` to let the view run unconditionally,
+            e.g. to render its 404.
+        tags (tuple, optional): Cache tags of the view, formatted like
+            those of `cache.cached`. With a cache configured the ETag is
+            built from their versions and `validator` is not called.
+        vary (callable, optional): Called with the view arguments, returns
+            more ETag parts for what the response depends on beyond the
+            URL, or `None` to let the view run unconditionally.
+
+    Example:
+        @venues_bp.route('/<int:venue_id>')
+        @conditional(lambda venue_id: record_validator(Venue, venue_id),
+                     tags=('venue:{venue_id}', 'artists'))
+        @cache.cached('venue:{venue_id}', 'artists')
+        def show_venue(venue_id):
+            ...
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Pending flash messages are rendered into the page.
+            if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            extra = vary(**kwargs) if vary is not None else ()
+            if extra is None:
+                return view(*args, **kwargs)
+
+            state = _tag_validator(tags, kwargs) if tags else None
+            if state is None:
+                state = validator(**kwargs)
+            if state is None:
+                return view(*args, **kwargs)
+
+            etag = _etag((*state.parts, *extra))
+            if _not_modified(etag, state.last_modified):
+                return _set_validators(
+                    current_app.response_class(status=304), etag, state.last_modified)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _set_validators(response, etag, state.last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+def touch_owners(connection, venue_ids=(), artist_ids=()):
+    """Set `updated_at` of the venues and artists whose pages a write changed."""
+    for model, ids in ((Venue, venue_ids), (Artist, artist_ids)):
+        ids = sorted({owner_id for owner_id in ids if owner_id is not None})
+        if ids:
+            connection.execute(
+                update(model).where(model.id.in_(ids)).values(updated_at=datetime.now()))
+
+
+def _values(target, name):
+    """Current and previously loaded values of a column of `target`."""
+    return [getattr(target, name), *inspect(target).attrs[name].history.deleted]
+
+
+def _show_written(mapper, connection, target):
+    touch_owners(connection, _values(target, 'venue_id'), _values(target, 'artist_id'))
+
+
+def _availability_written(mapper, connection, target):
+    touch_owners(connection, artist_ids=_values(target, 'artist_id'))
+
+
+def _touch_counterparts(connection, model, record_id):
+    """Touch the venues or artists `record_id` has shows with."""
+    other = model._counterpart()
+    connection.execute(
+        update(other)
+        .where(other.id.in_(
+            select(other._show_fk()).where(model._show_fk() == record_id).scalar_subquery()))
+        .values(updated_at=datetime.now()))
+
+
+def _counterpart_edited(mapper, connection, target):
+    # The show cards of the other side only display these.
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in CARD_FIELDS):
+        _touch_counterparts(connection, mapper.class_, target.id)
+
+
+def _counterpart_deleted(mapper, connection, target):
+    _touch_counterparts(connection, mapper.class_, target.id)
+
+
+def register_touch_events():
+    """Touch the owners of every show and availability written through the ORM."""
+    # Deletes touch before the row goes, an expired instance cannot load afterwards.
+    for model, handler in ((Show, _show_written), (Availability, _availability_written)):
+        for name in ('after_insert', 'after_update', 'before_delete'):
+            if not event.contains(model, name, handler):
+                event.listen(model, name, handler)
+    for model in (Venue, Artist):
+        for name, handler in (('after_update', _counterpart_edited),
+                              ('before_delete', _counterpart_deleted)):
+            if not event.contains(model, name, handler):
+                event.listen(model, name, handler)
@@ -0,0 +1,69 @@
+""" Builds the city -> venues -> show counts tree used by the venues listing. """
+
+from itertools import groupby
+
+from sqlalchemy import func, select
+
+from .extensions import db
+from .facets import NO_FILTERS, VENUES, conditions
+from .models import Venue, VenueStats
+
+
+def venue_directory_query(filters=NO_FILTERS):
+    """Build the single query behind the venue directory.
+
+    Every venue is outer joined to its `venue_stats` row on the primary
+    key, so the whole tree comes back in one round trip and its cost
+    does not depend on the number of shows.
+
+    Args:
+        filters (Filters, optional): Facet filters from the query string.
+
+    Returns:
+        Select: Rows of (city, state, id, name, num_past_shows, num_upcoming_shows)
+        ordered by area and venue name.
+    """
+    return (
+        select(
+            Venue.city,
+            Venue.state,
+            Venue.id,
+            Venue.name,
+            func.coalesce(VenueStats.past_shows, 0).label('num_past_shows'),
+            func.coalesce(VenueStats.upcoming_shows, 0).label('num_upcoming_shows'),
+        )
+        .outerjoin(VenueStats, VenueStats.venue_id == Venue.id)
+        .where(*conditions(VENUES, filters))
+        .order_by(Venue.state, Venue.city, Venue.name, Venue.id)
+    )
+
+
+def venue_areas(filters=NO_FILTERS):
+    """Return venues grouped by city and state with their show counts.
+
+    The structure matches what `pages/venues.html` expects:
+
+        [
+            {"city": "San Francisco", "state": "CA", "venues": [
+                {"id": 1, "name": "The Musical Hop",
+                 "num_upcoming_shows": 0, "num_past_shows": 1},
+                ...
+            ]},
+            ...
+        ]
+    """
+    rows = db.session.execute(venue_directory_query(filters)).all()
+
+    areas = []
+    for (city, state), venues in groupby(rows, key=lambda row: (row.city, row.state)):
+        areas.append({
+            "city": city,
+            "state": state,
+            "venues": [{
+                "id": row.id,
+                "name": row.name,
+                "num_upcoming_shows": row.num_upcoming_shows,
+                "num_past_shows": row.num_past_shows
+            } for row in venues]
+        })
+    return areas
@@ -1,6 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_moment import Moment
+from .cache import ViewCache
+from .jobs import JobQueue
 
 # Initialize SQLAlchemy for database management
 db = SQLAlchemy()
@@ -9,4 +11,10 @@ db = SQLAlchemy()
 migrate = Migrate()
 
 # Initialize Flask-Moment for handling dates and times
-moment = Moment()
\ No newline at end of file
+moment = Moment()
+
+# Initialize the response cache for read-heavy pages
+cache = ViewCache()
+
+# Initialize the background job queue for work derived from writes
+jobs = JobQueue()
@@ -0,0 +1,200 @@
+""" Faceted filtering of the venue, artist and show listings.
+
+Listings accept these query string filters, combined with AND:
+
+    genre    any of the given genres, repeatable (`?genre=Jazz&genre=Folk`)
+    state    two-letter state
+    city     city name
+    seeking  1 or 0, the venue's or artist's seeking flag
+
+Every facet comes with a count per value. The count of a facet applies
+all filters except its own, so it tells how many results choosing that
+value would give. All facets of a listing are counted by one UNION ALL
+statement, a single round trip.
+
+On PostgreSQL the genre filter is `genres && ARRAY[...]`, served by the
+GIN indexes on `genres`, and genres are counted with `unnest`. Other
+databases store genres as JSON and use `json_each`.
+
+Settings:
+    FACET_LIMIT: Values listed per facet, the most frequent first.
+"""
+
+from collections import namedtuple
+
+from flask import current_app, url_for
+from sqlalchemy import String, case, exists, func, literal, select, true, type_coerce, union_all
+from sqlalchemy.dialects import postgresql
+
+from .extensions import db
+from .models import Venue, Artist, ShowListing
+
+FACETS = ('genre', 'state', 'city', 'seeking')
+
+Filters = namedtuple('Filters', ['genres', 'state', 'city', 'seeking'])
+
+# The columns a listing is filtered and counted on, `seeking` is None for
+# listings without a seeking flag.
+Facetable = namedtuple('Facetable', ['genres', 'state', 'city', 'seeking'])
+
+VENUES = Facetable(Venue.genres, Venue.state, Venue.city, Venue.seeking_talent)
+ARTISTS = Facetable(Artist.genres, Artist.state, Artist.city, Artist.seeking_venue)
+# Shows are filtered on the artist's genres and the venue's location, both
+# copied into the `show_listing` read model.
+SHOWS = Facetable(ShowListing.artist_genres, ShowListing.venue_state, ShowListing.venue_city, None)
+
+FacetValue = namedtuple('FacetValue', ['value', 'count', 'selected', 'url'])
+
+NO_FILTERS = Filters((), None, None, None)
+
+
+def parse_filters(args):
+    """Read the filters of a request's query string."""
+    seeking = args.get('seeking')
+    return Filters(
+        genres=tuple(sorted({genre for genre in args.getlist('genre') if genre})),
+        state=args.get('state') or None,
+        city=args.get('city') or None,
+        seeking={'1': True, '0': False}.get(seeking),
+    )
+
+
+def filter_args(filters):
+    """Query string arguments reproducing `filters`, for `url_for`."""
+    args = {'genre': list(filters.genres), 'state': filters.state, 'city': filters.city,
+            'seeking': None if filters.seeking is None else int(filters.seeking)}
+    return {name: value for name, value in args.items() if value not in (None, [])}
+
+
+def _is_postgres():
+    return db.engine.dialect.name == 'postgresql'
+
+
+def _genre_values(column):
+    """Table valued function producing one row per genre of `column`."""
+    if _is_postgres():
+        # `unnest(genres) AS anon_1(value)`, the column is otherwise named after the alias.
+        values = func.unnest(column).table_valued('value').render_derived()
+    else:
+        values = func.json_each(column).table_valued('value')
+    return values, values.c.value
+
+
+def genres_overlap(column, genres):
+    """PostgreSQL `column && ARRAY[genres]`, answered from the GIN index on genres."""
+    # `db.ARRAY` is the generic type, only the dialect's one has `overlap`.
+    return type_coerce(column, postgresql.ARRAY(String)).overlap(sorted(genres))
+
+
+def _has_genre(column, genres):
+    if _is_postgres():
+        return genres_overlap(column, genres)
+    values, value = _genre_values(column)
+    return exists(select(1).select_from(values).where(value.in_(genres)))
+
+
+def conditions(columns, filters, skip=None):
+    """WHERE clauses of `filters` on a listing, leaving out the facet `skip`."""
+    clauses = []
+    if filters.genres and skip != 'genre':
+        clauses.append(_has_genre(columns.genres, filters.genres))
+    if filters.state and skip != 'state':
+        clauses.append(columns.state == filters.state)
+    if filters.city and skip != 'city':
+        clauses.append(columns.city == filters.city)
+    if filters.seeking is not None and columns.seeking is not None and skip != 'seeking':
+        clauses.append(columns.seeking.is_(filters.seeking))
+    return clauses
+
+
+def facet_counts_query(base, columns, filters):
+    """One statement counting every facet value of a listing.
+
+    Args:
+        base (Select): The unfiltered listing, any selected columns, with
+            its joins and its own conditions such as the show mode.
+        columns (Facetable): The facet columns of the listing.
+        filters (Filters): The current filters.
+
+    Returns:
+        CompoundSelect: Rows of (facet, value, count).
+    """
+    # One row per genre of each listed row, the function may refer to the
+    # tables joined before it.
+    values, genre = _genre_values(columns.genres)
+    grouped = [
+        ('genre', genre, lambda stmt: stmt.join(values, true())),
+        ('state', columns.state, None),
+        ('city', columns.city, None),
+    ]
+    if columns.seeking is not None:
+        grouped.append(('seeking', case((columns.seeking, '1'), else_='0'), None))
+
+    selects = []
+    for facet, value, extend in grouped:
+        stmt = base.with_only_columns(
+            literal(facet).label('facet'), value.label('value'), func.count().label('count'),
+            maintain_column_froms=True)
+        if extend is not None:
+            stmt = extend(stmt)
+        selects.append(
+            stmt.where(*conditions(columns, filters, skip=facet), value.is_not(None))
+            .group_by(value))
+    return union_all(*selects)
+
+
+def _selected(filters, facet, value):
+    if facet == 'genre':
+        return value in filters.genres
+    if facet == 'seeking':
+        return filters.seeking is not None and value == str(int(filters.seeking))
+    return getattr(filters, facet) == value
+
+
+def _toggled(filters, facet, value):
+    """`filters` with `value` of `facet` switched on or off."""
+    if facet == 'genre':
+        genres = set(filters.genres) ^ {value}
+        return filters._replace(genres=tuple(sorted(genres)))
+    if facet == 'seeking':
+        value = value == '1'
+    if getattr(filters, facet) == value:
+        value = None
+    changed = filters._replace(**{facet: value})
+    # A city belongs to a state, choosing another state drops the city.
+    if facet == 'state':
+        changed = changed._replace(city=None)
+    return changed
+
+
+def facets(base, columns, filters, endpoint, **url_args):
+    """Count the facets of a listing and link every value.
+
+    Args:
+        endpoint (str): The listing's endpoint, facet links point to it.
+        url_args: Other query string arguments the links keep, e.g. the
+            show mode. Cursors must be left out, a new filter starts over.
+
+    Returns:
+        dict: Facet name -> [FacetValue], the most frequent first, for the
+            facets the listing has, in `FACETS` order.
+    """
+    limit = current_app.config.get('FACET_LIMIT', 20)
+    counted = {}
+    for facet, value, count in db.session.execute(facet_counts_query(base, columns, filters)):
+        counted.setdefault(facet, []).append((value, count))
+
+    result = {}
+    for facet in FACETS:
+        if facet == 'seeking' and columns.seeking is None:
+            continue
+        ranked = sorted(counted.get(facet, ()), key=lambda item: (-item[1], str(item[0])))
+        values = []
+        for index, (value, count) in enumerate(ranked):
+            selected = _selected(filters, facet, value)
+            if index >= limit and not selected:
+                continue
+            values.append(FacetValue(value, count, selected, url_for(
+                endpoint, **url_args, **filter_args(_toggled(filters, facet, value)))))
+        result[facet] = values
+    return result
@@ -0,0 +1,74 @@
+""" Fast date formatting for templates.
+
+`format_datetime` is the `datetime` Jinja filter. Compared with calling
+`babel.dates.format_datetime` directly it:
+
+- takes `datetime` objects as they come and only parses strings,
+- compiles each Babel pattern and resolves each locale once per
+  (format, locale),
+- remembers the most recent formatted results in a bounded LRU, since a
+  page of shows repeats the same start times over and over.
+"""
+
+from datetime import date, datetime
+from functools import lru_cache
+
+import dateutil.parser
+from babel import Locale
+from babel.dates import format_datetime as babel_format_datetime, parse_pattern
+
+# Patterns behind the format names used by the templates.
+DATETIME_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+
+# Babel's own named formats, which are not plain patterns.
+BABEL_NAMED_FORMATS = ('long', 'short')
+
+RESULT_CACHE_SIZE = 4096
+
+
+def to_datetime(value):
+    """Return `value` as a `datetime`, parsing it only when it is a string."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    return dateutil.parser.parse(value)
+
+
+@lru_cache(maxsize=None)
+def compiled_pattern(format, locale):
+    """Return the compiled Babel pattern and parsed locale for (format, locale)."""
+    return parse_pattern(DATETIME_FORMATS.get(format, format)), Locale.parse(locale)
+
+
+@lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _format(value, format, locale):
+    if format in BABEL_NAMED_FORMATS:
+        return babel_format_datetime(value, format, locale=locale)
+    pattern, parsed_locale = compiled_pattern(format, locale)
+    return pattern.apply(value, parsed_locale)
+
+
+def format_datetime(value, format='medium', locale='en'):
+    """Format a `datetime` (or a date string) for display.
+
+    Args:
+        value (datetime | date | str): The moment to format.
+        format (str): 'full', 'medium', Babel's 'long'/'short' or a custom
+            Babel pattern.
+        locale (str): Locale identifier.
+
+    Returns:
+        str: The formatted date and time.
+    """
+    return _format(to_datetime(value), format, locale)
+
+
+def format_datetimes(values, format='medium', locale='en'):
+    """Format a whole list of values, resolving the pattern only once."""
+    if format not in BABEL_NAMED_FORMATS:
+        compiled_pattern(format, locale)
+    return [_format(to_datetime(value), format, locale) for value in values]
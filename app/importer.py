@@ -0,0 +1,372 @@
+""" Bulk import of venues, artists, shows and availability from CSV or NDJSON.
+
+Rows are streamed from the source, validated with the same WTForms rules
+as the create forms and written in batches of `IMPORT_BATCH_SIZE`, each
+batch one multi-row `INSERT ... VALUES` statement in its own transaction.
+
+- A single form instance per import is re-filled with `form.process` for
+  every row, no request context or CSRF token is involved.
+- Shows of a batch go through `scheduling.check_bookings`, which checks
+  availability and conflicts of the whole batch, including conflicts
+  between rows of the same file, with two set-based queries.
+- Core inserts skip the ORM events, so imported shows update the show
+  summaries and the `show_listing` read model and touch their venues and
+  artists in the same transaction,
+  and the response cache tags and the in-memory search index are
+  invalidated explicitly once the rows landed.
+
+Used by `flask import` and `POST /api/import/<kind>`.
+"""
+
+import csv
+import io
+import json
+import time
+from collections import namedtuple
+from datetime import datetime
+from itertools import islice
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select, tuple_
+from werkzeug.datastructures import MultiDict
+
+from . import conditional, listing, scheduling, stats
+from .extensions import db, cache
+from .forms import VenueForm, ArtistForm, ShowForm, AvailabilityForm
+from .models import Venue, Artist, Show, Availability
+from .search import invalidate_index
+
+FORMATS = ('csv', 'ndjson')
+
+# Form fields holding several values, a CSV cell lists them comma separated.
+MULTI_VALUE_FIELDS = ('genres',)
+
+
+class RowError(ValueError):
+    """A row that cannot be imported, `errors` maps field names to messages."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+ImportSpec = namedtuple(
+    'ImportSpec', ['model', 'form', 'values', 'check_batch', 'tags', 'after_insert'],
+    defaults=(None,))
+
+Rejected = namedtuple('Rejected', ['line', 'errors'])
+
+
+class ImportReport:
+    """Outcome of one import: counts, throughput and the rejected rows."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.read = 0
+        self.inserted = 0
+        self.rejected = []
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.seconds if self.seconds else 0.0
+
+    def as_dict(self):
+        return {
+            'kind': self.kind,
+            'read': self.read,
+            'inserted': self.inserted,
+            'rejected': len(self.rejected),
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'errors': [{'line': r.line, 'errors': r.errors} for r in self.rejected],
+        }
+
+
+def read_rows(stream, format):
+    """Yield (line number, dict) for every record of a text stream."""
+    if format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif format == 'ndjson':
+        for line_num, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = e
+            yield line_num, row
+    else:
+        raise ValueError(f'Unknown import format {format!r}, expected one of {FORMATS}')
+
+
+def _formdata(form, row):
+    """Turn a parsed row into the `MultiDict` the form expects."""
+    data = MultiDict()
+    for name, value in row.items():
+        if value is None or value == '':
+            continue
+        field = getattr(form, name, None)
+        if name in MULTI_VALUE_FIELDS and isinstance(value, str):
+            value = [part.strip() for part in value.split(',') if part.strip()]
+        elif isinstance(value, bool):
+            value = 'y' if value else ''
+        elif field is not None and hasattr(field, 'format') and isinstance(value, str):
+            # Accept any ISO timestamp, the form only parses its own format.
+            try:
+                value = datetime.fromisoformat(value).strftime(field.format[0])
+            except ValueError:
+                pass
+        for item in value if isinstance(value, list) else [value]:
+            data.add(name, str(item))
+    return data
+
+
+def _integer(row, name):
+    try:
+        return int(row[name])
+    except (KeyError, TypeError, ValueError):
+        raise RowError({name: ['Not a valid integer.']})
+
+
+def _optional_datetime(row, name):
+    value = row.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise RowError({name: ['Not a valid datetime value.']})
+
+
+def _venue_values(form, row):
+    return dict(
+        name=form.name.data,
+        city=form.city.data,
+        state=form.state.data,
+        address=form.address.data,
+        phone=form.phone.data,
+        genres=form.genres.data,
+        facebook_link=form.facebook_link.data,
+        image_link=form.image_link.data,
+        website=form.website_link.data,
+        seeking_description=form.seeking_description.data,
+        seeking_talent=form.seeking_talent.data,
+    )
+
+
+def _artist_values(form, row):
+    return dict(
+        name=form.name.data,
+        city=form.city.data,
+        state=form.state.data,
+        phone=form.phone.data,
+        genres=form.genres.data,
+        facebook_link=form.facebook_link.data,
+        image_link=form.image_link.data,
+        seeking_venue=form.seeking_venue.data,
+        seeking_description=form.seeking_description.data,
+    )
+
+
+def _show_values(form, row):
+    # The form defaults start_time to now, an import must state it.
+    if not form.start_time.raw_data:
+        raise RowError({'start_time': ['This field is required.']})
+    start_time = form.start_time.data
+    end_time = _optional_datetime(row, 'end_time')
+    try:
+        scheduling.booking_interval(start_time, end_time - start_time if end_time else None)
+    except ValueError as e:
+        raise RowError({'end_time': [str(e)]})
+    return dict(
+        artist_id=_integer(row, 'artist_id'),
+        venue_id=_integer(row, 'venue_id'),
+        start_time=start_time,
+        end_time=end_time,
+    )
+
+
+def _availability_values(form, row):
+    start, end = form.working_period_start.data, form.working_period_end.data
+    if end <= start:
+        raise RowError({'working_period_end': ['Must be after the start.']})
+    return dict(artist_id=_integer(row, 'artist_id'),
+                working_period_start=start, working_period_end=end)
+
+
+def _existing_ids(model, ids):
+    if not ids:
+        return set()
+    return set(db.session.scalars(select(model.id).where(model.id.in_(ids))))
+
+
+def _no_check(batch):
+    return batch, []
+
+
+def _check_shows(batch):
+    """Reject shows of unknown artists or venues and shows that cannot be booked."""
+    artists = _existing_ids(Artist, {values['artist_id'] for _, values in batch})
+    venues = _existing_ids(Venue, {values['venue_id'] for _, values in batch})
+    rejected, candidates = [], []
+    for line, values in batch:
+        errors = {}
+        if values['artist_id'] not in artists:
+            errors['artist_id'] = ['Unknown artist.']
+        if values['venue_id'] not in venues:
+            errors['venue_id'] = ['Unknown venue.']
+        if errors:
+            rejected.append(Rejected(line, errors))
+        else:
+            candidates.append((line, values))
+
+    checks = scheduling.check_bookings(scheduling.Booking(**values) for _, values in candidates)
+
+    accepted = []
+    for (line, values), check in zip(candidates, checks):
+        if check.ok:
+            accepted.append((line, dict(values, end_time=check.end_time)))
+        else:
+            rejected.append(Rejected(line, {'start_time': [check.reason]}))
+    return accepted, rejected
+
+
+def _check_availability(batch):
+    artists = _existing_ids(Artist, {values['artist_id'] for _, values in batch})
+    accepted, rejected = [], []
+    for line, values in batch:
+        if values['artist_id'] in artists:
+            accepted.append((line, values))
+        else:
+            rejected.append(Rejected(line, {'artist_id': ['Unknown artist.']}))
+    return accepted, rejected
+
+
+def _summarize_shows(rows):
+    connection = db.session.connection()
+    stats.apply_show_changes(connection, [
+        stats.ShowChange(values['venue_id'], values['artist_id'], values['start_time'], 1)
+        for values in rows])
+    # The insert returns no ids, the new shows are found by their booking.
+    listing.sync_shows(connection, tuple_(Show.venue_id, Show.artist_id, Show.start_time).in_(
+        [(values['venue_id'], values['artist_id'], values['start_time']) for values in rows]))
+    conditional.touch_owners(connection,
+                             [values['venue_id'] for values in rows],
+                             [values['artist_id'] for values in rows])
+
+
+def _touch_artists(rows):
+    conditional.touch_owners(db.session.connection(),
+                             artist_ids=[values['artist_id'] for values in rows])
+
+
+def _show_tags(rows):
+    tags = {'shows'}
+    for values in rows:
+        tags.update((f"venue:{values['venue_id']}", f"artist:{values['artist_id']}"))
+    return tags
+
+
+SPECS = {
+    'venues': ImportSpec(Venue, VenueForm, _venue_values, _no_check, lambda rows: {'venues'}),
+    'artists': ImportSpec(Artist, ArtistForm, _artist_values, _no_check, lambda rows: {'artists'}),
+    'shows': ImportSpec(Show, ShowForm, _show_values, _check_shows, _show_tags, _summarize_shows),
+    'availability': ImportSpec(
+        Availability, AvailabilityForm, _availability_values, _check_availability,
+        lambda rows: {'availability'} | {f"artist:{values['artist_id']}" for values in rows},
+        _touch_artists),
+}
+
+
+def _validate(spec, form, row):
+    if not isinstance(row, dict):
+        raise RowError({'row': [f'Not a JSON object: {row}']})
+    form.process(_formdata(form, row))
+    if not form.validate():
+        raise RowError(form.errors)
+    return spec.values(form, row)
+
+
+def import_rows(kind, rows, batch_size=None):
+    """Validate and insert `rows` of `kind`.
+
+    Args:
+        kind (str): One of `SPECS`: 'venues', 'artists', 'shows' or 'availability'.
+        rows (iterable): (line number, dict) pairs, e.g. from `read_rows`.
+        batch_size (int, optional): Rows per INSERT, defaults to `IMPORT_BATCH_SIZE`.
+
+    Returns:
+        ImportReport: Counts, throughput and rejected rows with their errors.
+    """
+    spec = SPECS[kind]
+    batch_size = batch_size or current_app.config.get('IMPORT_BATCH_SIZE', 1000)
+    form = spec.form(formdata=None, meta={'csrf': False})
+    report = ImportReport(kind)
+    started = time.perf_counter()
+    tags = set()
+
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            break
+        report.read += len(chunk)
+
+        batch = []
+        for line, row in chunk:
+            try:
+                batch.append((line, _validate(spec, form, row)))
+            except RowError as e:
+                report.rejected.append(Rejected(line, e.errors))
+
+        accepted, rejected = spec.check_batch(batch) if batch else ([], [])
+        report.rejected.extend(rejected)
+        if accepted:
+            values = [values for _, values in accepted]
+            try:
+                db.session.execute(insert(spec.model).values(values))
+                if spec.after_insert is not None:
+                    spec.after_insert(values)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            report.inserted += len(values)
+            tags |= spec.tags(values)
+
+    if report.inserted:
+        cache.invalidate(*sorted(tags))
+        invalidate_index(spec.model)
+    report.rejected.sort(key=lambda rejected: rejected.line)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def import_stream(kind, stream, format='csv', batch_size=None):
+    """Import a binary or text stream of CSV or NDJSON records."""
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    return import_rows(kind, read_rows(stream, format), batch_size)
+
+
+@click.command('import')
+@click.argument('kind', type=click.Choice(sorted(SPECS)))
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'format', type=click.Choice(FORMATS),
+              help='Defaults to the file extension, csv otherwise.')
+@click.option('--batch-size', type=int, help='Rows per INSERT statement.')
+@with_appcontext
+def import_command(kind, source, format, batch_size):
+    """Bulk import KIND records from SOURCE ('-' for stdin)."""
+    format = format or ('ndjson' if source.name.endswith(('.ndjson', '.jsonl')) else 'csv')
+    report = import_stream(kind, source, format, batch_size)
+    for rejected in report.rejected:
+        click.echo(f'line {rejected.line}: {json.dumps(rejected.errors)}', err=True)
+    click.echo(f'{report.kind}: {report.inserted} inserted, {len(report.rejected)} rejected '
+               f'of {report.read} rows in {report.seconds:.2f}s '
+               f'({report.rows_per_second:.0f} rows/s)')
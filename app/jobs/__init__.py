@@ -0,0 +1,267 @@
+""" Background jobs for work derived from writes, kept off the request path.
+
+Tasks are plain functions registered with `jobs.task`:
+
+    @jobs.task('warm_pages', max_attempts=3)
+    def warm_pages(items):
+        ...
+
+A task registered with `local=True`, or a callable of the app returning
+it, only affects the process running it: it always runs on a thread
+pool of the process that queued it, never in `flask jobs-worker`.
+
+`jobs.enqueue('warm_pages', items=[...])` queues one explicitly. Writes
+queue their derived work on their own: committing a change to a
+`Venue`, `Artist`, `Show` or `Availability` queues `warm_pages` for the
+cache tags it touched, `reindex_search` for changed venues or artists
+and `refresh_matches` for the venues and artists whose recommendations
+it may change. A rolled back transaction queues nothing.
+
+Settings:
+    JOBS_BACKEND: 'thread' (a pool in each web process, the default) or
+        'database' (the persistent `jobs` table, run `flask jobs-worker`).
+    JOBS_WORKERS: Threads of the 'thread' backend and of each worker.
+    JOBS_MAX_ATTEMPTS: Default number of tries before a job fails.
+    JOBS_RETRY_SECONDS: Backoff after the first failure, doubled after each.
+    JOBS_LOCK_SECONDS: A 'database' job still running after this long is
+        presumed orphaned by a dead worker and claimed again.
+    JOBS_SCHEDULE: Task name -> seconds, queued periodically by `flask
+        jobs-schedule`. Run exactly one of it per deployment: web processes
+        only queue the work their writes derive.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import with_appcontext
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from .backends import DatabaseBackend, ThreadBackend
+
+
+class JobQueue:
+    """Flask extension holding the task registry and the queue backend."""
+
+    def __init__(self, app=None):
+        self.tasks = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('JOBS_BACKEND', 'thread')
+        app.config.setdefault('JOBS_WORKERS', 2)
+        app.config.setdefault('JOBS_MAX_ATTEMPTS', 3)
+        app.config.setdefault('JOBS_RETRY_SECONDS', 5)
+        app.config.setdefault('JOBS_LOCK_SECONDS', 600)
+        app.config.setdefault('JOBS_SCHEDULE', {})
+
+        name = app.config['JOBS_BACKEND']
+        retry_seconds = app.config['JOBS_RETRY_SECONDS']
+        if name == 'thread':
+            backend = ThreadBackend(self, app, app.config['JOBS_WORKERS'], retry_seconds)
+        elif name == 'database':
+            backend = DatabaseBackend(self, app, retry_seconds, app.config['JOBS_LOCK_SECONDS'],
+                                      app.config['JOBS_WORKERS'])
+        else:
+            raise ValueError(f'Unknown JOBS_BACKEND {name!r}')
+        app.extensions['jobs'] = backend
+
+        from . import tasks  # noqa: F401, registers the tasks
+
+    @property
+    def backend(self):
+        return current_app.extensions['jobs']
+
+    def task(self, name, max_attempts=None, local=False):
+        """Register a function as the task `name`, called with the job payload.
+
+        Args:
+            local (bool or callable, optional): The task only affects the
+                process running it, or a callable of the app saying so.
+        """
+        def decorator(function):
+            self.tasks[name] = (function, max_attempts, local)
+            return function
+        return decorator
+
+    def max_attempts(self, name, app):
+        _, max_attempts, _ = self.tasks[name]
+        return max_attempts or app.config['JOBS_MAX_ATTEMPTS']
+
+    def is_local(self, name, app):
+        _, _, local = self.tasks[name]
+        return local(app) if callable(local) else local
+
+    def backend_for(self, name, app):
+        """The backend running `name`: the local pool of a persistent queue for local tasks."""
+        backend = app.extensions['jobs']
+        if backend.transactional and self.is_local(name, app):
+            return backend.local
+        return backend
+
+    def enqueue(self, name, **payload):
+        """Queue the task `name` now, independently of any transaction."""
+        if name not in self.tasks:
+            raise KeyError(f'Unknown task {name!r}')
+        self.backend_for(name, current_app).submit(name, payload)
+
+    def execute(self, app, name, payload):
+        """Run a task in a fresh app context, as a backend worker does."""
+        from ..extensions import db
+        function, _, _ = self.tasks[name]
+        with app.app_context():
+            try:
+                function(**payload)
+            finally:
+                db.session.remove()
+
+
+def pending_jobs(session):
+    """Derived work collected from a session's writes: task name -> set of items."""
+    return session.info.setdefault('pending_jobs', {})
+
+
+def _derived_jobs(target):
+    """Return (task name, items) of the derived work a write to `target` causes."""
+    from ..cache import tags_for
+    from ..models import Venue, Artist, Availability
+
+    derived = [('warm_pages', tags_for(target))]
+    if isinstance(target, Venue):
+        derived.append(('reindex_search', {'venues'}))
+        derived.append(('refresh_matches', {f'venue:{target.id}'}))
+    elif isinstance(target, Artist):
+        derived.append(('reindex_search', {'artists'}))
+        derived.append(('refresh_matches', {f'artist:{target.id}'}))
+    elif isinstance(target, Availability):
+        artist_ids = {target.artist_id, *inspect(target).attrs.artist_id.history.deleted}
+        derived.append(('refresh_matches', {
+            f'artist:{artist_id}' for artist_id in artist_ids if artist_id is not None}))
+    return derived
+
+
+def _collect_jobs(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        pending = pending_jobs(session)
+        for name, items in _derived_jobs(target):
+            pending.setdefault(name, set()).update(items)
+
+
+def _queued(session, local=None):
+    """Pop the pending jobs, only the local or only the other ones when `local` is given."""
+    from ..extensions import jobs
+    pending = session.info.get('pending_jobs', {})
+    names = sorted(name for name in pending
+                   if local is None or jobs.is_local(name, current_app) == local)
+    return [(name, {'items': sorted(pending.pop(name))}) for name in names]
+
+
+def _backend():
+    if has_app_context():
+        return current_app.extensions.get('jobs')
+    return None
+
+
+def _insert_with_flush(session, flush_context):
+    # The persistent queue takes its rows in the transaction of the write,
+    # local tasks wait for the commit.
+    backend = _backend()
+    if backend is not None and backend.transactional:
+        jobs = _queued(session, local=False)
+        if jobs:
+            backend.push(session.connection(), jobs)
+
+
+def _submit_on_commit(session):
+    backend = _backend()
+    if backend is None:
+        return
+    if backend.transactional:
+        queued, backend = _queued(session, local=True), backend.local
+    else:
+        queued = _queued(session)
+    for name, payload in queued:
+        backend.submit(name, payload)
+
+
+def _discard_on_rollback(session, previous_transaction):
+    session.info.pop('pending_jobs', None)
+
+
+def register_job_events():
+    """Queue derived work for every committed write of a cached model."""
+    from ..models import Venue, Artist, Show, Availability
+
+    for model in (Venue, Artist, Show, Availability):
+        for name in ('after_insert', 'after_update', 'after_delete'):
+            if not event.contains(model, name, _collect_jobs):
+                event.listen(model, name, _collect_jobs)
+    if not event.contains(Session, 'after_flush_postexec', _insert_with_flush):
+        event.listen(Session, 'after_flush_postexec', _insert_with_flush)
+        event.listen(Session, 'after_commit', _submit_on_commit)
+        event.listen(Session, 'after_soft_rollback', _discard_on_rollback)
+
+
+@click.command('jobs-worker')
+@click.option('--once', is_flag=True, help='Run the jobs due now, then exit.')
+@click.option('--batch-size', default=10, show_default=True, help='Jobs claimed per poll.')
+@click.option('--poll', default=1.0, show_default=True, help='Seconds to sleep when idle.')
+@with_appcontext
+def jobs_worker_command(once, batch_size, poll):
+    """Run jobs from the persistent queue (JOBS_BACKEND=database).
+
+    Start as many workers as needed, on any host, SKIP LOCKED keeps them
+    from claiming the same job.
+    """
+    from ..extensions import jobs
+    backend = jobs.backend
+    if not backend.transactional:
+        raise click.ClickException('jobs-worker needs JOBS_BACKEND=database.')
+
+    with ThreadPoolExecutor(max_workers=current_app.config['JOBS_WORKERS']) as executor:
+        while True:
+            claimed = backend.run_pending(batch_size, executor)
+            if once and not claimed:
+                break
+            if not claimed:
+                time.sleep(poll)
+
+
+@click.command('jobs-schedule')
+@click.option('--once', is_flag=True, help='Queue every scheduled task once, then exit.')
+@with_appcontext
+def jobs_schedule_command(once):
+    """Queue each task of JOBS_SCHEDULE once per its period, in seconds.
+
+    Run one per deployment. With JOBS_BACKEND=database the tasks go to
+    the jobs table for the workers, with 'thread' they run on the pool of
+    this process.
+    """
+    from ..extensions import jobs
+    schedule = current_app.config['JOBS_SCHEDULE']
+    if not schedule:
+        raise click.ClickException('JOBS_SCHEDULE is empty.')
+
+    next_run = dict.fromkeys(schedule, 0.0)
+    while True:
+        for name, seconds in schedule.items():
+            if time.monotonic() >= next_run[name]:
+                jobs.enqueue(name)
+                next_run[name] = time.monotonic() + seconds
+        if once:
+            break
+        time.sleep(max(min(next_run.values()) - time.monotonic(), 0))
+    if not jobs.backend.transactional:
+        jobs.backend.wait()
+
+
+@click.command('jobs-status')
+@with_appcontext
+def jobs_status_command():
+    """Print the queue backlog and job outcomes."""
+    for key, value in current_app.extensions['jobs'].stats().items():
+        click.echo(f'{key}: {value}')
@@ -0,0 +1,237 @@
+""" Job queue backends: an in-process thread pool and a PostgreSQL table. """
+
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, or_, select, update
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(base_seconds, attempt):
+    """Exponential backoff: `base_seconds` after the first failure, doubling after each."""
+    return base_seconds * 2 ** (attempt - 1)
+
+
+class ThreadBackend:
+    """Runs jobs on a thread pool inside the web process.
+
+    Jobs start right after the commit that queued them and are lost if
+    the process exits first, which suits derived work such as warming a
+    cache. A failed job is resubmitted after a backoff until it runs out
+    of attempts.
+    """
+
+    name = 'thread'
+    transactional = False
+
+    def __init__(self, queue, app, workers=2, retry_seconds=5):
+        self.queue = queue
+        self.app = app
+        self.workers = workers
+        self.retry_seconds = retry_seconds
+        self._start()
+
+    def _start(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='jobs')
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self.queued = self.running = self.delayed = 0
+        self.succeeded = self.retried = self.failed = 0
+
+    def after_fork(self):
+        """Start afresh in a forked worker, the parent's threads did not follow."""
+        self._start()
+
+    def submit(self, name, payload, attempt=1):
+        with self._lock:
+            self.queued += 1
+        self._executor.submit(self._run, name, payload, attempt)
+
+    def _run(self, name, payload, attempt):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            self.queue.execute(self.app, name, payload)
+        except Exception:
+            logger.exception('Job %s failed (attempt %d)', name, attempt)
+            retry = attempt < self.queue.max_attempts(name, self.app)
+            with self._lock:
+                if retry:
+                    self.retried += 1
+                    self.delayed += 1
+                else:
+                    self.failed += 1
+            if retry:
+                timer = threading.Timer(retry_delay(self.retry_seconds, attempt),
+                                        self._resubmit, (name, payload, attempt + 1))
+                timer.daemon = True
+                timer.start()
+        else:
+            with self._lock:
+                self.succeeded += 1
+        finally:
+            with self._lock:
+                self.running -= 1
+                self._idle.notify_all()
+
+    def _resubmit(self, name, payload, attempt):
+        with self._lock:
+            self.delayed -= 1
+        self.submit(name, payload, attempt)
+
+    def wait(self, timeout=None):
+        """Block until nothing is queued, running or waiting for a retry.
+
+        Returns:
+            bool: False if `timeout` seconds passed first.
+        """
+        with self._lock:
+            return self._idle.wait_for(
+                lambda: not (self.queued or self.running or self.delayed), timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': self.name,
+                'queued': self.queued,
+                'running': self.running,
+                'delayed': self.delayed,
+                'succeeded': self.succeeded,
+                'retried': self.retried,
+                'failed': self.failed,
+            }
+
+
+class DatabaseBackend:
+    """Persistent queue in the `jobs` table, drained by `flask jobs-worker`.
+
+    Jobs are inserted in the transaction that queued them, so they exist
+    exactly when the write that caused them was committed. Workers claim
+    due jobs with `SELECT ... FOR UPDATE SKIP LOCKED`: any number of them
+    can poll the table without blocking on, or running, each other's
+    jobs. A job whose worker died is claimed again once its lock is
+    older than `lock_seconds`.
+
+    Tasks that only affect the process running them, such as filling an
+    in-process cache, would be wasted on a jobs worker. They go to
+    `local`, a thread pool of the web process that queued them.
+    """
+
+    name = 'database'
+    transactional = True
+
+    def __init__(self, queue, app, retry_seconds=5, lock_seconds=600, workers=2):
+        self.queue = queue
+        self.app = app
+        self.retry_seconds = retry_seconds
+        self.lock_seconds = lock_seconds
+        self.local = ThreadBackend(queue, app, workers, retry_seconds)
+
+    def after_fork(self):
+        """Restart the local pool, the queue itself lives in the database."""
+        self.local.after_fork()
+
+    def _rows(self, jobs, now):
+        return [{'name': name, 'payload': payload, 'status': 'queued', 'attempts': 0,
+                 'max_attempts': self.queue.max_attempts(name, self.app), 'run_at': now,
+                 'created_at': now} for name, payload in jobs]
+
+    def push(self, connection, jobs):
+        """Insert `jobs`, (name, payload) pairs, on the caller's connection."""
+        from ..models import Job
+        connection.execute(insert(Job), self._rows(jobs, datetime.now()))
+
+    def submit(self, name, payload):
+        from ..extensions import db
+        with db.engine.begin() as connection:
+            self.push(connection, [(name, payload)])
+
+    def claim(self, connection, limit, now=None):
+        """Mark up to `limit` due jobs as running and return them."""
+        from ..models import Job
+        now = now or datetime.now()
+        stale = now - timedelta(seconds=self.lock_seconds)
+        due = (
+            select(Job.id)
+            .where(or_(
+                (Job.status == 'queued') & (Job.run_at <= now),
+                (Job.status == 'running') & (Job.locked_at < stale),
+            ))
+            .order_by(Job.run_at, Job.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return connection.execute(
+            update(Job)
+            .where(Job.id.in_(due.scalar_subquery()))
+            .values(status='running', attempts=Job.attempts + 1, locked_at=now)
+            .returning(Job.id, Job.name, Job.payload, Job.attempts, Job.max_attempts)
+        ).all()
+
+    def _finish(self, job, error=None):
+        from ..extensions import db
+        from ..models import Job
+        now = datetime.now()
+        if error is None:
+            values = {'status': 'done', 'finished_at': now, 'last_error': None}
+        elif job.attempts < job.max_attempts:
+            values = {'status': 'queued', 'last_error': error,
+                      'run_at': now + timedelta(seconds=retry_delay(self.retry_seconds, job.attempts))}
+        else:
+            values = {'status': 'failed', 'finished_at': now, 'last_error': error}
+        with db.engine.begin() as connection:
+            connection.execute(update(Job).where(Job.id == job.id).values(**values))
+
+    def run(self, job):
+        """Run one claimed job and record its outcome, from any thread."""
+        error = None
+        try:
+            self.queue.execute(self.app, job.name, job.payload)
+        except Exception:
+            logger.exception('Job %s #%d failed (attempt %d)', job.name, job.id, job.attempts)
+            error = traceback.format_exc(limit=20)
+        with self.app.app_context():
+            self._finish(job, error)
+        return error is None
+
+    def run_pending(self, limit=10, executor=None):
+        """Claim and run up to `limit` due jobs.
+
+        Returns:
+            int: Number of jobs claimed, 0 when the queue had nothing due.
+        """
+        from ..extensions import db
+        with db.engine.begin() as connection:
+            claimed = self.claim(connection, limit)
+        if executor is None:
+            for job in claimed:
+                self.run(job)
+        else:
+            list(executor.map(self.run, claimed))
+        return len(claimed)
+
+    def stats(self):
+        """Jobs per status plus the age of the oldest due job, the queue lag."""
+        from ..extensions import db
+        from ..models import Job
+        now = datetime.now()
+        with db.engine.connect() as connection:
+            counts = dict(connection.execute(
+                select(Job.status, func.count()).group_by(Job.status)).all())
+            oldest = connection.execute(
+                select(func.min(Job.run_at))
+                .where(Job.status == 'queued', Job.run_at <= now)).scalar()
+        return {
+            'backend': self.name,
+            'queued': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'succeeded': counts.get('done', 0),
+            'failed': counts.get('failed', 0),
+            'lag_seconds': round((now - oldest).total_seconds(), 3) if oldest else 0.0,
+            'local': self.local.stats(),
+        }
@@ -0,0 +1,94 @@
+""" Tasks run by the job queue. """
+
+from flask import current_app, url_for
+
+from ..cache.backends import NullCache, SharedCache
+from ..extensions import cache, jobs
+from ..models import Venue, Artist
+from .. import matchmaking, search, stats
+
+# Cache tag pattern -> (endpoint, view argument) of the page it names.
+TAG_PAGES = {
+    'venues': ('venues.venues', None),
+    'artists': ('artists.artists', None),
+    'shows': ('shows.shows', None),
+    'venue': ('venues.show_venue', 'venue_id'),
+    'artist': ('artists.show_artist', 'artist_id'),
+}
+
+SEARCH_MODELS = {'venues': Venue, 'artists': Artist}
+
+
+def page_for(tag):
+    """Return the path of the page a cache tag names, `None` for other tags."""
+    prefix, _, record_id = tag.partition(':')
+    endpoint, argument = TAG_PAGES.get(prefix, (None, None))
+    if endpoint is None or bool(argument) != bool(record_id):
+        return None
+    return url_for(endpoint, **({argument: int(record_id)} if argument else {}))
+
+
+def _process_cache(app):
+    # Only a shared cache is warmed for the other processes too.
+    return not isinstance(app.extensions['cache'], SharedCache)
+
+
+@jobs.task('warm_pages', local=_process_cache)
+def warm_pages(items):
+    """Render the pages of invalidated cache tags so visitors find them cached.
+
+    Args:
+        items (list): Cache tags, e.g. ['shows', 'venue:3'].
+    """
+    if isinstance(cache.backend, NullCache):
+        return
+    with current_app.test_request_context():
+        paths = [path for path in map(page_for, items) if path]
+    limit = current_app.config.get('JOBS_WARM_PAGES_LIMIT', 50)
+
+    client = current_app.test_client()
+    for path in paths[:limit]:
+        response = client.get(path)
+        response.close()
+        # A deleted record's page is gone, anything else is worth a retry.
+        if response.status_code >= 500:
+            raise RuntimeError(f'Warming {path} answered {response.status_code}')
+
+
+@jobs.task('reindex_search', local=True)
+def reindex_search(items):
+    """Rebuild the in-memory search index of changed models before the next search.
+
+    Args:
+        items (list): 'venues' and/or 'artists'.
+    """
+    backend = search.get_backend()
+    if isinstance(backend, search.MemorySearchBackend):
+        for name in items:
+            backend.index_for(SEARCH_MODELS[name])
+
+
+@jobs.task('refresh_stats')
+def refresh_stats(items=()):
+    """Move started shows from upcoming to past in the show summaries."""
+    stats.refresh()
+
+
+@jobs.task('refresh_matches')
+def refresh_matches(items):
+    """Recompute the recommendations a change of these profiles can affect.
+
+    Args:
+        items (list): 'venue:<id>' and 'artist:<id>' of the changed profiles.
+    """
+    ids = {'venue': set(), 'artist': set()}
+    for item in items:
+        side, _, record_id = item.partition(':')
+        ids[side].add(int(record_id))
+    matchmaking.refresh(ids['venue'], ids['artist'])
+
+
+@jobs.task('rebuild_matches')
+def rebuild_matches(items=()):
+    """Recompute every recommendation, availability coverage shifts with the clock."""
+    matchmaking.rebuild()
@@ -0,0 +1,183 @@
+""" Maintenance of the `show_listing` read model.
+
+Every page rendering show cards used to join `shows` with `venue` and
+`artists` and format the start time on each request. `show_listing`
+holds that projection already joined and formatted, one row per show,
+and the show views read it alone.
+
+Writes keep it in step in their own transaction:
+
+- shows inserted, updated or deleted through the ORM have their rows
+  rewritten at the end of the flush, in one statement per kind for the
+  whole flush;
+- renaming a venue or artist, or changing the image, location or genres
+  it shows on cards, updates the rows of its shows;
+- deleting a venue or artist removes its rows (PostgreSQL cascades).
+
+Rows written with raw SQL, or start times displayed in another format
+after a deploy, are repaired by `flask listing-rebuild`.
+"""
+
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete, event, inspect, insert, select, update
+from sqlalchemy.orm import Session
+
+from .extensions import db
+from .formatting import format_datetime
+from .models import Venue, Artist, Show, ShowListing
+
+# Format of `start_time_display`, the one the show cards use.
+DISPLAY_FORMAT = 'full'
+
+# Owner model -> (listing foreign key, {owner column: listing column}).
+DENORMALIZED = {
+    Venue: ('venue_id', {'name': 'venue_name', 'image_link': 'venue_image_link',
+                         'city': 'venue_city', 'state': 'venue_state'}),
+    Artist: ('artist_id', {'name': 'artist_name', 'image_link': 'artist_image_link',
+                           'genres': 'artist_genres'}),
+}
+
+
+def source_query():
+    """The joined projection `show_listing` stores, without the display fields."""
+    return (
+        select(
+            Show.id,
+            Show.start_time,
+            Show.venue_id,
+            Venue.name.label('venue_name'),
+            Venue.image_link.label('venue_image_link'),
+            Venue.city.label('venue_city'),
+            Venue.state.label('venue_state'),
+            Show.artist_id,
+            Artist.name.label('artist_name'),
+            Artist.image_link.label('artist_image_link'),
+            Artist.genres.label('artist_genres'),
+        )
+        .join(Venue, Show.venue_id == Venue.id)
+        .join(Artist, Show.artist_id == Artist.id)
+        .where(Show.start_time.is_not(None))
+    )
+
+
+def _listing_rows(rows, now):
+    return [dict(row._asdict(),
+                 start_time_display=format_datetime(row.start_time, DISPLAY_FORMAT),
+                 refreshed_at=now)
+            for row in rows]
+
+
+def sync_shows(connection, condition, now=None):
+    """Rewrite the listing rows of the shows matching `condition`.
+
+    Args:
+        connection: The connection of the transaction that wrote the shows.
+        condition: WHERE clause on `Show`, e.g. `Show.id.in_(ids)`. Rows of
+            matching shows that no longer exist are only deleted.
+
+    Returns:
+        int: Number of listing rows written.
+    """
+    now = now or datetime.now()
+    connection.execute(
+        delete(ShowListing).where(ShowListing.id.in_(select(Show.id).where(condition))))
+    rows = _listing_rows(connection.execute(source_query().where(condition)), now)
+    if rows:
+        connection.execute(insert(ShowListing), rows)
+    return len(rows)
+
+
+def remove_shows(connection, show_ids):
+    """Delete the listing rows of deleted shows."""
+    if show_ids:
+        connection.execute(delete(ShowListing).where(ShowListing.id.in_(sorted(show_ids))))
+
+
+def rebuild(now=None):
+    """Rewrite the whole listing from `shows`, `venue` and `artists`.
+
+    Returns:
+        int: Number of listing rows written.
+    """
+    now = now or datetime.now()
+    connection = db.session.connection()
+    connection.execute(delete(ShowListing))
+    written = 0
+    # Rows are formatted in Python, insert them a batch at a time.
+    result = connection.execute(source_query().execution_options(yield_per=1000))
+    for rows in result.partitions():
+        connection.execute(insert(ShowListing), _listing_rows(rows, now))
+        written += len(rows)
+    db.session.commit()
+    return written
+
+
+def _pending(session):
+    return session.info.setdefault('listing_shows', {'written': set(), 'deleted': set()})
+
+
+def _show_written(mapper, connection, target):
+    _pending(Session.object_session(target))['written'].add(target.id)
+
+
+def _show_deleted(mapper, connection, target):
+    _pending(Session.object_session(target))['deleted'].add(target.id)
+
+
+def _sync_flushed(session, flush_context):
+    pending = session.info.pop('listing_shows', None)
+    if not pending:
+        return
+    connection = session.connection()
+    remove_shows(connection, pending['deleted'] - pending['written'])
+    if pending['written']:
+        sync_shows(connection, Show.id.in_(sorted(pending['written'])))
+
+
+def _discard_on_rollback(session, previous_transaction):
+    session.info.pop('listing_shows', None)
+
+
+def _owner_updated(mapper, connection, target):
+    column, fields = DENORMALIZED[mapper.class_]
+    state = inspect(target)
+    changed = {listing_column: getattr(target, name) for name, listing_column in fields.items()
+               if state.attrs[name].history.has_changes()}
+    if changed:
+        connection.execute(
+            update(ShowListing)
+            .where(getattr(ShowListing, column) == target.id)
+            .values(**changed, refreshed_at=datetime.now()))
+
+
+def _owner_deleted(mapper, connection, target):
+    # The foreign key cascades on PostgreSQL, SQLite does not enforce it.
+    column, _ = DENORMALIZED[mapper.class_]
+    connection.execute(delete(ShowListing).where(getattr(ShowListing, column) == target.id))
+
+
+def register_listing_events():
+    """Keep `show_listing` in step with every ORM write of a show, venue or artist."""
+    for name, handler in (('after_insert', _show_written),
+                          ('after_update', _show_written),
+                          ('after_delete', _show_deleted)):
+        if not event.contains(Show, name, handler):
+            event.listen(Show, name, handler)
+    for owner in DENORMALIZED:
+        for name, handler in (('after_update', _owner_updated),
+                              ('after_delete', _owner_deleted)):
+            if not event.contains(owner, name, handler):
+                event.listen(owner, name, handler)
+    if not event.contains(Session, 'after_flush', _sync_flushed):
+        event.listen(Session, 'after_flush', _sync_flushed)
+        event.listen(Session, 'after_soft_rollback', _discard_on_rollback)
+
+
+@click.command('listing-rebuild')
+@with_appcontext
+def listing_rebuild_command():
+    """Rewrite the show_listing read model from shows, venues and artists."""
+    click.echo(f'{rebuild()} show listing rows written')
@@ -0,0 +1,333 @@
+""" Venue <-> artist recommendations, precomputed into ranking tables.
+
+Venues seeking talent are matched with artists seeking a venue. A pair
+is only considered when the two share a genre; its score is a weighted
+sum of three components between 0 and 1:
+
+    genre         shared genres / all genres of the two (Jaccard index)
+    location      1 in the same city and state, 0.5 in the same state
+    availability  share of the next MATCH_HORIZON_DAYS the artist has
+                  availability windows for
+
+Every seeking venue and artist keeps its `MATCH_TOP_K` best counterparts
+in `venue_matches` and `artist_matches`, selected with a bounded heap per
+profile, so the ranked endpoints read one short index range.
+
+`flask matches-rebuild` computes both tables for the whole catalog.
+Writing a venue, an artist or an availability window queues the
+`refresh_matches` job, which recomputes only the lists that can change:
+those of the written profiles, of the counterparts sharing a genre with
+them and of the counterparts currently listing them. On PostgreSQL the
+candidates are found with the array overlap operator `&&` through GIN
+indexes on `genres`, other databases filter in Python.
+
+Settings:
+    MATCH_TOP_K: Matches kept per venue and per artist.
+    MATCH_HORIZON_DAYS: Availability looked at, from now on.
+    MATCH_WEIGHTS: Weight of the 'genre', 'location' and 'availability' scores.
+    MATCH_BATCH_SIZE: Rows per multi-row INSERT into the ranking tables.
+"""
+
+import heapq
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, insert, select
+
+from .extensions import db
+from .facets import genres_overlap
+from .models import Venue, Artist, Availability, VenueMatch, ArtistMatch
+
+Profile = namedtuple('Profile', ['id', 'genres', 'city', 'state', 'availability'])
+
+Match = namedtuple('Match', ['score', 'genre_score', 'location_score', 'availability_score'])
+
+DEFAULT_WEIGHTS = {'genre': 0.6, 'location': 0.25, 'availability': 0.15}
+
+
+class TopK:
+    """The `k` best (score, id, item) entries pushed, in a bounded min-heap.
+
+    The root is the worst entry kept, a new entry replaces it only when
+    better, so ranking n candidates costs O(n log k). Equal scores are
+    ranked by ascending id, which keeps the lists stable between runs.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+
+    def push(self, score, item_id, item):
+        entry = (score, -item_id, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def ranked(self):
+        """Return the items kept, best first."""
+        return [item for _, _, item in sorted(self._heap, key=lambda entry: entry[:2],
+                                              reverse=True)]
+
+
+def _settings():
+    config = current_app.config
+    return (config.get('MATCH_TOP_K', 20),
+            config.get('MATCH_HORIZON_DAYS', 90),
+            {**DEFAULT_WEIGHTS, **config.get('MATCH_WEIGHTS', {})})
+
+
+def _profile(row, availability=0.0):
+    return Profile(row.id, frozenset(row.genres or ()), (row.city or '').strip().lower(),
+                   (row.state or '').strip().upper(), availability)
+
+
+def _genre_filter(model, genres):
+    """Condition on genre overlap, `None` where the database cannot evaluate it."""
+    if genres is None or db.engine.dialect.name != 'postgresql':
+        return None
+    return genres_overlap(model.genres, genres)
+
+
+def _load(model, seeking, ids=None, genres=None):
+    stmt = select(model.id, model.genres, model.city, model.state).where(seeking)
+    if ids is not None:
+        stmt = stmt.where(model.id.in_(sorted(ids)))
+    overlap = _genre_filter(model, genres)
+    if overlap is not None:
+        stmt = stmt.where(overlap)
+    rows = db.session.execute(stmt.order_by(model.id)).all()
+    if genres is not None:
+        rows = [row for row in rows if genres.intersection(row.genres or ())]
+    return rows
+
+
+def coverage(windows, start, end):
+    """Share of [start, end) covered by the union of (start, end) windows."""
+    covered = timedelta()
+    reached = start
+    for window_start, window_end in sorted(windows):
+        window_start, window_end = max(window_start, reached), min(window_end, end)
+        if window_end > window_start:
+            covered += window_end - window_start
+            reached = window_end
+    return covered / (end - start)
+
+
+def _availability(artist_ids, now, horizon_days):
+    """Coverage of the next `horizon_days` per artist id."""
+    end = now + timedelta(days=horizon_days)
+    windows = {}
+    rows = db.session.execute(
+        select(Availability.artist_id,
+               Availability.working_period_start,
+               Availability.working_period_end)
+        .where(Availability.artist_id.in_(sorted(artist_ids)),
+               Availability.working_period_start < end,
+               Availability.working_period_end > now))
+    for artist_id, window_start, window_end in rows:
+        windows.setdefault(artist_id, []).append((window_start, window_end))
+    return {artist_id: coverage(spans, now, end) for artist_id, spans in windows.items()}
+
+
+def venue_profiles(ids=None, genres=None):
+    """Profiles of venues seeking talent, optionally only these ids or sharing a genre."""
+    return [_profile(row) for row in _load(Venue, Venue.seeking_talent, ids, genres)]
+
+
+def artist_profiles(now, horizon_days, ids=None, genres=None):
+    """Profiles of artists seeking a venue, optionally only these ids or sharing a genre."""
+    rows = _load(Artist, Artist.seeking_venue, ids, genres)
+    available = _availability([row.id for row in rows], now, horizon_days) if rows else {}
+    return [_profile(row, available.get(row.id, 0.0)) for row in rows]
+
+
+def score(venue, artist, weights):
+    """Score a venue/artist pair.
+
+    Returns:
+        Match: Or `None` when they share no genre.
+    """
+    shared = venue.genres & artist.genres
+    if not shared:
+        return None
+    genre = len(shared) / len(venue.genres | artist.genres)
+    if venue.state and venue.state == artist.state:
+        location = 1.0 if venue.city and venue.city == artist.city else 0.5
+    else:
+        location = 0.0
+    availability = artist.availability
+    total = (weights['genre'] * genre + weights['location'] * location
+             + weights['availability'] * availability)
+    return Match(round(total, 6), round(genre, 6), location, round(availability, 6))
+
+
+def _genre_index(profiles):
+    index = {}
+    for profile in profiles:
+        for genre in profile.genres:
+            index.setdefault(genre, []).append(profile)
+    return index
+
+
+def rank(owners, candidates, k, pair_score):
+    """Top `k` candidates of every owner profile.
+
+    Args:
+        owners (list): Profiles of one side.
+        candidates (list): Profiles of the other side.
+        pair_score (callable): (owner, candidate) -> `Match` or `None`.
+
+    Returns:
+        dict: Owner id -> [(candidate id, Match), ...], best first.
+    """
+    index = _genre_index(candidates)
+    ranked = {}
+    for owner in owners:
+        top = TopK(k)
+        seen = set()
+        for genre in owner.genres:
+            for candidate in index.get(genre, ()):
+                if candidate.id in seen:
+                    continue
+                seen.add(candidate.id)
+                match = pair_score(owner, candidate)
+                if match is not None:
+                    top.push(match.score, candidate.id, (candidate.id, match))
+        ranked[owner.id] = top.ranked()
+    return ranked
+
+
+def _genres(profiles):
+    return frozenset().union(*(profile.genres for profile in profiles))
+
+
+# (match model, owner column, candidate column) of both sides.
+SIDES = {
+    'venue': (VenueMatch, 'venue_id', 'artist_id'),
+    'artist': (ArtistMatch, 'artist_id', 'venue_id'),
+}
+
+
+def _write(side, ranked, owner_ids, now):
+    """Replace the match rows of `owner_ids`, all rows when `owner_ids` is None."""
+    model, owner_column, candidate_column = SIDES[side]
+    stmt = delete(model)
+    if owner_ids is not None:
+        if not owner_ids:
+            return 0
+        stmt = stmt.where(getattr(model, owner_column).in_(sorted(owner_ids)))
+    db.session.execute(stmt)
+
+    rows = [{owner_column: owner_id, candidate_column: candidate_id,
+             **match._asdict(), 'computed_at': now}
+            for owner_id, matches in sorted(ranked.items())
+            for candidate_id, match in matches]
+    batch_size = current_app.config.get('MATCH_BATCH_SIZE', 1000)
+    for offset in range(0, len(rows), batch_size):
+        db.session.execute(insert(model), rows[offset:offset + batch_size])
+    return len(rows)
+
+
+def _venue_pair(weights):
+    return lambda venue, artist: score(venue, artist, weights)
+
+
+def _artist_pair(weights):
+    return lambda artist, venue: score(venue, artist, weights)
+
+
+def rebuild(now=None):
+    """Recompute both ranking tables for the whole catalog.
+
+    Returns:
+        int: Number of match rows written.
+    """
+    now = now or datetime.now()
+    k, horizon_days, weights = _settings()
+    venues = venue_profiles()
+    artists = artist_profiles(now, horizon_days)
+    written = _write('venue', rank(venues, artists, k, _venue_pair(weights)), None, now)
+    written += _write('artist', rank(artists, venues, k, _artist_pair(weights)), None, now)
+    db.session.commit()
+    return written
+
+
+def _listing(side, candidate_ids):
+    """Owners whose current list contains one of `candidate_ids`."""
+    model, owner_column, candidate_column = SIDES[side]
+    if not candidate_ids:
+        return set()
+    return set(db.session.scalars(
+        select(getattr(model, owner_column)).distinct()
+        .where(getattr(model, candidate_column).in_(sorted(candidate_ids)))))
+
+
+def refresh(venue_ids=(), artist_ids=(), now=None):
+    """Recompute the match lists a change of these venues and artists can affect.
+
+    That is the lists of the profiles themselves, of the counterparts
+    sharing a genre with them, which may now rank them, and of the
+    counterparts listing them, whose list may lose them. A profile that
+    stopped seeking, or was deleted, loses its own list.
+
+    Returns:
+        int: Number of match rows written.
+    """
+    now = now or datetime.now()
+    k, horizon_days, weights = _settings()
+    venue_ids, artist_ids = set(venue_ids), set(artist_ids)
+
+    changed_venues = venue_profiles(ids=venue_ids) if venue_ids else []
+    changed_artists = artist_profiles(now, horizon_days, ids=artist_ids) if artist_ids else []
+    venue_owners = set(venue_ids) | _listing('venue', artist_ids)
+    artist_owners = set(artist_ids) | _listing('artist', venue_ids)
+    if changed_artists:
+        venue_owners.update(venue.id for venue in venue_profiles(genres=_genres(changed_artists)))
+    if changed_venues:
+        artist_owners.update(artist.id for artist in artist_profiles(
+            now, horizon_days, genres=_genres(changed_venues)))
+
+    written = 0
+    if venue_owners:
+        venues = venue_profiles(ids=venue_owners)
+        artists = artist_profiles(now, horizon_days, genres=_genres(venues)) if venues else []
+        written += _write('venue', rank(venues, artists, k, _venue_pair(weights)),
+                          venue_owners, now)
+    if artist_owners:
+        artists = artist_profiles(now, horizon_days, ids=artist_owners)
+        venues = venue_profiles(genres=_genres(artists)) if artists else []
+        written += _write('artist', rank(artists, venues, k, _artist_pair(weights)),
+                          artist_owners, now)
+    db.session.commit()
+    return written
+
+
+def matches_query(side, owner_id, limit):
+    """Ranked matches of a venue ('venue') or an artist ('artist') with the counterpart names."""
+    model, owner_column, candidate_column = SIDES[side]
+    counterpart = Artist if side == 'venue' else Venue
+    return (
+        select(getattr(model, candidate_column).label('id'),
+               counterpart.name,
+               counterpart.city,
+               counterpart.state,
+               model.score,
+               model.genre_score,
+               model.location_score,
+               model.availability_score)
+        .join(counterpart, counterpart.id == getattr(model, candidate_column))
+        .where(getattr(model, owner_column) == owner_id)
+        .order_by(model.score.desc(), getattr(model, candidate_column))
+        .limit(limit)
+    )
+
+
+@click.command('matches-rebuild')
+@with_appcontext
+def matches_rebuild_command():
+    """Recompute the venue and artist recommendations for the whole catalog."""
+    click.echo(f'{rebuild()} matches written')
@@ -0,0 +1,51 @@
+"""add trigram search indexes
+
+Revision ID: a3f1c9d2b7e4
+Revises: c256e5084eaa
+Create Date: 2026-10-18 09:12:04.118230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f1c9d2b7e4'
+down_revision = 'c256e5084eaa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Search indexes need PostgreSQL extensions, other databases fall back
+    # to the in-memory search backend.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute("""
+        CREATE OR REPLACE FUNCTION fyyur_search_document(
+            name text, city text, state text, genres varchar[])
+        RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$
+            SELECT lower(concat_ws(' ', name, city, state, array_to_string(genres, ' ')))
+        $$
+    """)
+    op.execute("""
+        CREATE INDEX ix_venue_search_trgm ON venue
+        USING gin (fyyur_search_document(name, city, state, genres) gin_trgm_ops)
+    """)
+    op.execute("""
+        CREATE INDEX ix_artists_search_trgm ON artists
+        USING gin (fyyur_search_document(name, city, state, genres) gin_trgm_ops)
+    """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('DROP INDEX IF EXISTS ix_artists_search_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_venue_search_trgm')
+    op.execute('DROP FUNCTION IF EXISTS fyyur_search_document(text, text, text, varchar[])')
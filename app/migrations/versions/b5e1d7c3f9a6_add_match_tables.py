@@ -0,0 +1,56 @@
+"""add match tables
+
+Revision ID: b5e1d7c3f9a6
+Revises: a8c3e5f1b274
+Create Date: 2026-10-18 23:05:41.207316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e1d7c3f9a6'
+down_revision = 'a8c3e5f1b274'
+branch_labels = None
+depends_on = None
+
+MATCHES = (
+    ('venue_matches', ('venue_id', 'venue'), ('artist_id', 'artists')),
+    ('artist_matches', ('artist_id', 'artists'), ('venue_id', 'venue')),
+)
+
+
+def upgrade():
+    for table, (owner_column, owner), (candidate_column, candidate) in MATCHES:
+        op.create_table(
+            table,
+            sa.Column(owner_column, sa.Integer(), nullable=False),
+            sa.Column(candidate_column, sa.Integer(), nullable=False),
+            sa.Column('score', sa.Float(), nullable=False),
+            sa.Column('genre_score', sa.Float(), nullable=False),
+            sa.Column('location_score', sa.Float(), nullable=False),
+            sa.Column('availability_score', sa.Float(), nullable=False),
+            sa.Column('computed_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint([owner_column], [f'{owner}.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint([candidate_column], [f'{candidate}.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint(owner_column, candidate_column),
+        )
+        # The ranked endpoints read one range of this index.
+        op.create_index(f'ix_{table}_{owner_column}_score', table,
+                        [owner_column, 'score'], unique=False)
+
+    # Candidates sharing a genre are found with `genres && ARRAY[...]`.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index('ix_venue_genres', 'venue', ['genres'], postgresql_using='gin')
+        op.create_index('ix_artists_genres', 'artists', ['genres'], postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_artists_genres', table_name='artists')
+        op.drop_index('ix_venue_genres', table_name='venue')
+
+    for table, (owner_column, _), _ in reversed(MATCHES):
+        op.drop_index(f'ix_{table}_{owner_column}_score', table_name=table)
+        op.drop_table(table)
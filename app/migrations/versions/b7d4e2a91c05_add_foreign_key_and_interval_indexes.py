@@ -0,0 +1,35 @@
+"""add foreign key and interval indexes
+
+Revision ID: b7d4e2a91c05
+Revises: a3f1c9d2b7e4
+Create Date: 2026-10-18 10:02:37.540118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d4e2a91c05'
+down_revision = 'a3f1c9d2b7e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('shows', schema=None) as batch_op:
+        batch_op.create_index('ix_shows_venue_id_start_time', ['venue_id', 'start_time'], unique=False)
+        batch_op.create_index('ix_shows_artist_id_start_time', ['artist_id', 'start_time'], unique=False)
+
+    with op.batch_alter_table('availability', schema=None) as batch_op:
+        batch_op.create_index('ix_availability_artist_id_period',
+                              ['artist_id', 'working_period_start', 'working_period_end'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('availability', schema=None) as batch_op:
+        batch_op.drop_index('ix_availability_artist_id_period')
+
+    with op.batch_alter_table('shows', schema=None) as batch_op:
+        batch_op.drop_index('ix_shows_artist_id_start_time')
+        batch_op.drop_index('ix_shows_venue_id_start_time')
@@ -0,0 +1,31 @@
+"""add facet indexes
+
+Revision ID: c9f4a2e6d815
+Revises: b5e1d7c3f9a6
+Create Date: 2026-10-19 09:12:37.480215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9f4a2e6d815'
+down_revision = 'b5e1d7c3f9a6'
+branch_labels = None
+depends_on = None
+
+FACETED = ('venue', 'artists')
+
+
+def upgrade():
+    # State and city filters, the venue directory is also ordered by them.
+    # The genre filter `genres && ARRAY[...]` uses the GIN indexes created
+    # with the match tables.
+    for table in FACETED:
+        op.create_index(f'ix_{table}_state_city', table, ['state', 'city'], unique=False)
+
+
+def downgrade():
+    for table in reversed(FACETED):
+        op.drop_index(f'ix_{table}_state_city', table_name=table)
@@ -0,0 +1,45 @@
+"""add show end time
+
+Revision ID: d41e8b6f3a27
+Revises: b7d4e2a91c05
+Create Date: 2026-10-18 11:24:51.306472
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41e8b6f3a27'
+down_revision = 'b7d4e2a91c05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('shows', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('end_time', sa.DateTime(), nullable=True))
+
+    # Existing shows get the default two hour length.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("UPDATE shows SET end_time = start_time + interval '120 minutes'")
+    else:
+        op.execute("UPDATE shows SET end_time = datetime(start_time, '+120 minutes')")
+
+    # The booking probe's `artist_id = ? AND tsrange(...) @> tsrange(...)`,
+    # btree_gist lets one GiST index hold both. The range has to spell the
+    # expression of `scheduling.availability_range` exactly.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+        op.execute("""
+            CREATE INDEX ix_availability_artist_period_range ON availability
+            USING gist (artist_id, tsrange(working_period_start, working_period_end, '[)'))
+        """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_availability_artist_period_range', table_name='availability')
+
+    with op.batch_alter_table('shows', schema=None) as batch_op:
+        batch_op.drop_column('end_time')
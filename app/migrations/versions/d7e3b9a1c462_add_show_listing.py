@@ -0,0 +1,93 @@
+"""add show listing
+
+Revision ID: d7e3b9a1c462
+Revises: c9f4a2e6d815
+Create Date: 2026-10-19 14:27:05.913842
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from babel.dates import format_datetime
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7e3b9a1c462'
+down_revision = 'c9f4a2e6d815'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_show_listing_start_time_id', ['start_time', 'id']),
+    ('ix_show_listing_venue_id_start_time', ['venue_id', 'start_time']),
+    ('ix_show_listing_artist_id_start_time', ['artist_id', 'start_time']),
+)
+
+# The 'full' format of the `datetime` filter when this revision was written,
+# copied so the migration does not depend on the application code.
+DISPLAY_PATTERN = "EEEE MMMM, d, y 'at' h:mma"
+DISPLAY_LOCALE = 'en'
+
+
+def upgrade():
+    listing = op.create_table(
+        'show_listing',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('start_time_display', sa.String(length=100), nullable=False),
+        sa.Column('venue_id', sa.Integer(), nullable=False),
+        sa.Column('venue_name', sa.String(length=120), nullable=True),
+        sa.Column('venue_image_link', sa.String(length=500), nullable=True),
+        sa.Column('venue_city', sa.String(length=120), nullable=True),
+        sa.Column('venue_state', sa.String(length=120), nullable=True),
+        sa.Column('artist_id', sa.Integer(), nullable=False),
+        sa.Column('artist_name', sa.String(), nullable=True),
+        sa.Column('artist_image_link', sa.String(length=500), nullable=True),
+        sa.Column('artist_genres',
+                  sa.ARRAY(sa.String(length=50)).with_variant(sa.JSON(), 'sqlite'),
+                  nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['id'], ['shows.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['venue_id'], ['venue.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['artist_id'], ['artists.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    for name, columns in INDEXES:
+        op.create_index(name, 'show_listing', columns, unique=False)
+
+    # The show listing's genre filter, like the one on artists.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index('ix_show_listing_artist_genres', 'show_listing', ['artist_genres'],
+                        postgresql_using='gin')
+
+    # Fill it from the existing shows. Start times are formatted in Python
+    # with the pattern the templates used.
+    connection = op.get_bind()
+    now = datetime.now()
+    rows = connection.execute(sa.text("""
+        SELECT shows.id, shows.start_time,
+               shows.venue_id, venue.name AS venue_name, venue.image_link AS venue_image_link,
+               venue.city AS venue_city, venue.state AS venue_state,
+               shows.artist_id, artists.name AS artist_name,
+               artists.image_link AS artist_image_link, artists.genres AS artist_genres
+        FROM shows
+        JOIN venue ON venue.id = shows.venue_id
+        JOIN artists ON artists.id = shows.artist_id
+        WHERE shows.start_time IS NOT NULL
+    """).columns(start_time=sa.DateTime(),
+                 artist_genres=listing.c.artist_genres.type)).mappings().all()
+    if rows:
+        op.bulk_insert(listing, [
+            dict(row, start_time_display=format_datetime(
+                     row['start_time'], DISPLAY_PATTERN, locale=DISPLAY_LOCALE),
+                 refreshed_at=now)
+            for row in rows])
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_show_listing_artist_genres', table_name='show_listing')
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name='show_listing')
+    op.drop_table('show_listing')
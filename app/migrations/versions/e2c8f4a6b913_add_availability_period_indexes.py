@@ -0,0 +1,31 @@
+"""add availability period indexes
+
+Revision ID: e2c8f4a6b913
+Revises: d7e3b9a1c462
+Create Date: 2026-10-19 17:48:22.106734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c8f4a6b913'
+down_revision = 'd7e3b9a1c462'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Calendar ranges not restricted to one artist. On PostgreSQL the
+    # overlap test `tsrange(...) && tsrange(...)` uses the (artist_id,
+    # range) GiST index of d41e8b6f3a27 instead, GiST serves a condition
+    # on its second column alone.
+    with op.batch_alter_table('availability', schema=None) as batch_op:
+        batch_op.create_index('ix_availability_period',
+                              ['working_period_start', 'working_period_end'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('availability', schema=None) as batch_op:
+        batch_op.drop_index('ix_availability_period')
@@ -0,0 +1,59 @@
+"""add show summary tables
+
+Revision ID: e6a9d3c51f08
+Revises: d41e8b6f3a27
+Create Date: 2026-10-18 19:42:10.518334
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a9d3c51f08'
+down_revision = 'd41e8b6f3a27'
+branch_labels = None
+depends_on = None
+
+SUMMARIES = (
+    ('venue_stats', 'venue_id', 'venue'),
+    ('artist_stats', 'artist_id', 'artists'),
+)
+
+
+def upgrade():
+    for table, column, owner in SUMMARIES:
+        op.create_table(
+            table,
+            sa.Column(column, sa.Integer(), nullable=False),
+            sa.Column('total_shows', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('past_shows', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('upcoming_shows', sa.Integer(), server_default='0', nullable=False),
+            sa.Column('next_show_time', sa.DateTime(), nullable=True),
+            sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint([column], [f'{owner}.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint(column),
+        )
+        op.create_index(f'ix_{table}_next_show_time', table, ['next_show_time'], unique=False)
+
+        # Summarize the existing shows.
+        op.get_bind().execute(sa.text(f"""
+            INSERT INTO {table}
+                ({column}, total_shows, past_shows, upcoming_shows, next_show_time, refreshed_at)
+            SELECT shows.{column},
+                   COUNT(shows.id),
+                   SUM(CASE WHEN shows.start_time < :now THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN shows.start_time >= :now THEN 1 ELSE 0 END),
+                   MIN(CASE WHEN shows.start_time >= :now THEN shows.start_time END),
+                   :now
+            FROM shows JOIN {owner} ON {owner}.id = shows.{column}
+            GROUP BY shows.{column}
+        """).bindparams(sa.bindparam('now', datetime.now(), type_=sa.DateTime())))
+
+
+def downgrade():
+    for table, _, _ in reversed(SUMMARIES):
+        op.drop_index(f'ix_{table}_next_show_time', table_name=table)
+        op.drop_table(table)
@@ -0,0 +1,43 @@
+"""add updated_at to all models
+
+Revision ID: f2b8c4d7a913
+Revises: e6a9d3c51f08
+Create Date: 2026-10-18 21:06:37.902145
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8c4d7a913'
+down_revision = 'e6a9d3c51f08'
+branch_labels = None
+depends_on = None
+
+NEW_COLUMNS = ('artists', 'shows', 'availability')
+
+
+def upgrade():
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    for table in NEW_COLUMNS:
+        if postgresql:
+            # Existing rows take the default, i.e. the time of the migration.
+            op.add_column(table, sa.Column(
+                'updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True))
+        else:
+            # SQLite cannot add a column with a non-constant default.
+            op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+            op.execute(f'UPDATE {table} SET updated_at = CURRENT_TIMESTAMP')
+
+    # Conditional GET validators read max(updated_at) of whole tables.
+    for table in ('venue',) + NEW_COLUMNS:
+        op.create_index(f'ix_{table}_updated_at', table, ['updated_at'], unique=False)
+
+
+def downgrade():
+    for table in ('venue',) + NEW_COLUMNS:
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
+    for table in reversed(NEW_COLUMNS):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
@@ -1,10 +1,246 @@
 from .extensions import db
-from sqlalchemy import func, and_
-from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import func, and_, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.hybrid import hybrid_property
+from collections import namedtuple
+from datetime import datetime, timedelta
 
 
-class Venue(db.Model):
+ShowCounts = namedtuple('ShowCounts', ['past', 'upcoming'])
+
+ShowSchedule = namedtuple('ShowSchedule', ['past', 'upcoming'])
+
+DEFAULT_SHOW_DURATION_MINUTES = 120
+
+
+def show_duration():
+    """Length of a show booked without an end time, `SHOW_DURATION_MINUTES`."""
+    minutes = DEFAULT_SHOW_DURATION_MINUTES
+    if has_app_context():
+        minutes = current_app.config.get('SHOW_DURATION_MINUTES', minutes)
+    return timedelta(minutes=minutes)
+
+
+def _default_show_end_time(context):
+    start_time = context.get_current_parameters().get('start_time')
+    return start_time + show_duration() if start_time else None
+
+
+class ShowSummaryColumns:
+    """Columns of the `venue_stats` and `artist_stats` summary tables.
+
+    One row per venue or artist, kept up to date by `app.stats` as shows
+    are written. A show counts as past or upcoming relative to the moment
+    it was written, `flask stats-refresh` moves the shows that have
+    started since from upcoming to past. `next_show_time` is the earliest
+    upcoming show, so rows due for a refresh are found on its index.
+    """
+
+    total_shows = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    upcoming_shows = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_time = db.Column(db.DateTime, index=True)
+    refreshed_at = db.Column(db.DateTime)
+
+
+class VenueStats(ShowSummaryColumns, db.Model):
+    __tablename__ = 'venue_stats'
+
+    venue_id = db.Column(
+        db.Integer, db.ForeignKey('venue.id', ondelete='CASCADE'), primary_key=True)
+
+
+class ArtistStats(ShowSummaryColumns, db.Model):
+    __tablename__ = 'artist_stats'
+
+    artist_id = db.Column(
+        db.Integer, db.ForeignKey('artists.id', ondelete='CASCADE'), primary_key=True)
+
+
+class MatchScoreColumns:
+    """Columns of the `venue_matches` and `artist_matches` ranking tables.
+
+    Each table holds the top `MATCH_TOP_K` counterparts of every seeking
+    venue or artist, maintained by `app.matchmaking`. `score` is the
+    weighted sum of the three component scores, all between 0 and 1.
+    """
+
+    score = db.Column(db.Float, nullable=False)
+    genre_score = db.Column(db.Float, nullable=False)
+    location_score = db.Column(db.Float, nullable=False)
+    availability_score = db.Column(db.Float, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+
+class VenueMatch(MatchScoreColumns, db.Model):
+    """An artist recommended to a venue seeking talent."""
+
+    __tablename__ = 'venue_matches'
+    __table_args__ = (
+        db.Index('ix_venue_matches_venue_id_score', 'venue_id', 'score'),
+    )
+
+    venue_id = db.Column(
+        db.Integer, db.ForeignKey('venue.id', ondelete='CASCADE'), primary_key=True)
+    artist_id = db.Column(
+        db.Integer, db.ForeignKey('artists.id', ondelete='CASCADE'), primary_key=True)
+
+
+class ArtistMatch(MatchScoreColumns, db.Model):
+    """A venue recommended to an artist seeking a venue."""
+
+    __tablename__ = 'artist_matches'
+    __table_args__ = (
+        db.Index('ix_artist_matches_artist_id_score', 'artist_id', 'score'),
+    )
+
+    artist_id = db.Column(
+        db.Integer, db.ForeignKey('artists.id', ondelete='CASCADE'), primary_key=True)
+    venue_id = db.Column(
+        db.Integer, db.ForeignKey('venue.id', ondelete='CASCADE'), primary_key=True)
+
+
+class ShowStatsMixin:
+    """Show schedule and show counts shared by `Venue` and `Artist`.
+
+    Subclasses name the `Show` foreign key pointing at them in
+    `__show_fk__`, the model on the other side of their shows in
+    `__counterpart__`, their summary table in `__stats__` and the
+    `ShowListing` columns of their show cards in `__card_columns__`. Counts are read
+    from the summary table, a missing summary row means no shows, so
+    listings never aggregate `shows` however large it grows.
+    """
+
+    __show_fk__ = None
+    __counterpart__ = None
+    __stats__ = None
+    __card_columns__ = ()
+
+    @classmethod
+    def _show_fk(cls):
+        return getattr(Show, cls.__show_fk__)
+
+    @classmethod
+    def _stats_fk(cls):
+        return getattr(cls.__stats__, cls.__show_fk__)
+
+    @classmethod
+    def _counterpart(cls):
+        # A name, the counterpart may be declared after this model.
+        return cls.registry._class_registry[cls.__counterpart__]
+
+    @classmethod
+    def _show_card_join(cls):
+        """Return (other model, join condition) of this side's show counterparts."""
+        other = cls._counterpart()
+        return other, other._show_fk() == other.id
+
+    @classmethod
+    def schedule_query(cls, record_id):
+        """Build the query of a record's show cards.
+
+        One row per show from the `show_listing` read model, carrying
+        `start_time`, its display text and the name and image of the
+        artist (for a venue) or venue (for an artist): a single range of
+        the (venue_id, start_time) or (artist_id, start_time) index.
+        """
+        return (
+            select(ShowListing.id, ShowListing.start_time, ShowListing.start_time_display,
+                   *(getattr(ShowListing, name) for name in cls.__card_columns__))
+            .where(getattr(ShowListing, cls.__show_fk__) == record_id)
+            .order_by(ShowListing.start_time, ShowListing.id)
+        )
+
+    def schedule(self, now=None):
+        """Return this record's shows split into past and upcoming.
+
+        Upcoming shows come soonest first and past shows latest first.
+        """
+        now = now or datetime.now()
+        past, upcoming = [], []
+        for row in db.session.execute(self.schedule_query(self.id)):
+            (past if row.start_time < now else upcoming).append(row)
+        past.reverse()
+        return ShowSchedule(past, upcoming)
+
+    @classmethod
+    def get_with_schedule(cls, record_id, now=None):
+        """Load a record and its split schedule in two statements.
+
+        Returns:
+            tuple: (record, ShowSchedule), or `None` if there is no such record.
+        """
+        record = db.session.get(cls, record_id)
+        if record is None:
+            return None
+        return record, record.schedule(now)
+
+    def show_counts(self):
+        """Return this record's past and upcoming show counts."""
+        return self.show_counts_for([self.id])[self.id]
+
+    @classmethod
+    def show_counts_for(cls, ids):
+        """Return show counts for many records in a single primary key lookup.
+
+        Args:
+            ids (iterable): Primary keys of the records to count shows for.
+
+        Returns:
+            dict: Maps every requested id to a `ShowCounts(past, upcoming)`,
+            ids without shows map to `ShowCounts(0, 0)`.
+        """
+        ids = list(ids)
+        counts = dict.fromkeys(ids, ShowCounts(0, 0))
+        if not ids:
+            return counts
+
+        stats = cls.__stats__
+        fk = cls._stats_fk()
+        rows = db.session.execute(
+            select(fk, stats.past_shows, stats.upcoming_shows).where(fk.in_(ids))
+        )
+        for owner_id, past_count, upcoming_count in rows:
+            counts[owner_id] = ShowCounts(past_count, upcoming_count)
+        return counts
+
+    @classmethod
+    def _show_count_expression(cls, column):
+        return func.coalesce(
+            select(column)
+            .where(cls._stats_fk() == cls.id)
+            .correlate_except(cls.__stats__)
+            .scalar_subquery(),
+            0)
+
+    @hybrid_property
+    def past_shows_count(self):
+        return self.show_counts().past
+
+    @past_shows_count.expression
+    def past_shows_count(cls):
+        return cls._show_count_expression(cls.__stats__.past_shows).label('past_shows_count')
+
+    @hybrid_property
+    def upcoming_shows_count(self):
+        return self.show_counts().upcoming
+
+    @upcoming_shows_count.expression
+    def upcoming_shows_count(cls):
+        return cls._show_count_expression(
+            cls.__stats__.upcoming_shows).label('upcoming_shows_count')
+
+
+class Venue(ShowStatsMixin, db.Model):
     __tablename__ = 'venue'
+    __table_args__ = (
+        db.Index('ix_venue_state_city', 'state', 'city'),
+    )
+    __show_fk__ = 'venue_id'
+    __counterpart__ = 'Artist'
+    __stats__ = VenueStats
+    __card_columns__ = ('artist_id', 'artist_name', 'artist_image_link')
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
@@ -17,108 +253,201 @@ class Venue(db.Model):
     website = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean, default=False,nullable=False)
     seeking_description = db.Column(db.String(500))
-    genres = db.Column(db.ARRAY(db.String(50)))
+    genres = db.Column(db.ARRAY(db.String(50)).with_variant(db.JSON, 'sqlite'))
     shows = db.relationship('Show', back_populates='venue',lazy='dynamic')
     created_at = db.Column(db.DateTime, server_default=func.now())
     updated_at = db.Column(
         db.DateTime,
         server_default=func.now(),
-        onupdate=func.now())
+        default=datetime.now,
+        onupdate=datetime.now,
+        index=True)
 
     def __repr__(self):
         return f'<Vanue {self.id} {self.name}>'
-    
+
     def get_past_shows(self):
         """Retrieve all past shows for this venue."""
-        return db.session.query(Show).join(Venue).filter(
+        return db.session.query(Show).filter(
             Show.venue_id == self.id,
             Show.start_time < datetime.now()
         ).all()
 
     def get_upcoming_shows(self):
         """Retrieve all upcoming shows for this venue."""
-        return db.session.query(Show).join(Venue).filter(
+        return db.session.query(Show).filter(
             Show.venue_id == self.id,
             Show.start_time >= datetime.now()
         ).all()
 
-    @property
-    def past_shows_count(self):
-        return len(self.get_past_shows())
-    
-    @property
-    def upcoming_shows_count(self):
-        return len(self.get_upcoming_shows())
-
 
-class Artist(db.Model):
+class Artist(ShowStatsMixin, db.Model):
     __tablename__ = 'artists'
+    __table_args__ = (
+        db.Index('ix_artists_state_city', 'state', 'city'),
+    )
+    __show_fk__ = 'artist_id'
+    __counterpart__ = 'Venue'
+    __stats__ = ArtistStats
+    __card_columns__ = ('venue_id', 'venue_name', 'venue_image_link')
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column(db.ARRAY(db.String(50)))
+    genres = db.Column(db.ARRAY(db.String(50)).with_variant(db.JSON, 'sqlite'))
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean, default=False, nullable=False)
     seeking_description = db.Column(db.String(500))
     shows = db.relationship('Show', back_populates='artist', lazy='dynamic')
     availabilities = db.relationship('Availability', back_populates='artist')
+    updated_at = db.Column(
+        db.DateTime,
+        server_default=func.now(),
+        default=datetime.now,
+        onupdate=datetime.now,
+        index=True)
 
 
     def __repr__(self):
         return f'< Artist is {self.name} {self.id}>'
-    
+
 
     def get_past_shows(self):
         """Retrieve all past shows for this artist."""
-        return db.session.query(Show).join(Artist).filter(
+        return db.session.query(Show).filter(
             Show.artist_id == self.id,
             Show.start_time < datetime.now()
         ).all()
 
     def get_upcoming_shows(self):
         """Retrieve all upcoming shows for this artist."""
-        return db.session.query(Show).join(Artist).filter(
+        return db.session.query(Show).filter(
             Show.artist_id == self.id,
             Show.start_time >= datetime.now()
         ).all()
 
-    @property
-    def upcoming_shows_count(self):
-        return self.shows.filter(Show.start_time > datetime.now()).count()
-
-    @property
-    def past_shows_count(self):
-        return self.shows.filter(Show.start_time <= datetime.now()).count()
-
 class Show(db.Model):
     __tablename__ = 'shows'
+    __table_args__ = (
+        db.Index('ix_shows_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_shows_artist_id_start_time', 'artist_id', 'start_time'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200))
     start_time = db.Column(db.DateTime, index=True)
+    end_time = db.Column(db.DateTime, default=_default_show_end_time)
     venue_id = db.Column(db.Integer, db.ForeignKey('venue.id'))
     artist_id = db.Column(db.Integer, db.ForeignKey('artists.id'))
 
     venue = db.relationship('Venue', back_populates ='shows')
     artist = db.relationship('Artist', back_populates ='shows')
+    updated_at = db.Column(
+        db.DateTime,
+        server_default=func.now(),
+        default=datetime.now,
+        onupdate=datetime.now,
+        index=True)
 
     def __repr__(self):
         return f'<Show {self.id}: {self.name}>'
 
+    @classmethod
+    def count_columns(cls, now=None):
+        """Return (past, upcoming) conditional COUNT aggregates over shows.
+
+        Both compile to `COUNT(shows.id) FILTER (WHERE ...)` and can be
+        labelled and grouped by any query that joins `shows`.
+        """
+        now = now or datetime.now()
+        return (
+            func.count(cls.id).filter(cls.start_time < now),
+            func.count(cls.id).filter(cls.start_time >= now),
+        )
+
+
+class ShowListing(db.Model):
+    """Read model of the show pages: a show joined with its venue and artist.
+
+    One row per show whose venue and artist exist, holding every column a
+    show card displays, its formatted start time included, so listings
+    and schedules read a single table. `app.listing` keeps it in step with
+    writes to shows, venues and artists.
+    """
+
+    __tablename__ = 'show_listing'
+    __table_args__ = (
+        db.Index('ix_show_listing_start_time_id', 'start_time', 'id'),
+        db.Index('ix_show_listing_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_show_listing_artist_id_start_time', 'artist_id', 'start_time'),
+    )
+
+    id = db.Column(db.Integer, db.ForeignKey('shows.id', ondelete='CASCADE'), primary_key=True)
+    start_time = db.Column(db.DateTime, nullable=False)
+    start_time_display = db.Column(db.String(100), nullable=False)
+    venue_id = db.Column(
+        db.Integer, db.ForeignKey('venue.id', ondelete='CASCADE'), nullable=False)
+    venue_name = db.Column(db.String(120))
+    venue_image_link = db.Column(db.String(500))
+    venue_city = db.Column(db.String(120))
+    venue_state = db.Column(db.String(120))
+    artist_id = db.Column(
+        db.Integer, db.ForeignKey('artists.id', ondelete='CASCADE'), nullable=False)
+    artist_name = db.Column(db.String)
+    artist_image_link = db.Column(db.String(500))
+    artist_genres = db.Column(db.ARRAY(db.String(50)).with_variant(db.JSON, 'sqlite'))
+    refreshed_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f'<ShowListing {self.id}: {self.artist_name} at {self.venue_name}>'
+
 
 class Availability(db.Model):
 
     __tablename__ = 'availability'
+    __table_args__ = (
+        db.Index('ix_availability_artist_id_period',
+                 'artist_id', 'working_period_start', 'working_period_end'),
+        db.Index('ix_availability_period', 'working_period_start', 'working_period_end'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     working_period_start = db.Column(db.DateTime)
     working_period_end = db.Column(db.DateTime)
     artist_id = db.Column(db.Integer, db.ForeignKey('artists.id'))
     artist = db.relationship('Artist', back_populates ='availabilities')
+    updated_at = db.Column(
+        db.DateTime,
+        server_default=func.now(),
+        default=datetime.now,
+        onupdate=datetime.now,
+        index=True)
+
+    def __repr__(self):
+        return f'<Availability {self.id}: {self.working_period_start} -> {self.working_period_end}>'
+
+class Job(db.Model):
+    """A task waiting in, or done by, the persistent job queue of `app.jobs`."""
+
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON().with_variant(JSONB, 'postgresql'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued', server_default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    max_attempts = db.Column(db.Integer, nullable=False, default=3, server_default='3')
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    locked_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
 
     def __repr__(self):
-        return f'<Availability {self.id}: {self.working_period_start} -> {self.working_period_end}>'
\ No newline at end of file
+        return f'<Job {self.id} {self.name} {self.status}>'
@@ -0,0 +1,100 @@
+""" Keyset (cursor) pagination over a unique, ordered tuple of columns. """
+
+import base64
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+from .extensions import db
+
+Page = namedtuple('Page', ['items', 'next_cursor', 'prev_cursor'])
+
+
+def encode_cursor(start_time, row_id):
+    """Encode a (start_time, id) position as an opaque, URL-safe cursor."""
+    raw = f'{start_time.isoformat()}|{row_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor made by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        start_time, row_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return datetime.fromisoformat(start_time), int(row_id)
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f'Invalid cursor {cursor!r}') from e
+
+
+def keyset_query(stmt, columns, per_page, after=None, before=None, descending=False):
+    """Position, order and limit `stmt` for one keyset page.
+
+    The statement fetches one row more than `per_page` so `keyset_page`
+    can tell whether a further page exists. Arguments are those of
+    `keyset_paginate`.
+    """
+    key = tuple_(*columns)
+    backwards = before is not None
+
+    if after is not None:
+        stmt = stmt.where(key < tuple_(*after) if descending else key > tuple_(*after))
+    if backwards:
+        stmt = stmt.where(key > tuple_(*before) if descending else key < tuple_(*before))
+
+    reverse = descending != backwards
+    order = [column.desc() if reverse else column.asc() for column in columns]
+    return stmt.order_by(*order).limit(per_page + 1)
+
+
+def keyset_page(rows, columns, per_page, after=None, before=None):
+    """Turn the rows fetched by `keyset_query` into a `Page`."""
+    backwards = before is not None
+    has_more = len(rows) > per_page
+    rows = list(rows[:per_page])
+    if backwards:
+        rows.reverse()
+
+    def cursor(row):
+        return encode_cursor(*(getattr(row, column.key) for column in columns))
+
+    if not rows:
+        return Page(rows, None, None)
+
+    has_next = has_more if not backwards else True
+    has_prev = has_more if backwards else after is not None
+    return Page(
+        rows,
+        cursor(rows[-1]) if has_next else None,
+        cursor(rows[0]) if has_prev else None,
+    )
+
+
+def keyset_paginate(stmt, columns, per_page, after=None, before=None, descending=False):
+    """Return one page of `stmt` positioned after or before a cursor.
+
+    Unlike OFFSET, the database seeks straight to the cursor through the
+    index on `columns`, so every page costs the same however deep it is.
+
+    Args:
+        stmt (Select): The unordered, unlimited query to page through.
+        columns (tuple): Columns forming a unique sort key, e.g.
+            (Show.start_time, Show.id). Every row must select them under
+            the same names.
+        per_page (int): Number of rows per page.
+        after (tuple, optional): Key of the last row of the previous page.
+        before (tuple, optional): Key of the first row of the next page,
+            used to walk backwards.
+        descending (bool): Order rows newest first.
+
+    Returns:
+        Page: The rows and the cursors of the neighbouring pages, `None`
+        where there is no neighbouring page.
+    """
+    stmt = keyset_query(stmt, columns, per_page, after, before, descending)
+    rows = db.session.execute(stmt).all()
+    return keyset_page(rows, columns, per_page, after, before)
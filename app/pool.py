@@ -0,0 +1,151 @@
+""" Connection pool configuration from the environment, plus pool metrics.
+
+`engine_options` turns the `DB_*` settings into `SQLALCHEMY_ENGINE_OPTIONS`
+and `PoolMetrics` counts what the pool does with them: checkouts, time
+spent waiting for a connection, overflow and invalidations. The numbers
+are served by `/internal/pool` so worker counts can be sized against the
+database's `max_connections`.
+"""
+
+import time
+from threading import Lock
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+def engine_options(config):
+    """Build engine options for `SQLALCHEMY_DATABASE_URI` from `DB_*` settings.
+
+    Sizing options only apply to PostgreSQL, SQLite keeps the pool
+    Flask-SQLAlchemy picks for it.
+
+    Settings:
+        DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (seconds to wait for
+        a connection), DB_POOL_RECYCLE (seconds), DB_POOL_PRE_PING,
+        DB_STATEMENT_TIMEOUT_MS (0 disables it), DB_APPLICATION_NAME.
+    """
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'postgresql':
+        return {}
+
+    options = {
+        'pool_size': config.get('DB_POOL_SIZE', 5),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+    }
+    connect_args = {'application_name': config.get('DB_APPLICATION_NAME', 'fyyur')}
+    statement_timeout = config.get('DB_STATEMENT_TIMEOUT_MS', 0)
+    if statement_timeout:
+        connect_args['options'] = f'-c statement_timeout={int(statement_timeout)}'
+    options['connect_args'] = connect_args
+    return options
+
+
+class PoolMetrics:
+    """Counters fed by pool events, safe to update from any thread."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidations = 0
+            self.soft_invalidations = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+            self.overflow_max = 0
+        self.pool = None
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            overflow = getattr(self.pool, 'overflow', None)
+            if overflow is not None:
+                self.overflow_max = max(self.overflow_max, overflow())
+
+    def attach(self, engine):
+        """Listen to the pool events of `engine`."""
+        self.pool = engine.pool
+        event.listen(engine, 'connect', lambda *args: self._count('connects'))
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', lambda *args: self._count('checkins'))
+        event.listen(engine, 'invalidate', lambda *args: self._count('invalidations'))
+        event.listen(engine, 'soft_invalidate', lambda *args: self._count('soft_invalidations'))
+
+    def snapshot(self):
+        """Return the counters and the live pool status as a dict."""
+        with self._lock:
+            data = {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'invalidations': self.invalidations,
+                'soft_invalidations': self.soft_invalidations,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+                'wait_seconds_avg': round(self.wait_seconds_total / self.checkouts, 6)
+                if self.checkouts else 0.0,
+                'overflow_max': self.overflow_max,
+            }
+        pool = self.pool
+        data['pool'] = type(pool).__name__ if pool is not None else None
+        if isinstance(pool, QueuePool):
+            data.update({
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': max(pool.overflow(), 0),
+                'max_overflow': pool._max_overflow,
+                'timeout': pool.timeout(),
+            })
+        return data
+
+
+def instrumented_pool_class(metrics):
+    """Return a `QueuePool` subclass that times how long checkouts wait."""
+
+    class InstrumentedQueuePool(QueuePool):
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                return super().connect()
+            finally:
+                metrics.record_wait(time.perf_counter() - started)
+
+    return InstrumentedQueuePool
+
+
+def init_app(app):
+    """Apply the `DB_*` engine options to `app` and prepare its pool metrics.
+
+    Must run before `db.init_app(app)`, `attach_metrics` after it.
+    """
+    metrics = PoolMetrics()
+    options = engine_options(app.config)
+    if options:
+        options['poolclass'] = instrumented_pool_class(metrics)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    app.extensions['pool_metrics'] = metrics
+
+
+def attach_metrics(app, db):
+    with app.app_context():
+        app.extensions['pool_metrics'].attach(db.engine)
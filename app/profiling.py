@@ -0,0 +1,173 @@
+""" Per-request SQL profiling and N+1 detection.
+
+Every statement the engine runs during a request is timed and reduced to
+its shape: the SQL with literals, bound parameters and IN lists collapsed.
+After the request:
+
+- the query count and database time go out in a `Server-Timing` header,
+  so they show up in the browser's network panel,
+- requests over `PROFILER_MAX_QUERIES` or `PROFILER_SLOW_DB_MS` are
+  logged, together with the shapes run `PROFILER_DUPLICATE_THRESHOLD`
+  times or more, which is what a query issued per row looks like.
+
+`query_budget` enforces the same counts around any block of code, so a
+test can pin a route to the number of queries it is meant to issue.
+
+Settings:
+    PROFILER_ENABLED: Profile requests. `query_budget` counts either way.
+    PROFILER_MAX_QUERIES: Log requests issuing more statements than this.
+    PROFILER_SLOW_DB_MS: Log requests spending longer than this in the database.
+    PROFILER_DUPLICATE_THRESHOLD: Repeats of one shape reported as duplicates.
+    PROFILER_SERVER_TIMING: Add the `Server-Timing` header.
+"""
+
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAMETER = re.compile(r'%\(\w+\)s|%s|:\w+|\?')
+_LIST = re.compile(r'\?(?:\s*,\s*\?)+')
+_SPACE = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    """Reduce SQL to its shape so repeats with other parameters compare equal."""
+    shape = _STRING.sub('?', statement)
+    shape = _PARAMETER.sub('?', shape)
+    shape = _NUMBER.sub('?', shape)
+    shape = _LIST.sub('?', shape)
+    return _SPACE.sub(' ', shape).strip()
+
+
+class QueryProfile:
+    """Statements and database time collected over one request or block."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+        self.statements = []
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+        self.statements.append(statement)
+
+    @property
+    def milliseconds(self):
+        return self.seconds * 1000
+
+    def duplicates(self, threshold=2):
+        """Return {shape: count} for shapes run at least `threshold` times."""
+        return {shape: count for shape, count in self.shapes.most_common() if count >= threshold}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by `query_budget` when a block issues too many statements."""
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._profiler_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_profiler_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    for profile in _active_profiles():
+        profile.record(statement, elapsed)
+
+
+def _active_profiles():
+    if not has_app_context():
+        return ()
+    profiles = list(g.get('query_budgets', ()))
+    profile = g.get('query_profile')
+    if profile is not None:
+        profiles.append(profile)
+    return profiles
+
+
+@contextmanager
+def query_budget(max_queries):
+    """Fail when the block issues more than `max_queries` statements.
+
+    Needs an application context. Requests a test client sends inside the
+    block share it, so their statements are counted too.
+
+    Example:
+        with app.app_context(), query_budget(2):
+            client.get('/venues/1')
+
+    Raises:
+        QueryBudgetExceeded: Listing the shapes that ran, most repeated first.
+    """
+    profile = QueryProfile()
+    budgets = g.setdefault('query_budgets', [])
+    budgets.append(profile)
+    try:
+        yield profile
+    finally:
+        budgets.remove(profile)
+    if profile.count > max_queries:
+        shapes = '\n'.join(f'  {count} x {shape}' for shape, count in profile.shapes.most_common())
+        raise QueryBudgetExceeded(
+            f'{profile.count} queries issued, budget is {max_queries}:\n{shapes}')
+
+
+def _start_request():
+    g.query_profile = QueryProfile()
+    g.request_started = time.perf_counter()
+
+
+def _finish_request(response):
+    profile = g.pop('query_profile', None)
+    if profile is None:
+        return response
+    config = current_app.config
+    total_ms = (time.perf_counter() - g.request_started) * 1000
+
+    if config['PROFILER_SERVER_TIMING']:
+        response.headers.add(
+            'Server-Timing', f'db;dur={profile.milliseconds:.2f};desc="{profile.count} queries"')
+        response.headers.add('Server-Timing', f'app;dur={total_ms:.2f}')
+
+    duplicates = profile.duplicates(config['PROFILER_DUPLICATE_THRESHOLD'])
+    if (profile.count > config['PROFILER_MAX_QUERIES']
+            or profile.milliseconds > config['PROFILER_SLOW_DB_MS'] or duplicates):
+        current_app.logger.warning(
+            '%s %s (%s): %d queries, %.1f ms in the database, %.1f ms total%s',
+            request.method, request.path, request.endpoint, profile.count,
+            profile.milliseconds, total_ms,
+            ''.join(f'\n  repeated {count} x {shape}' for shape, count in duplicates.items()))
+    return response
+
+
+def init_app(app, db):
+    """Profile every request of `app` on the engine of `db`."""
+    app.config.setdefault('PROFILER_ENABLED', True)
+    app.config.setdefault('PROFILER_MAX_QUERIES', 20)
+    app.config.setdefault('PROFILER_SLOW_DB_MS', 200)
+    app.config.setdefault('PROFILER_DUPLICATE_THRESHOLD', 3)
+    app.config.setdefault('PROFILER_SERVER_TIMING', True)
+
+    # Listen even with requests unprofiled, `query_budget` relies on it.
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    if not app.config['PROFILER_ENABLED']:
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
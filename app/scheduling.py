@@ -0,0 +1,296 @@
+""" Booking engine: artist availability and show conflicts over time intervals.
+
+Shows occupy the half-open interval [start_time, end_time). A booking is
+accepted when the interval fits inside one of the artist's availability
+windows and overlaps no other show of the same artist or at the same venue.
+
+- `check_booking` answers that for one booking with a single statement
+  whose three probes are range scans on the composite indexes
+  (artist_id, start_time) and (venue_id, start_time) and, on PostgreSQL,
+  a containment test on the (artist_id, range) GiST index of availability.
+- `check_bookings` checks a whole season at once: it loads the relevant
+  windows and shows in two statements, indexes them in `IntervalTree`s
+  and checks every proposal in memory, including conflicts between
+  proposals of the same batch.
+"""
+
+import random
+from collections import namedtuple
+from datetime import timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import exists, func, literal_column, or_, select
+
+from .extensions import db
+from .models import Show, Availability, show_duration
+
+DEFAULT_SHOW_MAX_DURATION_MINUTES = 12 * 60
+
+
+def max_show_duration():
+    """Upper bound on show length, `SHOW_MAX_DURATION_MINUTES`.
+
+    It turns "overlaps [start, end)" into the bounded index range
+    `start - max < start_time < end`.
+    """
+    minutes = DEFAULT_SHOW_MAX_DURATION_MINUTES
+    if has_app_context():
+        minutes = current_app.config.get('SHOW_MAX_DURATION_MINUTES', minutes)
+    return timedelta(minutes=minutes)
+
+
+class BookingCheck(namedtuple('BookingCheck', [
+        'start_time', 'end_time', 'artist_available', 'artist_busy', 'venue_busy'])):
+    """Outcome of checking one booking."""
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.artist_available and not self.artist_busy and not self.venue_busy
+
+    @property
+    def reason(self):
+        """Why the booking is refused, or `None` when it is accepted."""
+        if not self.artist_available:
+            return 'artist_unavailable'
+        if self.artist_busy:
+            return 'artist_busy'
+        if self.venue_busy:
+            return 'venue_busy'
+        return None
+
+
+Booking = namedtuple('Booking', ['artist_id', 'venue_id', 'start_time', 'end_time'])
+
+
+def booking_interval(start_time, duration=None):
+    """Return (start, end) of a show starting at `start_time`.
+
+    Raises:
+        ValueError: If the duration is not positive or exceeds the maximum.
+    """
+    duration = duration or show_duration()
+    if duration <= timedelta(0) or duration > max_show_duration():
+        raise ValueError(f'Show duration {duration} is out of range')
+    return start_time, start_time + duration
+
+
+def _show_overlap(column, owner_id, start, end):
+    return exists().where(
+        column == owner_id,
+        Show.start_time < end,
+        Show.start_time > start - max_show_duration(),
+        Show.end_time > start,
+    )
+
+
+def availability_range(start=Availability.working_period_start,
+                       end=Availability.working_period_end):
+    """PostgreSQL `tsrange(start, end, '[)')`, by default of an availability window.
+
+    The default is the range of the (artist_id, range) GiST index on `availability`.
+    """
+    # Inlined bounds, a bound parameter would not match the indexed expression.
+    return func.tsrange(start, end, literal_column("'[)'"))
+
+
+def _artist_available(artist_id, start, end):
+    if db.engine.dialect.name == 'postgresql':
+        # Windows have no maximum length, `working_period_start <= start`
+        # alone would scan every earlier window of the artist.
+        covers = availability_range().op('@>')(availability_range(start, end))
+    else:
+        covers = (Availability.working_period_start <= start) & (
+            Availability.working_period_end >= end)
+    return exists().where(Availability.artist_id == artist_id, covers)
+
+
+def booking_probe(artist_id, venue_id, start, end):
+    """Build the single statement answering availability and both conflicts."""
+    artist_available = _artist_available(artist_id, start, end)
+    return select(
+        artist_available.label('artist_available'),
+        _show_overlap(Show.artist_id, artist_id, start, end).label('artist_busy'),
+        _show_overlap(Show.venue_id, venue_id, start, end).label('venue_busy'),
+    )
+
+
+def check_booking(artist_id, venue_id, start_time, duration=None):
+    """Check whether the artist and the venue are both free for one show.
+
+    Args:
+        artist_id (int): The artist to book.
+        venue_id (int): The venue to book.
+        start_time (datetime): When the show starts.
+        duration (timedelta, optional): Defaults to `show_duration()`.
+
+    Returns:
+        BookingCheck: The verdict, with the show's computed `end_time`.
+    """
+    start, end = booking_interval(start_time, duration)
+    row = db.session.execute(booking_probe(artist_id, venue_id, start, end)).one()
+    return BookingCheck(start, end, bool(row.artist_available),
+                        bool(row.artist_busy), bool(row.venue_busy))
+
+
+def check_bookings(bookings):
+    """Check many proposed bookings at once.
+
+    Proposals are checked in order and each accepted one blocks the later
+    ones it overlaps, so a season can be validated as a whole before
+    anything is written.
+
+    Args:
+        bookings (iterable): `Booking` tuples, `end_time` may be `None` for
+            the default duration.
+
+    Returns:
+        list: One `BookingCheck` per booking, in the same order.
+    """
+    bookings = [
+        Booking(b.artist_id, b.venue_id, *booking_interval(
+            b.start_time, b.end_time - b.start_time if b.end_time else None))
+        for b in bookings
+    ]
+    if not bookings:
+        return []
+
+    artist_ids = {b.artist_id for b in bookings}
+    venue_ids = {b.venue_id for b in bookings}
+    low = min(b.start_time for b in bookings)
+    high = max(b.end_time for b in bookings)
+
+    windows = {artist_id: IntervalTree() for artist_id in artist_ids}
+    for window in db.session.execute(
+            select(Availability.artist_id, Availability.working_period_start,
+                   Availability.working_period_end)
+            .where(Availability.artist_id.in_(artist_ids),
+                   Availability.working_period_start < high,
+                   Availability.working_period_end > low)):
+        windows[window.artist_id].add(window.working_period_start, window.working_period_end)
+
+    artist_shows = {artist_id: IntervalTree() for artist_id in artist_ids}
+    venue_shows = {venue_id: IntervalTree() for venue_id in venue_ids}
+    for show in db.session.execute(
+            select(Show.artist_id, Show.venue_id, Show.start_time, Show.end_time)
+            .where(or_(Show.artist_id.in_(artist_ids), Show.venue_id.in_(venue_ids)),
+                   Show.start_time < high,
+                   Show.start_time > low - max_show_duration(),
+                   Show.end_time > low)):
+        if show.artist_id in artist_shows:
+            artist_shows[show.artist_id].add(show.start_time, show.end_time)
+        if show.venue_id in venue_shows:
+            venue_shows[show.venue_id].add(show.start_time, show.end_time)
+
+    results = []
+    for b in bookings:
+        check = BookingCheck(
+            b.start_time, b.end_time,
+            artist_available=windows[b.artist_id].covers(b.start_time, b.end_time),
+            artist_busy=artist_shows[b.artist_id].overlaps(b.start_time, b.end_time),
+            venue_busy=venue_shows[b.venue_id].overlaps(b.start_time, b.end_time),
+        )
+        if check.ok:
+            artist_shows[b.artist_id].add(b.start_time, b.end_time)
+            venue_shows[b.venue_id].add(b.start_time, b.end_time)
+        results.append(check)
+    return results
+
+
+class _Node:
+    __slots__ = ('start', 'end', 'value', 'priority', 'left', 'right', 'max_end')
+
+    def __init__(self, start, end, value, priority):
+        self.start = start
+        self.end = end
+        self.value = value
+        self.priority = priority
+        self.left = None
+        self.right = None
+        self.max_end = end
+
+
+class IntervalTree:
+    """Dynamic interval tree over half-open intervals [start, end).
+
+    A treap ordered by interval start where every node also stores the
+    greatest end in its subtree, so overlap queries skip every subtree
+    that ends before the query starts. Inserts and queries take
+    O(log n + k) expected time for k reported intervals.
+    """
+
+    def __init__(self, intervals=(), seed=0):
+        self._root = None
+        self._size = 0
+        self._random = random.Random(seed)
+        for start, end, *value in intervals:
+            self.add(start, end, value[0] if value else None)
+
+    def __len__(self):
+        return self._size
+
+    def add(self, start, end, value=None):
+        """Insert the interval [start, end) carrying an optional `value`."""
+        node = _Node(start, end, value, self._random.random())
+        self._root = self._insert(self._root, node)
+        self._size += 1
+
+    def overlapping(self, start, end):
+        """Yield (start, end, value) for every interval overlapping [start, end)."""
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None or node.max_end <= start:
+                continue
+            stack.append(node.left)
+            if node.start < end:
+                if node.end > start:
+                    yield node.start, node.end, node.value
+                stack.append(node.right)
+
+    def overlaps(self, start, end):
+        """True if any interval overlaps [start, end)."""
+        return next(self.overlapping(start, end), None) is not None
+
+    def covers(self, start, end):
+        """True if a single interval contains the whole of [start, end)."""
+        return any(s <= start and e >= end for s, e, _ in self.overlapping(start, end))
+
+    @staticmethod
+    def _update(node):
+        node.max_end = node.end
+        if node.left is not None and node.left.max_end > node.max_end:
+            node.max_end = node.left.max_end
+        if node.right is not None and node.right.max_end > node.max_end:
+            node.max_end = node.right.max_end
+
+    def _insert(self, node, new):
+        if node is None:
+            return new
+        if new.start < node.start:
+            node.left = self._insert(node.left, new)
+            if node.left.priority > node.priority:
+                node = self._rotate_right(node)
+        else:
+            node.right = self._insert(node.right, new)
+            if node.right.priority > node.priority:
+                node = self._rotate_left(node)
+        self._update(node)
+        return node
+
+    def _rotate_right(self, node):
+        pivot = node.left
+        node.left = pivot.right
+        pivot.right = node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def _rotate_left(self, node):
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        self._update(node)
+        self._update(pivot)
+        return pivot
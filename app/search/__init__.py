@@ -0,0 +1,118 @@
+""" Ranked venue and artist search shared by the venues and artists blueprints.
+
+Matching and ranking are delegated to a backend chosen by `SEARCH_BACKEND`:
+
+- `postgres`: substring search over the pg_trgm GIN indexes created by the
+  `a3f1c9d2b7e4` migration.
+- `memory`: a pure-Python trigram index, for databases without pg_trgm
+  such as the SQLite databases used by the benchmarks.
+- `auto` (default): `postgres` on PostgreSQL, `memory` everywhere else.
+"""
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, select
+
+from ..extensions import db
+from ..models import Venue, Artist
+from .memory import MemorySearchBackend
+from .postgres import PostgresSearchBackend
+
+BACKENDS = {
+    PostgresSearchBackend.name: PostgresSearchBackend,
+    MemorySearchBackend.name: MemorySearchBackend,
+}
+
+
+def get_backend():
+    """Return the search backend of the current app, creating it on first use."""
+    backend = current_app.extensions.get('search')
+    if backend is None:
+        name = current_app.config.get('SEARCH_BACKEND', 'auto')
+        if name == 'auto':
+            name = 'postgres' if db.engine.dialect.name == 'postgresql' else 'memory'
+        backend = current_app.extensions.setdefault('search', BACKENDS[name]())
+    return backend
+
+
+def page_bounds(limit=None, offset=None):
+    """Clamp a requested page to the configured search limits.
+
+    Args:
+        limit (int, optional): Requested number of results, defaults to
+            `SEARCH_PAGE_SIZE` and never exceeds `SEARCH_MAX_PAGE_SIZE`.
+        offset (int, optional): Number of results to skip.
+
+    Returns:
+        tuple: (limit, offset) safe to hand to a query.
+    """
+    default = current_app.config.get('SEARCH_PAGE_SIZE', 20)
+    maximum = current_app.config.get('SEARCH_MAX_PAGE_SIZE', 100)
+    limit = min(max(limit or default, 1), maximum)
+    offset = max(offset or 0, 0)
+    return limit, offset
+
+
+def _search(model, search_term, limit, offset):
+    """Return one ranked page of matches with their upcoming-show counts.
+
+    The backend resolves the page to ids and the total, then a single
+    query joined to the summary table loads names and upcoming-show
+    counts for those ids only.
+    """
+    limit, offset = page_bounds(limit, offset)
+    total, ids = get_backend().search(model, search_term, limit, offset)
+
+    rows = {}
+    if ids:
+        stats = model.__stats__
+        rows = {row.id: row for row in db.session.execute(
+            select(model.id, model.name,
+                   func.coalesce(stats.upcoming_shows, 0).label('num_upcoming_shows'))
+            .outerjoin(stats, model._stats_fk() == model.id)
+            .where(model.id.in_(ids))
+        )}
+
+    next_offset = offset + limit if offset + limit < total else None
+    return {
+        "count": total,
+        "limit": limit,
+        "offset": offset,
+        "next_offset": next_offset,
+        "data": [{
+            "id": rows[doc_id].id,
+            "name": rows[doc_id].name,
+            "num_upcoming_shows": rows[doc_id].num_upcoming_shows
+        } for doc_id in ids if doc_id in rows]
+    }
+
+
+def search_venues(search_term, limit=None, offset=None):
+    """Case-insensitive partial match on venue name, city, state and genres."""
+    return _search(Venue, search_term, limit, offset)
+
+
+def search_artists(search_term, limit=None, offset=None):
+    """Case-insensitive partial match on artist name, city, state and genres."""
+    return _search(Artist, search_term, limit, offset)
+
+
+def invalidate_index(model):
+    """Drop the in-memory index of `model`, e.g. after Core bulk writes."""
+    if not has_app_context():
+        return
+    backend = current_app.extensions.get('search')
+    if isinstance(backend, MemorySearchBackend):
+        backend.invalidate(model)
+
+
+def _invalidate_index(mapper, connection, target):
+    """Drop the in-memory index of a model whenever one of its rows changes."""
+    invalidate_index(mapper.class_)
+
+
+def register_search_events():
+    """Drop the in-memory index of venues or artists on every ORM write of theirs."""
+    for model in (Venue, Artist):
+        for name in ('after_insert', 'after_update', 'after_delete'):
+            if not event.contains(model, name, _invalidate_index):
+                event.listen(model, name, _invalidate_index)
@@ -0,0 +1,42 @@
+""" The searchable text of a venue or artist, shared by every search backend. """
+
+from sqlalchemy import func, literal, select
+
+# Name of the IMMUTABLE SQL function created by the search index migration.
+# The GIN trigram indexes are built on exactly this expression, so queries
+# must call it with the same arguments to be able to use them.
+DOCUMENT_FUNCTION = 'fyyur_search_document'
+
+
+def document_expression(model):
+    """SQL expression for the lowercased search document of `model` rows."""
+    return getattr(func, DOCUMENT_FUNCTION)(
+        model.name, model.city, model.state, model.genres)
+
+
+def sqlite_document_expression(model):
+    """`document_expression` in plain SQLite SQL, which has no such function.
+
+    Genres are the JSON variant of the column there and are read with
+    `json_each`. Empty parts are skipped as in `build_document`.
+    """
+    genres = func.json_each(model.genres).table_valued('value')
+    parts = (model.name, model.city, model.state,
+             select(func.group_concat(genres.c.value, ' ')).scalar_subquery())
+    document = literal('')
+    for part in parts:
+        document = document + func.coalesce(literal(' ') + func.nullif(part, ''), '')
+    return func.lower(func.substr(document, 2))
+
+
+def build_document(name, city, state, genres):
+    """Pure-Python mirror of `fyyur_search_document` for the in-memory index."""
+    parts = [name, city, state, ' '.join(genres) if genres else None]
+    return ' '.join(part for part in parts if part).lower()
+
+
+def escape_like(term, escape='\\'):
+    """Escape LIKE wildcards so a search term only ever matches literally."""
+    return (term.replace(escape, escape * 2)
+                .replace('%', escape + '%')
+                .replace('_', escape + '_'))
@@ -0,0 +1,122 @@
+""" Pure-Python trigram index used when the database has no pg_trgm (e.g. SQLite). """
+
+from collections import defaultdict
+from threading import Lock
+
+from sqlalchemy import select
+
+from ..extensions import db
+from .document import build_document
+
+
+def trigrams(text):
+    """Return the set of 3-character substrings of `text`."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def similarity(left, right):
+    """Trigram similarity in [0, 1], the same measure pg_trgm uses for ranking."""
+    left, right = trigrams(left), trigrams(right)
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+class TrigramIndex:
+    """Inverted index from trigram to the ids of documents containing it.
+
+    A substring query only has to verify documents that contain every
+    trigram of the term, which keeps lookups independent of catalog size
+    for any term of three or more characters.
+    """
+
+    def __init__(self):
+        self._documents = {}
+        self._names = {}
+        self._postings = defaultdict(set)
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, doc_id, name, document):
+        self.remove(doc_id)
+        self._documents[doc_id] = document
+        self._names[doc_id] = (name or '').lower()
+        for gram in trigrams(document):
+            self._postings[gram].add(doc_id)
+
+    def remove(self, doc_id):
+        document = self._documents.pop(doc_id, None)
+        if document is None:
+            return
+        del self._names[doc_id]
+        for gram in trigrams(document):
+            postings = self._postings[gram]
+            postings.discard(doc_id)
+            if not postings:
+                del self._postings[gram]
+
+    def _candidates(self, term):
+        grams = trigrams(term)
+        if not grams:
+            return self._documents.keys()
+        # Intersect from the rarest trigram up so the working set stays small.
+        postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, term):
+        """Return the ids of documents containing `term`, best match first."""
+        term = term.strip().lower()
+        matches = [doc_id for doc_id in self._candidates(term)
+                   if term in self._documents[doc_id]]
+
+        def rank(doc_id):
+            name = self._names[doc_id]
+            position = 2 if name.startswith(term) else 1 if term in name else 0
+            return (-position, -similarity(name, term), name, doc_id)
+
+        return sorted(matches, key=rank)
+
+
+class MemorySearchBackend:
+    """Search backend keeping one `TrigramIndex` per model in process memory.
+
+    Indexes are loaded from the database on first use and rebuilt after
+    `invalidate()`, which the model write events call.
+    """
+
+    name = 'memory'
+
+    def __init__(self):
+        self._indexes = {}
+        self._lock = Lock()
+
+    def invalidate(self, model=None):
+        with self._lock:
+            if model is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(model, None)
+
+    def index_for(self, model):
+        with self._lock:
+            index = self._indexes.get(model)
+            if index is None:
+                index = TrigramIndex()
+                rows = db.session.execute(
+                    select(model.id, model.name, model.city, model.state, model.genres))
+                for row in rows:
+                    index.add(row.id, row.name,
+                              build_document(row.name, row.city, row.state, row.genres))
+                self._indexes[model] = index
+            return index
+
+    def search(self, model, term, limit, offset):
+        """Return (total, ids) for one page of `model` rows matching `term`."""
+        ids = self.index_for(model).search(term)
+        return len(ids), ids[offset:offset + limit]
@@ -0,0 +1,54 @@
+""" Search backend using the pg_trgm GIN indexes on the search document. """
+
+from sqlalchemy import case, func, select
+
+from ..extensions import db
+from .document import document_expression, escape_like
+
+
+class PostgresSearchBackend:
+    """Ranked substring search served by the `ix_*_search_trgm` indexes.
+
+    A `LIKE '%term%'` over the search document is answered from the GIN
+    trigram index instead of a sequential scan, so latency depends on the
+    number of matches rather than on the size of the catalog.
+    """
+
+    name = 'postgres'
+
+    def match_query(self, model, term):
+        """Build the ranked query of `model` ids matching `term`.
+
+        Results are ranked by name prefix match, then name substring match,
+        then trigram similarity of the name to the term. Every row also
+        carries the total number of matches as `total`.
+        """
+        term = term.strip().lower()
+        pattern = f'%{escape_like(term)}%'
+        name = func.lower(model.name)
+
+        rank = case(
+            (name.like(f'{escape_like(term)}%', escape='\\'), 2),
+            (name.like(pattern, escape='\\'), 1),
+            else_=0,
+        )
+        return (
+            select(model.id, func.count().over().label('total'))
+            .where(document_expression(model).like(pattern, escape='\\'))
+            .order_by(rank.desc(), func.similarity(name, term).desc(),
+                      model.name, model.id)
+        )
+
+    def search(self, model, term, limit, offset):
+        """Return (total, ids) for one page of `model` rows matching `term`."""
+        stmt = self.match_query(model, term)
+        rows = db.session.execute(stmt.limit(limit).offset(offset)).all()
+
+        if rows:
+            return rows[0].total, [row.id for row in rows]
+        if not offset:
+            return 0, []
+        # Paged past the end, the window total is not available.
+        total = db.session.scalar(
+            select(func.count()).select_from(stmt.order_by(None).subquery()))
+        return total, []
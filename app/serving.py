@@ -0,0 +1,145 @@
+""" Serving with preforking servers: start-up self-check, preload and fork hooks.
+
+`wsgi.py` creates the app once. With Gunicorn's `preload_app` or uWSGI
+without `lazy-apps`, that happens in the master before it forks, so the
+app, its imported modules and its loaded templates are built once and
+shared copy-on-write by every worker instead of once per worker.
+
+- `prepare` runs in the master: the self-check, every template loaded
+  into the Jinja environment, then the connection pool emptied so no
+  worker inherits a socket opened by the master.
+- `after_fork` runs in every worker: it drops any pool state copied from
+  the master and restarts the 'thread' jobs backend, whose threads did
+  not survive the fork.
+
+The self-check refuses to serve production with a missing SECRET_KEY
+(sessions and CSRF tokens would not validate across workers), with
+DEBUG on, without an INTERNAL_TOKEN (the internal endpoints would refuse
+everyone), with an unreachable database or with a schema behind the
+migrations, and with a shared cache that is a per-process fake or
+unreachable. Elsewhere the problems are only logged. A per-process
+cache with several workers (WEB_CONCURRENCY) is worth a warning: a
+write is only seen by the other workers once their copies expire.
+
+Settings:
+    SELF_CHECK: Run the self-check in `prepare`.
+"""
+
+import logging
+import os
+
+from sqlalchemy import text
+
+from .extensions import db
+from .templating import load_templates
+
+logger = logging.getLogger(__name__)
+
+
+class SelfCheckError(RuntimeError):
+    """The app is not fit to serve production."""
+
+    def __init__(self, problems):
+        super().__init__('Start-up self-check failed: ' + '; '.join(problems))
+        self.problems = problems
+
+
+def _schema_problem(app):
+    """Compare the database revision with the migration heads."""
+    directory = os.path.join(app.root_path, 'migrations')
+    if not os.path.isdir(directory):
+        return None
+    from alembic.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    config = app.extensions['migrate'].migrate.get_config(directory)
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    with db.engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    if current != heads:
+        return (f'database schema is at {sorted(current) or "no revision"}, '
+                f'migrations are at {sorted(heads)}: run `flask db upgrade`')
+    return None
+
+
+def _cache_problem(app, production):
+    backend = app.config.get('CACHE_BACKEND')
+    if backend == 'local' and int(os.environ.get('WEB_CONCURRENCY', 1)) > 1:
+        logger.warning('Self-check: CACHE_BACKEND is local with several workers, pages may '
+                       'stay stale for CACHE_DEFAULT_TTL seconds after a write, use shared')
+    if backend != 'shared':
+        return None
+    if app.config.get('CACHE_SHARED_URL', '').startswith('memory://'):
+        if production:
+            return ('CACHE_SHARED_URL is memory://, each worker would keep its own cache: '
+                    'set a Redis URL or CACHE_BACKEND=local')
+        return None
+    try:
+        app.extensions['cache'].get('self-check')
+    except Exception as e:
+        return f'shared cache unreachable: {e}'
+    return None
+
+
+def self_check(app):
+    """Check that `app` can serve requests.
+
+    Returns:
+        list: Descriptions of the problems found, empty when all is well.
+    """
+    problems = []
+    production = app.config.get('FYYUR_ENV') == 'production'
+    if not app.config.get('SECRET_KEY'):
+        problems.append('SECRET_KEY is not set')
+    if production and app.debug:
+        problems.append('DEBUG is on')
+    if production and not app.config.get('INTERNAL_TOKEN'):
+        problems.append('INTERNAL_TOKEN is not set')
+    problem = _cache_problem(app, production)
+    if problem:
+        problems.append(problem)
+
+    with app.app_context():
+        try:
+            db.session.execute(text('SELECT 1'))
+        except Exception as e:
+            problems.append(f'database unreachable: {e}')
+        else:
+            try:
+                problem = _schema_problem(app)
+            except Exception as e:
+                problem = f'database schema could not be checked: {e}'
+            if problem:
+                problems.append(problem)
+        finally:
+            db.session.remove()
+    return problems
+
+
+def prepare(app):
+    """Get `app` ready to be forked into workers, in the master process.
+
+    Raises:
+        SelfCheckError: In production, when the self-check finds problems.
+    """
+    if app.config.get('SELF_CHECK', True):
+        problems = self_check(app)
+        if problems and app.config.get('FYYUR_ENV') == 'production':
+            raise SelfCheckError(problems)
+        for problem in problems:
+            logger.warning('Self-check: %s', problem)
+
+    count = load_templates(app)
+    with app.app_context():
+        db.engine.dispose()
+    logger.info('Prepared %s for serving, %d templates loaded', app.name, count)
+    return app
+
+
+def after_fork(app):
+    """Reset the per-process state `app` inherited, in a freshly forked worker."""
+    with app.app_context():
+        # Connections opened by the master belong to it, forget them
+        # without closing them under its feet.
+        db.engine.dispose(close=False)
+    app.extensions['jobs'].after_fork()
@@ -0,0 +1,258 @@
+""" Incremental maintenance of the `venue_stats` and `artist_stats` summaries.
+
+Writing a show adjusts the summary rows of its venue and artist in the
+same transaction: counts move by the show's delta and `next_show_time` is
+re-read from the (venue_id, start_time) and (artist_id, start_time)
+indexes. Nothing ever re-counts a venue's or artist's whole history on
+the write path.
+
+A show is filed as past or upcoming when it is written, so summaries age
+as shows start. `flask stats-refresh`, run periodically (every few
+minutes from cron or the job runner), recounts only the rows whose
+`next_show_time` has passed; `--rebuild` recomputes everything, e.g.
+after rows were written with raw SQL.
+"""
+
+from collections import namedtuple
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, delete, event, func, inspect, insert, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .extensions import db, cache
+from .models import Venue, Artist, Show, VenueStats, ArtistStats
+
+ShowChange = namedtuple('ShowChange', ['venue_id', 'artist_id', 'start_time', 'sign'])
+
+# (summary model, owner model, Show foreign key name) for both sides.
+SUMMARIES = (
+    (VenueStats, Venue, 'venue_id'),
+    (ArtistStats, Artist, 'artist_id'),
+)
+
+# The Show columns a summary depends on.
+SHOW_KEY = ('venue_id', 'artist_id', 'start_time')
+
+_UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def _deltas(changes, column, now):
+    """Sum (total, past, upcoming) deltas per owner id."""
+    deltas = {}
+    for change in changes:
+        owner_id = getattr(change, column)
+        if owner_id is None:
+            continue
+        total, past, upcoming = deltas.get(owner_id, (0, 0, 0))
+        total += change.sign
+        if change.start_time is not None:
+            if change.start_time < now:
+                past += change.sign
+            else:
+                upcoming += change.sign
+        deltas[owner_id] = (total, past, upcoming)
+    return deltas
+
+
+def _ensure_rows(connection, stats, column, owner_ids):
+    """Create empty summary rows for owners that have none yet."""
+    rows = [{column: owner_id} for owner_id in owner_ids]
+    upsert_insert = _UPSERT_INSERTS.get(connection.dialect.name)
+    if upsert_insert is not None:
+        connection.execute(upsert_insert(stats).values(rows).on_conflict_do_nothing())
+        return
+    fk = getattr(stats, column)
+    existing = set(connection.scalars(select(fk).where(fk.in_(owner_ids))))
+    missing = [row for row in rows if row[column] not in existing]
+    if missing:
+        connection.execute(insert(stats).values(missing))
+
+
+def _next_show_time(column, owner_id, now):
+    return (
+        select(func.min(Show.start_time))
+        .where(getattr(Show, column) == owner_id, Show.start_time >= now)
+        .scalar_subquery()
+    )
+
+
+def apply_show_changes(connection, changes, now=None):
+    """Adjust the summaries of every venue and artist touched by `changes`.
+
+    Args:
+        connection: The connection of the transaction that wrote the shows,
+            the changes must already be flushed.
+        changes (iterable): `ShowChange` tuples, `sign` is +1 for a show
+            added and -1 for a show removed.
+        now (datetime, optional): The moment separating past from upcoming.
+    """
+    now = now or datetime.now()
+    changes = list(changes)
+    for stats, _, column in SUMMARIES:
+        deltas = _deltas(changes, column, now)
+        if not deltas:
+            continue
+        _ensure_rows(connection, stats, column, sorted(deltas))
+        fk = getattr(stats, column)
+        connection.execute(
+            update(stats)
+            .where(fk == bindparam('owner_id'))
+            .values(
+                total_shows=stats.total_shows + bindparam('total_delta'),
+                past_shows=stats.past_shows + bindparam('past_delta'),
+                upcoming_shows=stats.upcoming_shows + bindparam('upcoming_delta'),
+                next_show_time=_next_show_time(column, bindparam('owner_id'), now),
+            ),
+            [{'owner_id': owner_id, 'total_delta': total, 'past_delta': past,
+              'upcoming_delta': upcoming}
+             for owner_id, (total, past, upcoming) in sorted(deltas.items())],
+        )
+
+
+def _recount_values(stats, column, now):
+    """Correlated recount of one summary row from the shows indexes."""
+    fk = getattr(Show, column)
+    owner = getattr(stats, column)
+
+    def count(*conditions):
+        return (select(func.count(Show.id))
+                .where(fk == owner, *conditions)
+                .scalar_subquery())
+
+    return dict(
+        total_shows=count(),
+        past_shows=count(Show.start_time < now),
+        upcoming_shows=count(Show.start_time >= now),
+        next_show_time=(select(func.min(Show.start_time))
+                        .where(fk == owner, Show.start_time >= now)
+                        .scalar_subquery()),
+        refreshed_at=now,
+    )
+
+
+def refresh(now=None):
+    """Recount the summaries whose next show has started since they were written.
+
+    Returns:
+        int: Number of summary rows refreshed.
+    """
+    now = now or datetime.now()
+    refreshed = 0
+    for stats, _, column in SUMMARIES:
+        result = db.session.execute(
+            update(stats)
+            .where(stats.next_show_time < now)
+            .values(**_recount_values(stats, column, now))
+            .execution_options(synchronize_session=False)
+        )
+        refreshed += result.rowcount
+    db.session.commit()
+    if refreshed:
+        cache.invalidate('venues', 'artists')
+    return refreshed
+
+
+def rebuild(now=None):
+    """Recompute every summary row from `shows` in one grouped pass per side.
+
+    Returns:
+        int: Number of summary rows written.
+    """
+    now = now or datetime.now()
+    written = 0
+    for stats, owner, column in SUMMARIES:
+        fk = getattr(Show, column)
+        past, upcoming = Show.count_columns(now)
+        db.session.execute(delete(stats))
+        result = db.session.execute(
+            insert(stats).from_select(
+                [column, 'total_shows', 'past_shows', 'upcoming_shows',
+                 'next_show_time', 'refreshed_at'],
+                select(fk, func.count(Show.id), past, upcoming,
+                       func.min(Show.start_time).filter(Show.start_time >= now),
+                       literal(now, db.DateTime))
+                .join(owner, owner.id == fk)
+                .group_by(fk))
+        )
+        written += result.rowcount
+    db.session.commit()
+    cache.invalidate('venues', 'artists')
+    return written
+
+
+def _history(target, name):
+    """Return (old, new) of a column of `target`, old as last loaded."""
+    history = inspect(target).attrs[name].history
+    new = getattr(target, name)
+    old = history.deleted[0] if history.deleted else new
+    return old, new
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+def _show_inserted(mapper, connection, target):
+    apply_show_changes(connection, [
+        ShowChange(target.venue_id, target.artist_id, target.start_time, 1)])
+
+
+def _show_deleting(mapper, connection, target):
+    # Read the key while the row still exists, an expired instance
+    # cannot be loaded after the DELETE.
+    target._summary_key = (target.venue_id, target.artist_id, target.start_time)
+
+
+def _show_deleted(mapper, connection, target):
+    apply_show_changes(connection, [ShowChange(*target._summary_key, -1)])
+
+
+def _show_updated(mapper, connection, target):
+    (old_venue, new_venue), (old_artist, new_artist), (old_start, new_start) = (
+        _history(target, name) for name in SHOW_KEY)
+    if (old_venue, old_artist, old_start) == (new_venue, new_artist, new_start):
+        return
+    apply_show_changes(connection, [
+        ShowChange(old_venue, old_artist, old_start, -1),
+        ShowChange(new_venue, new_artist, new_start, 1),
+    ])
+
+
+def _owner_deleted(mapper, connection, target):
+    # The foreign key cascades on PostgreSQL, SQLite does not enforce it.
+    for stats, owner, column in SUMMARIES:
+        if isinstance(target, owner):
+            connection.execute(delete(stats).where(getattr(stats, column) == target.id))
+
+
+def register_summary_events():
+    """Keep the summaries in step with every ORM write of a show."""
+    for name, handler in (('after_insert', _show_inserted),
+                          ('before_delete', _show_deleting),
+                          ('after_delete', _show_deleted),
+                          ('after_update', _show_updated)):
+        if not event.contains(Show, name, handler):
+            event.listen(Show, name, handler)
+    # Load the previous value whenever a key column is assigned, otherwise
+    # a change to an expired instance leaves no history to subtract.
+    for name in SHOW_KEY:
+        attribute = getattr(Show, name)
+        if not event.contains(attribute, 'set', _keep_old_value):
+            event.listen(attribute, 'set', _keep_old_value, active_history=True, retval=True)
+    for _, owner, _ in SUMMARIES:
+        if not event.contains(owner, 'after_delete', _owner_deleted):
+            event.listen(owner, 'after_delete', _owner_deleted)
+
+
+@click.command('stats-refresh')
+@click.option('--rebuild', 'full', is_flag=True,
+              help='Recompute every summary from shows instead of only the due rows.')
+@with_appcontext
+def stats_refresh_command(full):
+    """Move started shows from upcoming to past in the show summaries."""
+    if full:
+        click.echo(f'{rebuild()} summary rows rebuilt')
+    else:
+        click.echo(f'{refresh()} summary rows refreshed')
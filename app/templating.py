@@ -0,0 +1,119 @@
+""" Template performance: on-disk bytecode cache and a fragment cache tag.
+
+Compiling a template to Python code costs far more than rendering it.
+Jinja keeps compiled templates in memory per process, so without a
+bytecode cache every new worker compiles every template again on its
+first requests. The cache keeps the compiled bytecode in
+`TEMPLATE_BYTECODE_DIR`, shared by all workers and kept across restarts.
+`flask templates-compile` fills it ahead of a deploy.
+
+`{% cache key, ttl, *tags %}...{% endcache %}` stores the rendered body
+in the response cache backend. Tags work as they do for cached views:
+a commit that bumps any of them orphans the fragment. It pays off for
+markup shared by responses that are not cached whole, such as the
+navbar of the layout; inside a `cache.cached` view it only adds a
+second copy.
+
+    {% cache 'navbar:' ~ request.blueprint, 3600 %}
+        ...navigation...
+    {% endcache %}
+
+A `None` ttl keeps the fragment for `CACHE_DEFAULT_TTL`.
+
+Settings:
+    TEMPLATE_BYTECODE_CACHE: Enable the on-disk bytecode cache.
+    TEMPLATE_BYTECODE_DIR: Its directory, defaults to
+        `<instance path>/jinja_bytecode`.
+    TEMPLATES_AUTO_RELOAD: Flask setting, re-check template files for
+        changes on every render. Keep it off in production.
+"""
+
+import hashlib
+import os
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import with_appcontext
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+
+class FragmentCacheExtension(Extension):
+    """The `{% cache key, ttl, *tags %}` block tag."""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        key = args[0]
+        ttl = args[1] if len(args) > 1 else nodes.Const(None)
+        tags = nodes.List(args[2:])
+
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        # Two blocks given the same key in different templates must not collide.
+        site = nodes.Const(f'{parser.name}:{lineno}')
+        return nodes.CallBlock(
+            self.call_method('_render', [site, key, ttl, tags]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, site, key, ttl, tags, caller):
+        if not has_app_context() or 'cache' not in current_app.extensions:
+            return caller()
+
+        from .extensions import cache
+        versions = cache.tag_versions(tags)
+        raw = f'{site}|{key}|' + ','.join(
+            f'{tag}={version}' for tag, version in zip(tags, versions))
+        cache_key = 'fragment:' + hashlib.sha1(raw.encode()).hexdigest()
+
+        body = cache.backend.get(cache_key)
+        if body is None:
+            body = str(caller())
+            cache.backend.set(cache_key, body, ttl)
+        return Markup(body)
+
+
+def bytecode_directory(app):
+    directory = app.config.get('TEMPLATE_BYTECODE_DIR') or os.path.join(
+        app.instance_path, 'jinja_bytecode')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def init_app(app):
+    """Configure the Jinja environment, before anything touches `app.jinja_env`."""
+    options = dict(app.jinja_options)
+    options['extensions'] = [*options.get('extensions', ()), FragmentCacheExtension]
+    if app.config.get('TEMPLATE_BYTECODE_CACHE', True):
+        options['bytecode_cache'] = FileSystemBytecodeCache(bytecode_directory(app))
+    app.jinja_options = options
+
+
+def load_templates(app):
+    """Load every template into `app`'s Jinja environment.
+
+    Templates come from the bytecode cache when it is enabled, and are
+    compiled into it otherwise.
+
+    Returns:
+        int: Number of templates loaded.
+    """
+    env = app.jinja_env
+    names = env.list_templates(extensions=('html',))
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+@click.command('templates-compile')
+@with_appcontext
+def templates_compile_command():
+    """Compile every template into the bytecode cache."""
+    if current_app.jinja_env.bytecode_cache is None:
+        raise click.ClickException('TEMPLATE_BYTECODE_CACHE is disabled.')
+    count = load_templates(current_app)
+    click.echo(f'{count} templates compiled into {bytecode_directory(current_app)}')
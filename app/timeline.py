@@ -0,0 +1,224 @@
+""" Calendar of shows and availability windows over a time range.
+
+`GET /api/calendar` returns the shows starting in [from, to) and the
+availability windows overlapping it, grouped into day or week buckets,
+from a single UNION ALL statement:
+
+- shows are one range of the (start_time, id), (venue_id, start_time)
+  or (artist_id, start_time) index of `show_listing` and are bucketed
+  by `date_trunc` on PostgreSQL, by `date()` elsewhere;
+- a window spans several buckets, so windows are joined with the bucket
+  series, `generate_series` on PostgreSQL and a UNION of literals elsewhere.
+  On PostgreSQL the overlap is `tsrange && tsrange`, served by the
+  (artist_id, range) GiST index of the windows.
+
+Every bucket of the range is returned, empty ones included, weeks start
+on Monday like PostgreSQL's `date_trunc('week', ...)`.
+
+Settings:
+    CALENDAR_MAX_DAYS: Longest range served by one request.
+"""
+
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import (
+    DateTime, Integer, String, cast, func, literal, literal_column, null, select, union_all)
+
+from .extensions import db
+from .formatting import to_datetime
+from .models import Availability, ShowListing
+
+BUCKETS = {'day': timedelta(days=1), 'week': timedelta(weeks=1)}
+
+CalendarRange = namedtuple('CalendarRange', ['start', 'end', 'bucket'])
+
+
+def _is_postgres():
+    return db.engine.dialect.name == 'postgresql'
+
+
+def month_range(now=None):
+    """The current calendar month, the range served when none is given."""
+    now = now or datetime.now()
+    start = datetime(now.year, now.month, 1)
+    end = datetime(now.year + now.month // 12, now.month % 12 + 1, 1)
+    return start, end
+
+
+def _parse_moment(text):
+    """Read an ISO date or datetime as a naive local time, like the stored ones."""
+    moment = datetime.fromisoformat(text)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment
+
+
+def parse_range(args, now=None):
+    """Read `from`, `to` and `bucket` of a request's query string.
+
+    `from` and `to` are ISO dates or datetimes, `to` is exclusive. Those
+    with a time zone offset are converted to local time. Without either
+    the current month is used.
+
+    Raises:
+        ValueError: On an unreadable date, an unknown bucket, an empty
+            range or one longer than `CALENDAR_MAX_DAYS`.
+    """
+    default_start, default_end = month_range(now)
+    start = _parse_moment(args['from']) if args.get('from') else default_start
+    end = _parse_moment(args['to']) if args.get('to') else default_end
+    bucket = args.get('bucket', 'day')
+    if bucket not in BUCKETS:
+        raise ValueError(f'bucket must be one of {tuple(BUCKETS)}')
+    if end <= start:
+        raise ValueError('to must be after from')
+    max_days = current_app.config.get('CALENDAR_MAX_DAYS', 366)
+    if end - start > timedelta(days=max_days):
+        raise ValueError(f'Ranges are limited to {max_days} days')
+    return CalendarRange(start, end, bucket)
+
+
+def bucket_starts(span):
+    """Start of every bucket overlapping the range, the first one aligned."""
+    first = datetime.combine(span.start.date(), datetime.min.time())
+    if span.bucket == 'week':
+        first -= timedelta(days=first.weekday())
+    step = BUCKETS[span.bucket]
+    starts = []
+    while first < span.end:
+        starts.append(first)
+        first += step
+    return starts
+
+
+def _truncate(bucket, moment):
+    """Start of the bucket holding `moment`."""
+    if _is_postgres():
+        return func.date_trunc(bucket, moment)
+    if bucket == 'week':
+        # The next Sunday (the same day for a Sunday), back to its Monday.
+        return func.date(moment, 'weekday 0', '-6 days')
+    return func.date(moment)
+
+
+def _bucket_series(span):
+    """Selectable of the (start, end) of every bucket."""
+    step = BUCKETS[span.bucket]
+    starts = bucket_starts(span)
+    if _is_postgres():
+        series = func.generate_series(starts[0], starts[-1], step).table_valued(
+            'start').render_derived()
+        return select(series.c.start.label('start'),
+                      (series.c.start + literal(step)).label('end')).subquery('buckets')
+    # SQLite cannot name the columns of a VALUES list, select the literals.
+    return union_all(*(
+        select(literal(start, DateTime).label('start'),
+               literal(start + step, DateTime).label('end'))
+        for start in starts)).subquery('buckets')
+
+
+def _overlaps(buckets):
+    start, end = Availability.working_period_start, Availability.working_period_end
+    if _is_postgres():
+        # Inlined so the expression is the one of the GiST index.
+        bounds = literal_column("'[)'")
+        return func.tsrange(start, end, bounds).op('&&')(
+            func.tsrange(buckets.c.start, buckets.c.end, bounds))
+    return (start < buckets.c.end) & (end > buckets.c.start)
+
+
+def calendar_query(span, venue_id=None, artist_id=None):
+    """One statement listing the shows and windows of a range with their bucket.
+
+    Args:
+        span (CalendarRange): The range and bucket size.
+        venue_id (int, optional): Only shows at this venue, and no
+            availability since windows belong to artists.
+        artist_id (int, optional): Only this artist's shows and windows.
+
+    Returns:
+        CompoundSelect: Rows of (kind, bucket, id, start, end,
+            start_display, venue_id, venue_name, artist_id, artist_name),
+            `kind` being 'show' or 'availability'.
+    """
+    shows = select(
+        literal('show').label('kind'),
+        _truncate(span.bucket, ShowListing.start_time).label('bucket'),
+        ShowListing.id,
+        ShowListing.start_time.label('start'),
+        cast(null(), DateTime).label('end'),
+        ShowListing.start_time_display.label('start_display'),
+        ShowListing.venue_id,
+        ShowListing.venue_name,
+        ShowListing.artist_id,
+        ShowListing.artist_name,
+    ).where(ShowListing.start_time >= span.start, ShowListing.start_time < span.end)
+    if venue_id is not None:
+        shows = shows.where(ShowListing.venue_id == venue_id)
+    if artist_id is not None:
+        shows = shows.where(ShowListing.artist_id == artist_id)
+    if venue_id is not None:
+        return shows.order_by('bucket', 'start', 'id')
+
+    buckets = _bucket_series(span)
+    windows = select(
+        literal('availability').label('kind'),
+        buckets.c.start.label('bucket'),
+        Availability.id,
+        Availability.working_period_start.label('start'),
+        Availability.working_period_end.label('end'),
+        cast(null(), String).label('start_display'),
+        cast(null(), Integer).label('venue_id'),
+        cast(null(), String).label('venue_name'),
+        Availability.artist_id,
+        cast(null(), String).label('artist_name'),
+    ).select_from(buckets).join(Availability, _overlaps(buckets)).where(
+        Availability.working_period_start < span.end,
+        Availability.working_period_end > span.start)
+    if artist_id is not None:
+        windows = windows.where(Availability.artist_id == artist_id)
+    return union_all(shows, windows).order_by('bucket', 'start', 'kind', 'id')
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def load_calendar(span, venue_id=None, artist_id=None):
+    """Load a range's shows and windows, bucketed, as JSON-ready data.
+
+    Returns:
+        dict: The range and its buckets, e.g.
+            {"from": "2026-10-01T00:00:00", "to": "2026-11-01T00:00:00",
+             "bucket": "day", "buckets": [{"start": "2026-10-01T00:00:00",
+             "shows": [...], "availability": [...]}, ...]}
+    """
+    buckets = {start: {'start': start.isoformat(), 'shows': [], 'availability': []}
+               for start in bucket_starts(span)}
+    for row in db.session.execute(calendar_query(span, venue_id, artist_id)):
+        bucket = buckets[to_datetime(row.bucket)]
+        if row.kind == 'show':
+            bucket['shows'].append({
+                'id': row.id,
+                'start_time': row.start.isoformat(),
+                'start_time_display': row.start_display,
+                'venue_id': row.venue_id,
+                'venue_name': row.venue_name,
+                'artist_id': row.artist_id,
+                'artist_name': row.artist_name,
+            })
+        else:
+            bucket['availability'].append({
+                'id': row.id,
+                'artist_id': row.artist_id,
+                'working_period_start': _isoformat(row.start),
+                'working_period_end': _isoformat(row.end),
+            })
+    return {
+        'from': span.start.isoformat(),
+        'to': span.end.isoformat(),
+        'bucket': span.bucket,
+        'buckets': list(buckets.values()),
+    }
@@ -1,14 +1,3 @@
-import babel
-import dateutil.parser
-
-""" Format date into more readable format"""
-
-def format_datetime(value, format='medium'):
-    date = dateutil.parser.parse(value)
-    if format == 'full':
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == 'medium':
-        format = "EE MM, dd, y h:mma"
-    
-    return babel.dates.format_datetime(date, format, locale='en')
+""" Format date into more readable format, see `formatting` for the implementation. """
 
+from .formatting import format_datetime, format_datetimes  # noqa: F401
@@ -0,0 +1,10 @@
+from app.asyncapi import create_asgi_app
+import os
+
+""" ASGI entry point serving the async JSON API under /async and the Flask
+    app everywhere else, e.g. `SECRET_KEY=... uvicorn asgi:app --workers 4`.
+
+    FYYUR_ENV defaults to 'production' here, see `app.serving`.
+"""
+
+app = create_asgi_app(env=os.environ.get('FYYUR_ENV', 'production'), prepare=True)
@@ -0,0 +1 @@
+""" Performance regression benchmarks for Fyyur. Run a module with `python -m benchmarks.<name>`. """
@@ -0,0 +1,93 @@
+""" Compare two benchmark result files and report regressions.
+
+    python -m benchmarks.compare before.json after.json --threshold 0.15
+
+A route regresses when it issues more queries, when its p50 or p95
+latency grows by more than the threshold, or when its throughput drops by
+more than the threshold. The exit status is 1 when anything regressed.
+"""
+
+import argparse
+import json
+import sys
+
+# (section, metric, True when higher is better)
+METRICS = (
+    ('test_client', 'p50_ms', False),
+    ('test_client', 'p95_ms', False),
+    ('test_client', 'rps', True),
+    ('http', 'p50_ms', False),
+    ('http', 'p95_ms', False),
+    ('http', 'rps', True),
+)
+
+
+def _change(before, after):
+    if not before:
+        return 0.0
+    return (after - before) / before
+
+
+def compare(before, after, threshold=0.10):
+    """Return (rows, regressions) for the routes present in both results.
+
+    Each row is (route, metric, before, after, relative change); each
+    regression is a human readable line.
+    """
+    rows, regressions = [], []
+    for name, route in after['routes'].items():
+        base = before['routes'].get(name)
+        if base is None:
+            continue
+        rows.append((name, 'queries', base['queries'], route['queries'],
+                     _change(base['queries'], route['queries'])))
+        if route['queries'] > base['queries']:
+            regressions.append(f"{name}: {base['queries']} -> {route['queries']} queries")
+
+        for section, metric, higher_is_better in METRICS:
+            if section not in base or section not in route:
+                continue
+            old, new = base[section][metric], route[section][metric]
+            change = _change(old, new)
+            rows.append((name, f'{section}.{metric}', old, new, change))
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append(
+                    f'{name}: {section}.{metric} {old} -> {new} ({change:+.0%})')
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative change tolerated before a metric counts as regressed.')
+    args = parser.parse_args(argv)
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    for meta in (before['meta'], after['meta']):
+        print(f"{meta.get('commit') or '?':<10} {meta['database']} {meta['size']}")
+    if before['meta']['size'] != after['meta']['size']:
+        print('warning: the runs seeded different data sizes')
+
+    rows, regressions = compare(before, after, args.threshold)
+    print(f"\n{'route':<30} {'metric':<18} {'before':>10} {'after':>10} {'change':>8}")
+    for name, metric, old, new, change in rows:
+        print(f'{name:<30} {metric:<18} {old:>10} {new:>10} {change:>+8.0%}')
+
+    if regressions:
+        print('\nregressions:')
+        for line in regressions:
+            print('  ' + line)
+        return 1
+    print('\nno regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+""" Micro-benchmark of the `datetime` Jinja filter against the previous implementation.
+
+    python -m benchmarks.datetime_filter --values 5000 --distinct 300
+"""
+
+import argparse
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+import babel.dates
+import dateutil.parser
+
+from app.formatting import _format, format_datetime, format_datetimes
+
+
+def legacy_format_datetime(value, format='medium'):
+    """The filter as it was: every call parses a string and recompiles the pattern."""
+    date = dateutil.parser.parse(value)
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+
+    return babel.dates.format_datetime(date, format, locale='en')
+
+
+def sample(values, distinct, rng=None):
+    """A page worth of start times, `distinct` different ones repeated."""
+    rng = rng or random.Random(0)
+    base = datetime(2025, 1, 1, 20, 0)
+    pool = [base + timedelta(hours=rng.randint(0, 24 * 365)) for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(values)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--values', type=int, default=5000)
+    parser.add_argument('--distinct', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    values = sample(args.values, args.distinct)
+    strings = [value.isoformat() for value in values]
+
+    for value, string in zip(values[:50], strings):
+        assert format_datetime(value, 'full') == legacy_format_datetime(string, 'full')
+
+    def cold():
+        _format.cache_clear()
+        return [format_datetime(v, 'full') for v in values]
+
+    runs = {
+        'legacy (isoformat + parse)': lambda: [legacy_format_datetime(s, 'full') for s in strings],
+        'format_datetime, cold LRU': cold,
+        'format_datetime': lambda: [format_datetime(v, 'full') for v in values],
+        'format_datetimes (batch)': lambda: format_datetimes(values, 'full'),
+    }
+    baseline = None
+    for name, run in runs.items():
+        best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        baseline = baseline or best
+        print(f'{name:<28} {best * 1000:9.2f} ms  {baseline / best:6.1f}x')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+""" Latency and throughput drivers: the Flask test client and threaded HTTP.
+
+The test client measures the cost of a route inside one process without
+any network or server in the way. The HTTP driver fires requests from
+several threads at a real server, `serve` starts one on a free port but
+`run_http` takes any base URL, and measures what concurrency does to
+latency and throughput.
+"""
+
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from app.extensions import db
+
+from .querycount import count_queries
+
+RouteCase = namedtuple('RouteCase', ['name', 'path', 'method', 'data'], defaults=('GET', None))
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, errors, wall_seconds):
+    """Reduce per-request latencies in seconds to the numbers we compare."""
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        'requests': count,
+        'errors': errors,
+        'mean_ms': round(sum(ordered) / count * 1000, 3) if count else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3) if count else 0.0,
+        'rps': round(count / wall_seconds, 1) if wall_seconds else 0.0,
+    }
+
+
+def _client_request(client, case):
+    response = client.open(case.path, method=case.method, data=case.data)
+    # Drain streamed bodies, their queries run while the body is read.
+    response.get_data()
+    response.close()
+    return response.status_code
+
+
+def count_route_queries(app, case):
+    """Return the number of statements one request to `case` issues."""
+    client = app.test_client()
+    with app.app_context():
+        engine = db.engine
+    with count_queries(engine) as counter:
+        _client_request(client, case)
+    return counter.count
+
+
+def run_test_client(app, case, requests=50, warmup=3):
+    """Time `requests` sequential requests to `case` through the test client."""
+    client = app.test_client()
+    for _ in range(warmup):
+        _client_request(client, case)
+
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        request_started = time.perf_counter()
+        status = _client_request(client, case)
+        latencies.append(time.perf_counter() - request_started)
+        errors += status >= 400
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+@contextmanager
+def serve(app, host='127.0.0.1'):
+    """Serve `app` with a threaded server on a free port, yield its base URL."""
+    server = make_server(host, 0, app, threaded=True, request_handler=_QuietRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://{host}:{server.server_port}'
+    finally:
+        server.shutdown()
+        thread.join()
+
+
+def _http_request(base_url, case, timeout):
+    body = urllib.parse.urlencode(case.data).encode() if case.data else None
+    request = urllib.request.Request(base_url + case.path, data=body, method=case.method)
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            failed = False
+    except (urllib.error.URLError, OSError):
+        failed = True
+    return time.perf_counter() - started, failed
+
+
+def run_http(base_url, case, requests=200, threads=8, warmup=3, timeout=30):
+    """Send `requests` requests to `case` from `threads` concurrent threads."""
+    for _ in range(warmup):
+        _http_request(base_url, case, timeout)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(lambda _: _http_request(base_url, case, timeout), range(requests)))
+        wall = time.perf_counter() - started
+    latencies = [latency for latency, _ in results]
+    errors = sum(failed for _, failed in results)
+    return summarize(latencies, errors, wall)
@@ -0,0 +1,36 @@
+""" Counts the SQL statements an engine executes inside a block. """
+
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """Collects the statements executed while the counter is active."""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine):
+    """Count every statement `engine` sends to the database inside the block.
+
+    Example:
+        with count_queries(db.engine) as counter:
+            client.get('/venues/venues')
+        assert counter.count == 1
+    """
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter._record)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter._record)
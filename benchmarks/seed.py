@@ -0,0 +1,146 @@
+""" Deterministic data generator for the benchmarks.
+
+Rows go through the models in `app/models.py`, so the ORM events that keep
+the show summaries, the cache and the search index in step run exactly as
+they do in production. The same arguments always produce the same data.
+
+    python -m benchmarks.seed --database sqlite:///bench.db --venues 500
+"""
+
+import argparse
+import random
+import sys
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from app import create_app
+from app.extensions import db
+from app.forms import VenueForm
+from app.models import Venue, Artist, Show, Availability
+
+SeedSize = namedtuple(
+    'SeedSize', ['venues', 'artists', 'shows', 'windows_per_artist'],
+    defaults=(200, 100, 2000, 2))
+
+SeedResult = namedtuple('SeedResult', ['size', 'venue_ids', 'artist_ids', 'show_ids', 'now'])
+
+GENRES = [value for value, _ in VenueForm.genres.kwargs['choices']]
+STATES = [value for value, _ in VenueForm.state.kwargs['choices']]
+WORDS = ['Blue', 'Velvet', 'Hop', 'Neon', 'Garage', 'Echo', 'Static', 'Golden',
+         'Harbor', 'Rust', 'Crystal', 'Night', 'Owl', 'Fox', 'Tide', 'Vinyl']
+
+# Rows added per flush, bounds memory on large seeds.
+FLUSH_EVERY = 500
+
+
+def _name(rng, suffix):
+    return f'{rng.choice(WORDS)} {rng.choice(WORDS)} {suffix}'
+
+
+def seed(size=SeedSize(), rng_seed=0, now=None, cities=40):
+    """Fill the current app's database and return what was created.
+
+    Shows are spread over a year either side of `now` on a two hour grid,
+    one artist and one venue never play twice in the same slot, and every
+    artist gets `windows_per_artist` availability windows.
+
+    Args:
+        size (SeedSize): How many rows of each kind to create.
+        rng_seed (int): Seed of the generator, fixes every value.
+        now (datetime, optional): The moment shows are spread around,
+            8pm today by default so every run splits past and upcoming
+            shows the same way.
+        cities (int): Number of distinct cities.
+
+    Returns:
+        SeedResult: The size and the ids of the created rows.
+    """
+    rng = random.Random(rng_seed)
+    now = now or datetime.now().replace(hour=20, minute=0, second=0, microsecond=0)
+    areas = [(f'City {i}', rng.choice(STATES)) for i in range(cities)]
+
+    venues = []
+    for i in range(size.venues):
+        city, state = rng.choice(areas)
+        venues.append(Venue(
+            name=_name(rng, f'Venue {i}'),
+            city=city,
+            state=state,
+            address=f'{i} Main Street',
+            phone=f'555{i:07d}',
+            genres=rng.sample(GENRES, 2),
+            facebook_link=f'https://www.facebook.com/venue{i}',
+            seeking_talent=rng.random() < 0.5,
+        ))
+    artists = []
+    for i in range(size.artists):
+        city, state = rng.choice(areas)
+        artists.append(Artist(
+            name=_name(rng, f'Artist {i}'),
+            city=city,
+            state=state,
+            phone=f'556{i:07d}',
+            genres=rng.sample(GENRES, 2),
+            facebook_link=f'https://www.facebook.com/artist{i}',
+            seeking_venue=rng.random() < 0.5,
+        ))
+    db.session.add_all(venues + artists)
+    db.session.flush()
+
+    year = timedelta(days=365)
+    for artist in artists:
+        for _ in range(size.windows_per_artist):
+            start = now - year + timedelta(days=rng.randint(0, 2 * 365))
+            db.session.add(Availability(
+                artist_id=artist.id,
+                working_period_start=start,
+                working_period_end=start + timedelta(days=rng.randint(7, 60)),
+            ))
+
+    slots = 2 * 365 * 12
+    taken = set()
+    shows = []
+    while len(shows) < size.shows and venues and artists:
+        venue, artist, slot = rng.choice(venues), rng.choice(artists), rng.randrange(slots)
+        if (venue.id, slot) in taken or (artist.id, slot) in taken:
+            continue
+        taken.update(((venue.id, slot), (artist.id, slot)))
+        show = Show(
+            venue_id=venue.id,
+            artist_id=artist.id,
+            start_time=now - year + timedelta(hours=2 * slot),
+        )
+        db.session.add(show)
+        shows.append(show)
+        if len(shows) % FLUSH_EVERY == 0:
+            db.session.flush()
+    db.session.commit()
+
+    return SeedResult(size, [v.id for v in venues], [a.id for a in artists],
+                      [s.id for s in shows], now)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', required=True,
+                        help='Throwaway database URI, it is dropped and recreated.')
+    parser.add_argument('--venues', type=int, default=SeedSize().venues)
+    parser.add_argument('--artists', type=int, default=SeedSize().artists)
+    parser.add_argument('--shows', type=int, default=SeedSize().shows)
+    parser.add_argument('--windows-per-artist', type=int, default=SeedSize().windows_per_artist)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': args.database}, env='testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        result = seed(SeedSize(args.venues, args.artists, args.shows, args.windows_per_artist),
+                      args.seed)
+    print(f'{len(result.venue_ids)} venues, {len(result.artist_ids)} artists, '
+          f'{len(result.show_ids)} shows')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+""" Route benchmark suite: seeds a throwaway database and measures every blueprint.
+
+For each route it records the queries one request issues, latency and
+throughput through the Flask test client and, unless `--no-http`, under
+concurrent HTTP load. Results go to a JSON file to diff across commits
+with `python -m benchmarks.compare`.
+
+    python -m benchmarks.suite --out before.json
+    python -m benchmarks.suite --database postgresql://localhost/fyyur_bench \\
+        --venues 2000 --shows 50000 --threads 16 --out after.json
+
+The response cache is off unless `--cache` is given, so the numbers are
+the cost of rendering and not of a cache hit.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from app import create_app
+from app.extensions import db
+
+from .load import RouteCase, count_route_queries, run_http, run_test_client, serve
+from .seed import SeedSize, seed
+
+
+def route_cases(seeded):
+    """The routes to measure, with ids taken from the seeded data."""
+    venue_id = seeded.venue_ids[len(seeded.venue_ids) // 2]
+    artist_id = seeded.artist_ids[len(seeded.artist_ids) // 2]
+    return [
+        RouteCase('venues.venues', '/venues/venues'),
+        RouteCase('venues.show_venue', f'/venues/{venue_id}'),
+        RouteCase('venues.search_venues', '/venues/search', 'POST', {'search_term': 'blue'}),
+        RouteCase('artists.artists', '/artists/artists'),
+        RouteCase('artists.show_artist', f'/artists/{artist_id}'),
+        RouteCase('artists.search_artists', '/artists/artists/search', 'POST',
+                  {'search_term': 'neon'}),
+        RouteCase('shows.shows', '/shows/'),
+        RouteCase('shows.shows past', '/shows/?mode=past'),
+        RouteCase('api.get_venues', '/api/venues'),
+        RouteCase('api.get_all_artists ndjson', '/api/artists?format=ndjson'),
+    ]
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(database, size, requests=50, http_requests=200, threads=8, http=True,
+              cache=False, only=None):
+    """Seed `database`, measure every route and return the results document."""
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': database,
+        'WTF_CSRF_ENABLED': False,
+        'CACHE_BACKEND': 'local' if cache else 'null',
+        'PROFILER_ENABLED': False,
+        'JOBS_BACKEND': 'thread',
+    }, env='testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seeded = seed(size)
+        dialect = db.engine.dialect.name
+        db.session.remove()
+    # Jobs queued by seeding must not run while routes are timed.
+    app.extensions['jobs'].wait()
+
+    cases = [case for case in route_cases(seeded) if not only or case.name in only]
+    routes = {}
+    for case in cases:
+        routes[case.name] = {
+            'method': case.method,
+            'path': case.path,
+            'queries': count_route_queries(app, case),
+            'test_client': run_test_client(app, case, requests),
+        }
+    if http:
+        with serve(app) as base_url:
+            for case in cases:
+                routes[case.name]['http'] = run_http(base_url, case, http_requests, threads)
+
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'commit': _commit(),
+            'database': dialect,
+            'python': platform.python_version(),
+            'size': size._asdict(),
+            'requests': requests,
+            'http_requests': http_requests if http else 0,
+            'threads': threads,
+            'cache': cache,
+        },
+        'routes': routes,
+    }
+
+
+def print_results(results):
+    print(f"{'route':<30} {'queries':>7} {'p50 ms':>8} {'p95 ms':>8} {'rps':>8} "
+          f"{'http p95':>9} {'http rps':>9}")
+    for name, route in results['routes'].items():
+        client = route['test_client']
+        http = route.get('http', {})
+        print(f"{name:<30} {route['queries']:>7} {client['p50_ms']:>8.2f} "
+              f"{client['p95_ms']:>8.2f} {client['rps']:>8.1f} "
+              f"{http.get('p95_ms', 0):>9.2f} {http.get('rps', 0):>9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database',
+                        help='Throwaway database URI, it is dropped and recreated. '
+                             'Defaults to a temporary SQLite file.')
+    parser.add_argument('--venues', type=int, default=SeedSize().venues)
+    parser.add_argument('--artists', type=int, default=SeedSize().artists)
+    parser.add_argument('--shows', type=int, default=SeedSize().shows)
+    parser.add_argument('--windows-per-artist', type=int, default=SeedSize().windows_per_artist)
+    parser.add_argument('--requests', type=int, default=50,
+                        help='Sequential test client requests per route.')
+    parser.add_argument('--http-requests', type=int, default=200,
+                        help='HTTP requests per route.')
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent HTTP clients.')
+    parser.add_argument('--no-http', action='store_true', help='Skip the HTTP runs.')
+    parser.add_argument('--cache', action='store_true', help='Keep the response cache on.')
+    parser.add_argument('--route', action='append', dest='only',
+                        help='Only measure this route, can be repeated.')
+    parser.add_argument('--out', help='Write the results to this JSON file.')
+    args = parser.parse_args(argv)
+
+    size = SeedSize(args.venues, args.artists, args.shows, args.windows_per_artist)
+    with tempfile.TemporaryDirectory() as tmp:
+        database = args.database or 'sqlite:///' + os.path.join(tmp, 'fyyur-bench.db')
+        results = run_suite(database, size, args.requests, args.http_requests, args.threads,
+                            http=not args.no_http, cache=args.cache, only=args.only)
+
+    print_results(results)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'results written to {args.out}')
+    failures = [name for name, route in results['routes'].items()
+                if route['test_client']['errors'] or route.get('http', {}).get('errors')]
+    if failures:
+        print('requests failed for: ' + ', '.join(failures))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+""" Regression benchmark for the `/venues/venues` directory page.
+
+Seeds a throwaway database at two sizes, renders the page through the Flask
+test client and fails if the number of queries grows with the data.
+
+    python -m benchmarks.venue_directory --venues 2000 --shows-per-venue 5
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app import create_app
+from app.extensions import db
+from app.models import Venue, Artist, Show
+
+from .querycount import count_queries
+
+# The page must cost the same number of statements however many venues exist.
+QUERY_BUDGET = 1
+
+
+def seed(venues, shows_per_venue, cities=50, rng=None):
+    """Insert `venues` venues spread over `cities` cities, each with shows."""
+    rng = rng or random.Random(0)
+    now = datetime.now()
+
+    artist = Artist(name='Benchmark Artist', city='Austin', state='TX')
+    db.session.add(artist)
+    db.session.flush()
+
+    for i in range(venues):
+        city = i % cities
+        venue = Venue(
+            name=f'Venue {i}',
+            city=f'City {city}',
+            state='CA',
+            address=f'{i} Main Street',
+            genres=['Jazz'],
+        )
+        db.session.add(venue)
+        db.session.flush()
+        db.session.add_all([
+            Show(
+                venue_id=venue.id,
+                artist_id=artist.id,
+                start_time=now + timedelta(days=rng.randint(-365, 365)),
+            )
+            for _ in range(shows_per_venue)
+        ])
+    db.session.commit()
+
+
+def run(database, venues, shows_per_venue):
+    """Render the directory page once and return (query count, seconds)."""
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database}, env='testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(venues, shows_per_venue)
+
+        client = app.test_client()
+        with count_queries(db.engine) as counter:
+            started = time.perf_counter()
+            response = client.get('/venues/venues')
+            elapsed = time.perf_counter() - started
+
+        if response.status_code != 200:
+            raise RuntimeError(f'/venues/venues returned {response.status_code}')
+
+        db.session.remove()
+        db.drop_all()
+
+    return counter.count, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default='sqlite://',
+                        help='Throwaway database URI, it is dropped and recreated.')
+    parser.add_argument('--venues', type=int, default=2000)
+    parser.add_argument('--shows-per-venue', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for venues in (max(args.venues // 10, 1), args.venues):
+        queries, elapsed = run(args.database, venues, args.shows_per_venue)
+        print(f'{venues:>7} venues: {queries} queries, {elapsed * 1000:.1f} ms')
+        if queries > QUERY_BUDGET:
+            print(f'  over budget: expected at most {QUERY_BUDGET} queries')
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
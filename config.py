@@ -1,13 +1,153 @@
 import os
-SECRET_KEY = os.urandom(32)
+
+# Signs sessions and CSRF tokens. Every worker must share it, production
+# refuses to start without it (see the environments at the end).
+SECRET_KEY = os.environ.get('SECRET_KEY')
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
-# Enable debug mode.
-DEBUG = True
-
 # Connect to the database
 
 
 # TODO IMPLEMENT DATABASE URL
-SQLALCHEMY_DATABASE_URI = 'postgresql://rastsislaupiatrenka@localhost:5432/project'
+SQLALCHEMY_DATABASE_URI = os.environ.get(
+    'DATABASE_URL', 'postgresql://rastsislaupiatrenka@localhost:5432/project')
+
+# Search backend: 'postgres' (pg_trgm indexes), 'memory' or 'auto' to pick by database.
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')
+
+# Search result paging, a single query never returns more than the maximum.
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+# Show listing page size, pages are keyset paginated on (start_time, id).
+SHOWS_PAGE_SIZE = 30
+SHOWS_MAX_PAGE_SIZE = 100
+
+# Rows fetched per server-side cursor round trip by the streaming /api endpoints.
+API_STREAM_BATCH_SIZE = 1000
+
+# Show length used for conflict checks when a booking gives no end time,
+# and the longest show the booking engine accepts.
+SHOW_DURATION_MINUTES = 120
+SHOW_MAX_DURATION_MINUTES = 12 * 60
+
+# Response cache: 'local' (per process), 'shared' (CACHE_SHARED_URL, e.g.
+# redis://localhost:6379/0 or memory:// for a local fake) or 'null'.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'local')
+CACHE_SHARED_URL = os.environ.get('CACHE_SHARED_URL', 'memory://')
+CACHE_DEFAULT_TTL = 60
+CACHE_MAX_ENTRIES = 1024
+
+# Connection pool (PostgreSQL only). Every worker process holds up to
+# DB_POOL_SIZE + DB_MAX_OVERFLOW connections, keep workers * that below
+# the server's max_connections. Metrics are served at /internal/pool.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') not in ('0', 'false', 'False')
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+DB_APPLICATION_NAME = os.environ.get('DB_APPLICATION_NAME', 'fyyur')
+
+# Token required by the /internal endpoints and the importer. Unset, they
+# refuse every request, except loopback ones while debugging or testing.
+INTERNAL_TOKEN = os.environ.get('INTERNAL_TOKEN')
+
+# Per-request SQL profiling: Server-Timing headers, and a warning for
+# requests over these limits or repeating one statement shape (N+1).
+PROFILER_ENABLED = True
+PROFILER_MAX_QUERIES = 20
+PROFILER_SLOW_DB_MS = 200
+PROFILER_DUPLICATE_THRESHOLD = 3
+PROFILER_SERVER_TIMING = True
+
+# Templates: compiled bytecode is kept on disk (TEMPLATE_BYTECODE_DIR,
+# default instance/jinja_bytecode) so new workers skip compilation, `flask
+# templates-compile` fills it before a deploy. Template files are only
+# re-checked for changes while debugging.
+TEMPLATE_BYTECODE_CACHE = True
+TEMPLATE_BYTECODE_DIR = os.environ.get('TEMPLATE_BYTECODE_DIR')
+
+# Background jobs for work derived from writes (page warmup, search
+# reindex): 'thread' runs them in each web process, 'database' queues them
+# in the jobs table for `flask jobs-worker`. JOBS_SCHEDULE is queued by the
+# one `flask jobs-schedule` process of a deployment, web processes never run it.
+# Tasks filling a per-process cache or index stay in the web process either way.
+JOBS_BACKEND = os.environ.get('JOBS_BACKEND', 'thread')
+JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS', 2))
+JOBS_MAX_ATTEMPTS = 3
+JOBS_RETRY_SECONDS = 5
+JOBS_LOCK_SECONDS = 600
+JOBS_WARM_PAGES_LIMIT = 50
+JOBS_SCHEDULE = {'refresh_stats': 300, 'rebuild_matches': 86400}
+
+# Venue <-> artist recommendations (app.matchmaking): the top MATCH_TOP_K
+# of each side are kept, scored on genres, location and the artist's
+# availability over the next MATCH_HORIZON_DAYS. `flask matches-rebuild`
+# recomputes them all, writes refresh the affected lists.
+MATCH_TOP_K = 20
+MATCH_HORIZON_DAYS = 90
+MATCH_WEIGHTS = {'genre': 0.6, 'location': 0.25, 'availability': 0.15}
+MATCH_BATCH_SIZE = 1000
+
+# Venue, artist and show listings: values listed per facet (genre, state,
+# city, seeking), the most frequent first.
+FACET_LIMIT = 20
+
+# GET /api/calendar (app.timeline): longest from/to range of one request.
+CALENDAR_MAX_DAYS = 366
+
+# Part of every ETag of the conditional GET views, bump it when a deploy
+# changes how pages render so clients drop their copies.
+ETAG_VERSION = os.environ.get('ETAG_VERSION', '1')
+
+# Rows per multi-row INSERT for `flask import` and POST /api/import/<kind>.
+IMPORT_BATCH_SIZE = 1000
+
+# Async read-only JSON API (asgi.py), served under this prefix next to Flask.
+ASYNC_API_PREFIX = '/async'
+ASYNC_API_PAGE_SIZE = 100
+ASYNC_API_MAX_PAGE_SIZE = 1000
+
+
+# Check the secret, the database and the schema before serving (app.serving).
+SELF_CHECK = os.environ.get('SELF_CHECK', '1') not in ('0', 'false', 'False')
+
+
+# Environments, picked by FYYUR_ENV and applied over the settings above.
+
+
+class DevelopmentConfig:
+    """`python run.py`: the Werkzeug server with the debugger."""
+    FYYUR_ENV = 'development'
+    DEBUG = True
+    TEMPLATES_AUTO_RELOAD = True
+    # A single process, a throwaway secret will do.
+    SECRET_KEY = SECRET_KEY or os.urandom(32)
+
+
+class ProductionConfig:
+    """`gunicorn -c gunicorn.conf.py wsgi:app` or uWSGI, see wsgi.py."""
+    FYYUR_ENV = 'production'
+    DEBUG = False
+    TEMPLATES_AUTO_RELOAD = False
+    # Every worker must see the others' invalidations: point
+    # CACHE_SHARED_URL at Redis.
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'shared')
+
+
+class TestingConfig:
+    """Benchmarks and throwaway databases."""
+    FYYUR_ENV = 'testing'
+    DEBUG = False
+    TESTING = True
+    TEMPLATES_AUTO_RELOAD = False
+    SECRET_KEY = SECRET_KEY or 'testing'
+
+
+ENVIRONMENTS = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+}
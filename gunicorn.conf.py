@@ -0,0 +1,61 @@
+""" Gunicorn settings: `gunicorn -c gunicorn.conf.py wsgi:app`.
+
+The app is preloaded in the master and shared copy-on-write by the
+workers, `post_fork` resets what must not be shared (see `app.serving`).
+
+Worker profiles, chosen with WEB_WORKER_PROFILE:
+
+    gthread  (default) WEB_THREADS threads per worker. Keep WEB_THREADS
+             within DB_POOL_SIZE + DB_MAX_OVERFLOW or threads queue for
+             connections.
+    gevent   WEB_WORKER_CONNECTIONS greenlets per worker, for many slow
+             clients. Needs `pip install gevent psycogreen`, psycopg2 is
+             made cooperative before the app is preloaded.
+
+Environment: PORT, WEB_CONCURRENCY (workers, 2 * CPUs + 1 by default),
+WEB_THREADS, WEB_WORKER_CONNECTIONS, WEB_TIMEOUT, WEB_MAX_REQUESTS.
+"""
+
+import multiprocessing
+import os
+
+PROFILES = ('gthread', 'gevent')
+
+profile = os.environ.get('WEB_WORKER_PROFILE', 'gthread')
+if profile not in PROFILES:
+    raise RuntimeError(f'WEB_WORKER_PROFILE must be one of {PROFILES}, not {profile!r}')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = profile
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_connections = int(os.environ.get('WEB_WORKER_CONNECTIONS', 100))
+
+# Build the app once, in the master.
+preload_app = True
+
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then, jittered so they do not restart together.
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+
+if profile == 'gevent':
+    # Before anything opens sockets or imports psycopg2, i.e. before the preload.
+    try:
+        from gevent import monkey
+        from psycogreen.gevent import patch_psycopg
+    except ImportError as e:
+        raise RuntimeError('The gevent profile needs: pip install gevent psycogreen') from e
+    monkey.patch_all()
+    patch_psycopg()
+
+
+def post_fork(server, worker):
+    from app.serving import after_fork
+    from wsgi import app as application
+    after_fork(application)
@@ -1,13 +1,13 @@
 from app import create_app
 import os
 
-""" This script is the entry point for running the Flask application. It sets up the port
-    and host for the development server and runs the app in debug mode.
+""" This script is the entry point for running the Flask development server.
+    It sets up the port and host and runs the app in the environment named
+    by FYYUR_ENV ('development' by default). Production serves `wsgi:app`.
 """
 
 app = create_app()
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 63653))
-    app = create_app()
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, debug=app.debug)
@@ -0,0 +1,123 @@
+""" Fixtures: the app on a throwaway SQLite database and the in-memory shared cache. """
+
+from datetime import datetime, timedelta
+from logging import FileHandler
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.models import Venue, Artist, Show, Availability
+from app.profiling import query_budget as _query_budget
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'app_config(**settings): override settings of the app')
+
+
+@pytest.fixture
+def app(request, tmp_path):
+    marker = request.node.get_closest_marker('app_config')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "fyyur.db"}',
+        'WTF_CSRF_ENABLED': False,
+        'CACHE_BACKEND': 'shared',
+        'CACHE_SHARED_URL': 'memory://',
+        'PROFILER_ENABLED': False,
+        **(marker.kwargs if marker else {}),
+    }, env='testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        # Derived jobs of the last commits may still be running, SQLite
+        # makes them wait for the test's transaction to end.
+        backend = app.extensions['jobs']
+        getattr(backend, 'local', backend).wait(timeout=10)
+
+
+@pytest.fixture
+def production_app(tmp_path, monkeypatch):
+    """Factory of production apps on a throwaway database, given extra settings."""
+    # Production logs to error.log in the working directory.
+    monkeypatch.chdir(tmp_path)
+    apps = []
+
+    def production_app(**settings):
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "fyyur.db"}',
+            'SECRET_KEY': 'production',
+            **settings,
+        }, env='production')
+        apps.append(app)
+        return app
+    yield production_app
+
+    for app in apps:
+        for handler in [h for h in app.logger.handlers if isinstance(h, FileHandler)]:
+            app.logger.removeHandler(handler)
+            handler.close()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def query_budget(app):
+    """`app.profiling.query_budget`: `with query_budget(2): client.get(...)`."""
+    return _query_budget
+
+
+@pytest.fixture
+def now():
+    return datetime(2026, 10, 14, 12, 0)
+
+
+# Row factories, each flushes so the row has its id.
+
+@pytest.fixture
+def add_venue(app):
+    def add_venue(name='The Musical Hop', city='San Francisco', state='CA', genres=('Jazz',),
+                  seeking_talent=False):
+        venue = Venue(name=name, city=city, state=state, address='1015 Folsom Street',
+                      genres=list(genres), seeking_talent=seeking_talent)
+        db.session.add(venue)
+        db.session.flush()
+        return venue
+    return add_venue
+
+
+@pytest.fixture
+def add_artist(app):
+    def add_artist(name='Guns N Petals', city='San Francisco', state='CA',
+                   genres=('Rock n Roll',), seeking_venue=False):
+        artist = Artist(name=name, city=city, state=state, genres=list(genres),
+                        seeking_venue=seeking_venue)
+        db.session.add(artist)
+        db.session.flush()
+        return artist
+    return add_artist
+
+
+@pytest.fixture
+def add_show(app):
+    def add_show(venue, artist, start_time, hours=2):
+        show = Show(venue_id=venue.id, artist_id=artist.id, start_time=start_time,
+                    end_time=start_time + timedelta(hours=hours))
+        db.session.add(show)
+        db.session.flush()
+        return show
+    return add_show
+
+
+@pytest.fixture
+def add_window(app):
+    def add_window(artist, start, end):
+        window = Availability(artist_id=artist.id, working_period_start=start,
+                              working_period_end=end)
+        db.session.add(window)
+        db.session.flush()
+        return window
+    return add_window
@@ -0,0 +1,30 @@
+import pytest
+
+from app.serving import self_check
+
+EXTERNAL = {'REMOTE_ADDR': '203.0.113.7'}
+
+
+def test_without_token_loopback_is_served_while_testing(client):
+    assert client.get('/internal/jobs').status_code == 200
+    assert client.get('/internal/jobs', environ_base=EXTERNAL).status_code == 403
+
+
+def test_without_token_nothing_is_served_in_production(app, client):
+    app.config['TESTING'] = False
+    assert client.get('/internal/jobs').status_code == 403
+    assert client.post('/api/import/venues', data='name\n',
+                       content_type='text/csv').status_code == 403
+
+
+@pytest.mark.parametrize('header, status', [(None, 403), ('wrong', 403), ('s3cret', 200)])
+def test_token_is_required_once_set(app, client, header, status):
+    app.config['INTERNAL_TOKEN'] = 's3cret'
+    headers = {'X-Internal-Token': header} if header else {}
+    assert client.get('/internal/jobs', headers=headers).status_code == status
+
+
+@pytest.mark.parametrize('token, refused', [(None, True), ('s3cret', False)])
+def test_production_self_check_requires_a_token(production_app, token, refused):
+    app = production_app(INTERNAL_TOKEN=token)
+    assert ('INTERNAL_TOKEN is not set' in self_check(app)) == refused
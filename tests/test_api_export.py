@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from app.extensions import db
+
+
+@pytest.fixture
+def artists(add_artist):
+    ids = [add_artist(name=f'Artist {index}').id for index in range(5)]
+    db.session.commit()
+    return ids
+
+
+def get(client, url, **kwargs):
+    response = client.get(url, **kwargs)
+    data = response.get_data(as_text=True)
+    response.close()
+    return response, data
+
+
+def test_json_array_streams_every_row(client, artists):
+    response = client.get('/api/artists')
+    assert response.is_streamed
+    data = response.get_data(as_text=True)
+    response.close()
+    assert response.mimetype == 'application/json'
+    assert json.loads(data) == [{'id': id, 'name': f'Artist {index}'}
+                                for index, id in enumerate(artists)]
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'query_string': {'format': 'ndjson'}},
+    {'headers': {'Accept': 'application/x-ndjson'}},
+])
+def test_ndjson(client, artists, kwargs):
+    response, data = get(client, '/api/artists', **kwargs)
+    assert response.mimetype == 'application/x-ndjson'
+    assert [json.loads(line)['id'] for line in data.splitlines()] == artists
+
+
+def test_limit_and_after_id_resume_a_listing(client, artists):
+    _, first = get(client, '/api/artists?limit=2')
+    last_id = json.loads(first)[-1]['id']
+    _, rest = get(client, f'/api/artists?after_id={last_id}')
+    assert [row['id'] for row in json.loads(first) + json.loads(rest)] == artists
+
+
+def test_empty_listing_is_an_empty_array(client):
+    assert get(client, '/api/venues')[1] == '[]'
+
+
+def test_limit_must_be_positive(client):
+    assert get(client, '/api/venues?limit=0')[0].status_code == 400
@@ -0,0 +1,135 @@
+import asyncio
+import json
+from datetime import timedelta
+
+import pytest
+
+from app.asyncapi import create_asgi_app
+from app.asyncapi.asgi import AsyncAPI, PrefixDispatcher
+from app.asyncapi.database import async_database_url, create_engine_for
+from app.asyncapi.routes import router
+from app.extensions import db
+from app.search import search_venues
+
+
+def call(asgi_app, path, query_string=''):
+    """Send one GET to `asgi_app`, return its status and body."""
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'root_path': '',
+             'query_string': query_string.encode(), 'headers': [],
+             'scheme': 'http', 'server': ('localhost', 80), 'http_version': '1.1'}
+
+    async def run():
+        await asgi_app(scope, receive, send)
+        api = asgi_app.api if isinstance(asgi_app, PrefixDispatcher) else asgi_app
+        await api.dispose()
+    asyncio.run(run())
+
+    body = b''.join(message.get('body', b'') for message in messages
+                    if message['type'] == 'http.response.body')
+    return messages[0]['status'], body
+
+
+@pytest.fixture
+def api(app):
+    return AsyncAPI(app.config, router, create_engine_for)
+
+
+def get(api, path, query_string=''):
+    status, body = call(api, path, query_string)
+    return status, json.loads(body)
+
+
+def test_async_database_url_picks_the_async_driver():
+    assert async_database_url('postgresql://localhost/fyyur').drivername == 'postgresql+asyncpg'
+    assert async_database_url('sqlite:///fyyur.db').drivername == 'sqlite+aiosqlite'
+    with pytest.raises(ValueError):
+        async_database_url('mysql://localhost/fyyur')
+
+
+def test_listing_pages_by_id(api, add_venue):
+    venues = [add_venue(name=f'Venue {index}') for index in range(3)]
+    db.session.commit()
+
+    status, first = get(api, '/venues', 'limit=2')
+    assert status == 200
+    assert [row['id'] for row in first['data']] == [venues[0].id, venues[1].id]
+    assert first['next_after_id'] == venues[1].id
+
+    _, last = get(api, '/venues', f'limit=2&after_id={first["next_after_id"]}')
+    assert [row['name'] for row in last['data']] == ['Venue 2']
+    assert last['next_after_id'] is None
+
+
+def test_artist_detail_has_shows_and_availability(
+        api, now, add_venue, add_artist, add_show, add_window):
+    venue, artist = add_venue(), add_artist()
+    add_show(venue, artist, now - timedelta(days=30))
+    add_show(venue, artist, now + timedelta(days=30))
+    window = add_window(artist, now + timedelta(days=1), now + timedelta(days=5))
+    db.session.commit()
+
+    status, data = get(api, f'/artists/{artist.id}')
+    assert status == 200
+    assert data['name'] == 'Guns N Petals'
+    assert (data['past_shows_count'], data['upcoming_shows_count']) == (1, 1)
+    assert [row['id'] for row in data['availability']] == [window.id]
+
+    _, windows = get(api, f'/artists/{artist.id}/availability',
+                     f'from={(now + timedelta(days=10)).isoformat()}')
+    assert windows == {'artist_id': artist.id, 'data': []}
+
+
+def test_unknown_records_and_paths_are_404(api):
+    assert get(api, '/venues/42') == (404, {'error': 'No such venue'})
+    assert get(api, '/artists/42/availability') == (404, {'error': 'No such artist'})
+    assert get(api, '/nowhere')[0] == 404
+
+
+def test_invalid_arguments_are_400(api):
+    assert get(api, '/search', 'type=shows')[0] == 400
+    assert get(api, '/shows', 'mode=soon')[0] == 400
+    assert get(api, '/venues', 'limit=many') == (400, {'error': "Invalid value for 'limit'"})
+
+
+def test_search_matches_the_sync_search(api, now, add_venue, add_artist, add_show):
+    hop = add_venue(genres=('Jazz', 'Reggae'))
+    add_venue(name='Park Square Live Music & Coffee', city='Oakland', genres=('Folk',))
+    add_show(hop, add_artist(), now + timedelta(days=30))
+    db.session.commit()
+
+    for term in ('music', 'reggae', 'oakland', 'nothing'):
+        _, found = get(api, '/search', f'type=venues&q={term}')
+        expected = search_venues(term)
+        assert found['count'] == expected['count']
+        # Ranked by name here, by similarity in the memory backend.
+        assert sorted(row['id'] for row in found['data']) == sorted(
+            row['id'] for row in expected['data'])
+
+    _, found = get(api, '/search', 'q=reggae')
+    assert found['data'] == [{'id': hop.id, 'name': hop.name, 'num_upcoming_shows': 1}]
+
+
+def test_other_paths_go_to_flask(app, add_venue):
+    add_venue()
+    db.session.commit()
+    asgi_app = create_asgi_app({
+        'SQLALCHEMY_DATABASE_URI': app.config['SQLALCHEMY_DATABASE_URI'],
+        'CACHE_BACKEND': 'null',
+        'PROFILER_ENABLED': False,
+    }, env='testing')
+
+    status, body = call(asgi_app, '/async/venues')
+    assert status == 200
+    assert json.loads(body)['data'][0]['name'] == 'The Musical Hop'
+
+    status, body = call(asgi_app, '/api/venues')
+    assert status == 200
+    assert json.loads(body) == [{'id': 1, 'name': 'The Musical Hop'}]
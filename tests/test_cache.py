@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+
+from app.cache import tags_for
+from app.cache.backends import FakeSharedClient, SharedCache
+from app.extensions import cache, db
+
+
+def test_tag_versions_start_at_zero_and_count_invalidations(app):
+    assert cache.tag_versions(['venues', 'venue:1']) == [0, 0]
+    cache.invalidate('venues')
+    cache.invalidate('venues')
+    assert cache.tag_versions(['venues', 'venue:1']) == [2, 0]
+
+
+def test_commit_invalidates_the_pages_of_the_written_rows(app, add_venue):
+    venue = add_venue()
+    db.session.commit()
+    before = cache.tag_versions(['venues', f'venue:{venue.id}', 'artists'])
+
+    venue.name = 'The Dueling Pianos Bar'
+    db.session.commit()
+
+    after = cache.tag_versions(['venues', f'venue:{venue.id}', 'artists'])
+    assert after[0] > before[0]
+    assert after[1] > before[1]
+    assert after[2] == before[2]
+
+
+def test_rollback_invalidates_nothing(app, add_venue):
+    venue = add_venue()
+    db.session.commit()
+    before = cache.tag_versions(['venues'])
+
+    venue.name = 'Renamed'
+    db.session.flush()
+    db.session.rollback()
+
+    assert cache.tag_versions(['venues']) == before
+
+
+def test_moved_show_invalidates_its_old_venue(app, add_venue, add_artist, add_show):
+    first, second = add_venue(), add_venue(name='Park Square Live Music & Coffee')
+    show = add_show(first, add_artist(), datetime(2026, 11, 1, 20))
+    db.session.commit()
+
+    assert show.venue_id == first.id
+    show.venue_id = second.id
+    assert {f'venue:{first.id}', f'venue:{second.id}', 'shows'} <= tags_for(show)
+
+
+def test_page_is_served_from_cache_until_a_write(app, client, add_venue):
+    venue = add_venue()
+    db.session.commit()
+    app.extensions['jobs'].wait(timeout=10)
+    cache.clear()
+
+    first = client.get(f'/venues/{venue.id}')
+    second = client.get(f'/venues/{venue.id}')
+    assert first.headers['X-Cache'] == 'MISS'
+    assert second.headers['X-Cache'] == 'HIT'
+
+    venue.name = 'The Dueling Pianos Bar'
+    db.session.commit()
+    app.extensions['jobs'].wait(timeout=10)
+
+    third = client.get(f'/venues/{venue.id}')
+    assert b'The Dueling Pianos Bar' in third.data
+
+
+def test_etag_follows_the_tag_versions(app, client, add_venue, add_artist, add_show):
+    venue = add_venue()
+    artist = add_artist()
+    add_show(venue, artist, datetime.now() - timedelta(days=1))
+    db.session.commit()
+
+    etag = client.get(f'/venues/{venue.id}').headers['ETag']
+    assert client.get(f'/venues/{venue.id}', headers={'If-None-Match': etag}).status_code == 304
+
+    # The artist's name is on the venue's show cards.
+    artist.name = 'The Wild Sax Band'
+    db.session.commit()
+
+    response = client.get(f'/venues/{venue.id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert b'The Wild Sax Band' in response.data
+
+
+def test_shared_clear_only_deletes_its_own_keys():
+    client = FakeSharedClient()
+    client.set('other:page', b'kept')
+    client.set('fy*yur:sibling', b'kept')
+    shared = SharedCache(client, prefix='fy*:')
+    shared.clear_batch_size = 2
+    for index in range(5):
+        shared.set(f'page:{index}', index)
+    shared.incr('tag:venues')
+
+    shared.clear()
+
+    assert shared.get_many([f'page:{index}' for index in range(5)]) == [None] * 5
+    assert shared.get('tag:venues') is None
+    assert sorted(client.scan_iter()) == ['fy*yur:sibling', 'other:page']
+
+
+def test_orphaned_show_has_no_tag_of_its_deleted_owner(app, add_venue, add_artist, add_show):
+    venue, artist = add_venue(), add_artist()
+    show = add_show(venue, artist, datetime(2026, 11, 1, 20))
+    db.session.commit()
+    artist_id = artist.id
+
+    show.artist_id = None
+    assert tags_for(show) == {'shows', f'venue:{venue.id}', f'artist:{artist_id}'}
+    db.session.flush()
+    assert tags_for(show) == {'shows', f'venue:{venue.id}'}
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.cache.backends import NullCache
+from app.extensions import db
+from app.models import Venue
+
+
+@pytest.fixture
+def uncached(app):
+    """Without a cache the ETags come from the validator queries."""
+    app.extensions['cache'] = NullCache()
+    return app
+
+
+@pytest.fixture
+def venue(add_venue, add_artist, add_show):
+    venue = add_venue()
+    add_show(venue, add_artist(), datetime.now() - timedelta(days=2))
+    db.session.commit()
+    return venue
+
+
+def test_unchanged_record_is_not_modified(uncached, client, query_budget, venue):
+    response = client.get(f'/venues/{venue.id}')
+    assert response.status_code == 200
+    assert response.cache_control.no_cache
+
+    # The validator is all a revalidation reads.
+    with query_budget(1):
+        revalidated = client.get(f'/venues/{venue.id}',
+                                 headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == response.headers['ETag']
+    assert not revalidated.data
+
+
+def test_edits_change_the_etag(uncached, client, venue):
+    etag = client.get(f'/venues/{venue.id}').headers['ETag']
+
+    venue.name = 'The Dueling Pianos Bar'
+    db.session.commit()
+
+    response = client.get(f'/venues/{venue.id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_counterpart_rename_changes_the_etag(uncached, client, venue):
+    etag = client.get(f'/venues/{venue.id}').headers['ETag']
+
+    # The artist's name is on the venue's show cards.
+    venue.shows[0].artist.name = 'The Wild Sax Band'
+    db.session.commit()
+
+    assert client.get(f'/venues/{venue.id}',
+                      headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_if_modified_since(uncached, client, venue):
+    db.session.execute(update(Venue).where(Venue.id == venue.id).values(
+        updated_at=datetime.now() - timedelta(days=3)))
+    db.session.commit()
+
+    last_modified = client.get(f'/venues/{venue.id}').headers['Last-Modified']
+    response = client.get(f'/venues/{venue.id}', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+
+
+def test_missing_record_renders_its_404(uncached, client):
+    response = client.get('/venues/999', headers={'If-None-Match': '*'})
+    assert response.status_code == 404
+
+
+def test_listing_etag_changes_with_row_counts(uncached, client, venue, add_venue):
+    etag = client.get('/api/venues').headers['ETag']
+    assert client.get('/api/venues', headers={'If-None-Match': etag}).status_code == 304
+
+    add_venue(name='Park Square Live Music & Coffee')
+    db.session.commit()
+    assert client.get('/api/venues', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_cached_views_revalidate_without_the_database(client, query_budget, venue):
+    etag = client.get(f'/venues/{venue.id}').headers['ETag']
+    with query_budget(0):
+        response = client.get(f'/venues/{venue.id}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+
+def test_calendar_etag_varies_with_the_range(client):
+    june = client.get('/api/calendar?from=2026-06-01&to=2026-07-01')
+    july = client.get('/api/calendar?from=2026-07-01&to=2026-08-01')
+    assert june.headers['ETag'] != july.headers['ETag']
+
+    # An unreadable range is never answered with a 304.
+    response = client.get('/api/calendar?from=2026-07-01&to=2026-06-01',
+                          headers={'If-None-Match': june.headers['ETag']})
+    assert response.status_code == 400
@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import select
+from werkzeug.datastructures import MultiDict
+
+from app import facets
+from app.extensions import db
+from app.facets import NO_FILTERS, Filters, _toggled, parse_filters
+from app.models import Venue
+
+
+def test_parse_filters():
+    args = MultiDict([('genre', 'Jazz'), ('genre', 'Folk'), ('genre', 'Jazz'), ('genre', ''),
+                      ('state', 'CA'), ('city', ''), ('seeking', '1')])
+    assert parse_filters(args) == Filters(('Folk', 'Jazz'), 'CA', None, True)
+    assert parse_filters(MultiDict({'seeking': 'maybe'})).seeking is None
+
+
+def test_toggling_genres_adds_and_removes_one():
+    jazz = _toggled(NO_FILTERS, 'genre', 'Jazz')
+    assert jazz.genres == ('Jazz',)
+    both = _toggled(jazz, 'genre', 'Folk')
+    assert both.genres == ('Folk', 'Jazz')
+    assert _toggled(both, 'genre', 'Jazz').genres == ('Folk',)
+
+
+def test_toggling_a_value_replaces_or_clears_it():
+    new_york = _toggled(NO_FILTERS, 'city', 'New York')
+    assert new_york.city == 'New York'
+    assert _toggled(new_york, 'city', 'Brooklyn').city == 'Brooklyn'
+    assert _toggled(new_york, 'city', 'New York').city is None
+
+
+def test_choosing_another_state_drops_the_city():
+    chosen = Filters((), 'NY', 'New York', None)
+    assert _toggled(chosen, 'state', 'CA') == Filters((), 'CA', None, None)
+
+
+def test_toggling_seeking_reads_the_query_value():
+    seeking = _toggled(NO_FILTERS, 'seeking', '1')
+    assert seeking.seeking is True
+    assert _toggled(seeking, 'seeking', '0').seeking is False
+    assert _toggled(seeking, 'seeking', '1').seeking is None
+
+
+@pytest.fixture
+def venues(add_venue):
+    add_venue(name='A', city='San Francisco', state='CA', genres=('Jazz', 'Folk'),
+              seeking_talent=True)
+    add_venue(name='B', city='San Francisco', state='CA', genres=('Jazz',))
+    add_venue(name='C', city='Oakland', state='CA', genres=('Rock',), seeking_talent=True)
+    add_venue(name='D', city='New York', state='NY', genres=('Jazz', 'Rock'))
+    db.session.commit()
+
+
+def counts(filters):
+    with_values = facets.facets(select(Venue.id), facets.VENUES, filters, 'venues.venues')
+    return {facet: {value.value: value.count for value in values}
+            for facet, values in with_values.items()}
+
+
+def test_counts_without_filters(app, venues):
+    with app.test_request_context():
+        assert counts(NO_FILTERS) == {
+            'genre': {'Jazz': 3, 'Rock': 2, 'Folk': 1},
+            'state': {'CA': 3, 'NY': 1},
+            'city': {'San Francisco': 2, 'Oakland': 1, 'New York': 1},
+            'seeking': {'1': 2, '0': 2},
+        }
+
+
+def test_a_facet_is_counted_without_its_own_filter(app, venues):
+    with app.test_request_context():
+        counted = counts(Filters(('Jazz',), 'CA', None, None))
+    # Other genres are counted among the venues of CA, whatever their genre.
+    assert counted['genre'] == {'Jazz': 2, 'Folk': 1, 'Rock': 1}
+    # Other states are counted among the Jazz venues.
+    assert counted['state'] == {'CA': 2, 'NY': 1}
+    assert counted['city'] == {'San Francisco': 2}
+    assert counted['seeking'] == {'1': 1, '0': 1}
+
+
+def test_selected_values_link_to_their_removal(app, venues):
+    filters = Filters(('Jazz',), None, None, None)
+    with app.test_request_context():
+        genre = {value.value: value for value in facets.facets(
+            select(Venue.id), facets.VENUES, filters, 'venues.venues')['genre']}
+    assert genre['Jazz'].selected and 'genre=' not in genre['Jazz'].url
+    assert not genre['Rock'].selected and 'genre=Rock' in genre['Rock'].url
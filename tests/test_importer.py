@@ -0,0 +1,76 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from app.extensions import cache, db
+from app.importer import import_rows
+from app.models import Venue, Show, ShowListing
+
+VENUES_CSV = '''name,city,state,address,phone,genres,facebook_link
+The Musical Hop,San Francisco,CA,1015 Folsom Street,1231231234,"Jazz,Folk",https://www.facebook.com/TheMusicalHop
+Park Square Live Music & Coffee,San Francisco,CA,34 Whiskey Moore Ave,4158751234,Jazz,https://www.facebook.com/ParkSquare
+,Oakland,CA,1 Nowhere Road,4155551234,Jazz,https://www.facebook.com/Nowhere
+'''
+
+
+def ndjson(*rows):
+    return ''.join(json.dumps(row) + '\n' for row in rows)
+
+
+def test_csv_import_inserts_valid_rows_and_reports_the_others(app, client):
+    response = client.post('/api/import/venues', data=VENUES_CSV, content_type='text/csv')
+    report = response.get_json()
+
+    assert response.status_code == 200
+    assert (report['read'], report['inserted'], report['rejected']) == (3, 2, 1)
+    assert report['errors'][0]['line'] == 4
+    assert list(report['errors'][0]['errors']) == ['name']
+    assert db.session.scalar(select(Venue.genres).where(Venue.name == 'The Musical Hop')) == \
+        ['Jazz', 'Folk']
+
+
+def test_import_invalidates_the_cached_pages(app):
+    before = cache.tag_versions(['venues'])
+    import_rows('venues', [(1, {'name': 'The Musical Hop', 'city': 'San Francisco',
+                                'state': 'CA', 'address': '1015 Folsom Street',
+                                'phone': '1231231234', 'genres': 'Jazz',
+                                'facebook_link': 'https://www.facebook.com/TheMusicalHop'})])
+    assert cache.tag_versions(['venues'])[0] > before[0]
+
+
+def test_ndjson_shows_are_checked_as_a_batch(app, client, add_venue, add_artist, add_window):
+    venue, artist = add_venue(), add_artist()
+    add_window(artist, datetime(2026, 11, 1), datetime(2026, 11, 8))
+    db.session.commit()
+    show = {'venue_id': venue.id, 'artist_id': artist.id}
+
+    response = client.post('/api/import/shows', content_type='application/x-ndjson', data=ndjson(
+        dict(show, start_time='2026-11-02T20:00:00'),
+        # Overlaps the row above, from the same file.
+        dict(show, start_time='2026-11-02T21:00:00'),
+        # Outside the artist's availability.
+        dict(show, start_time='2026-12-02T20:00:00'),
+        dict(show, artist_id=artist.id + 1, start_time='2026-11-03T20:00:00'),
+        dict(show, start_time='2026-11-04T20:00:00'),
+    ))
+    report = response.get_json()
+
+    assert (report['read'], report['inserted']) == (5, 2)
+    assert [error['line'] for error in report['errors']] == [2, 3, 4]
+    assert report['errors'][2]['errors'] == {'artist_id': ['Unknown artist.']}
+    assert db.session.scalar(select(func.count()).select_from(Show)) == 2
+    # Core inserts keep the read model in step.
+    assert db.session.scalar(select(func.count()).select_from(ShowListing)) == 2
+
+
+def test_malformed_ndjson_line_is_rejected(app, client):
+    response = client.post('/api/import/artists', content_type='application/x-ndjson',
+                           data='{"name": \n')
+    report = response.get_json()
+    assert (report['read'], report['inserted'], report['rejected']) == (1, 0, 1)
+    assert 'row' in report['errors'][0]['errors']
+
+
+def test_unknown_kind(client):
+    assert client.post('/api/import/tickets', data='', content_type='text/csv').status_code == 404
@@ -0,0 +1,122 @@
+import threading
+
+import pytest
+from sqlalchemy import select
+
+from app.extensions import db, jobs
+from app.jobs.backends import ThreadBackend, retry_delay
+from app.models import Job
+
+database_backend = pytest.mark.app_config(JOBS_BACKEND='database', JOBS_RETRY_SECONDS=0)
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Replace the tasks with recorders: task name -> list of payloads."""
+    calls = {}
+    lock = threading.Lock()
+    for name, (_, max_attempts, local) in list(jobs.tasks.items()):
+        def record(name=name, **payload):
+            with lock:
+                calls.setdefault(name, []).append(payload)
+        monkeypatch.setitem(jobs.tasks, name, (record, max_attempts, local))
+    return calls
+
+
+def test_retry_delay_doubles():
+    assert [retry_delay(5, attempt) for attempt in (1, 2, 3)] == [5, 10, 20]
+
+
+def test_commit_queues_the_derived_work(app, calls, add_venue):
+    venue = add_venue()
+    db.session.commit()
+    app.extensions['jobs'].wait(timeout=10)
+
+    assert calls['refresh_matches'] == [{'items': [f'venue:{venue.id}']}]
+    assert calls['reindex_search'] == [{'items': ['venues']}]
+    assert calls['warm_pages'] == [{'items': sorted({'venues', f'venue:{venue.id}'})}]
+
+
+def test_rollback_queues_nothing(app, calls, add_venue):
+    add_venue()
+    db.session.rollback()
+    app.extensions['jobs'].wait(timeout=10)
+    assert calls == {}
+
+
+def test_failed_jobs_are_retried_then_given_up(app, monkeypatch):
+    attempts = []
+
+    def flaky(items):
+        attempts.append(items)
+        raise RuntimeError('boom')
+
+    monkeypatch.setitem(jobs.tasks, 'refresh_matches', (flaky, 3, False))
+    backend = ThreadBackend(jobs, app, workers=1, retry_seconds=0.01)
+    backend.submit('refresh_matches', {'items': ['venue:1']})
+
+    assert backend.wait(timeout=10)
+    assert len(attempts) == 3
+    assert backend.stats() == {
+        'backend': 'thread', 'queued': 0, 'running': 0, 'delayed': 0,
+        'succeeded': 0, 'retried': 2, 'failed': 1}
+
+
+@database_backend
+def test_database_backend_queues_rows_with_the_write(app, calls, add_venue):
+    venue = add_venue()
+    # The rows are part of the write's transaction.
+    assert db.session.scalars(select(Job.name).order_by(Job.name)).all() == [
+        'refresh_matches', 'warm_pages']
+    db.session.commit()
+    app.extensions['jobs'].local.wait(timeout=10)
+
+    # The in-memory search index is this process's, its task stays on the local pool.
+    assert set(calls) == {'reindex_search'}
+    job = db.session.scalars(select(Job).where(Job.name == 'refresh_matches')).one()
+    assert (job.status, job.payload) == ('queued', {'items': [f'venue:{venue.id}']})
+
+
+@database_backend
+def test_database_backend_rolls_back_its_rows(app, calls, add_venue):
+    add_venue()
+    db.session.rollback()
+    assert db.session.scalars(select(Job)).all() == []
+
+
+@database_backend
+def test_worker_runs_and_retries_queued_jobs(app, monkeypatch):
+    outcomes = iter([RuntimeError('boom'), None])
+
+    def flaky(items):
+        error = next(outcomes)
+        if error:
+            raise error
+
+    monkeypatch.setitem(jobs.tasks, 'refresh_matches', (flaky, 2, False))
+    jobs.enqueue('refresh_matches', items=['venue:1'])
+    backend = app.extensions['jobs']
+
+    assert backend.run_pending() == 1
+    db.session.expire_all()
+    job = db.session.scalars(select(Job)).one()
+    assert (job.status, job.attempts) == ('queued', 1)
+    assert 'boom' in job.last_error
+
+    assert backend.run_pending() == 1
+    db.session.expire_all()
+    assert db.session.scalars(select(Job.status)).one() == 'done'
+    assert backend.run_pending() == 0
+
+
+@pytest.mark.app_config(JOBS_BACKEND='database', JOBS_SCHEDULE={'refresh_stats': 60})
+def test_schedule_queues_the_periodic_tasks(app):
+    result = app.test_cli_runner().invoke(args=['jobs-schedule', '--once'])
+    assert result.exit_code == 0
+    assert db.session.scalars(select(Job.name)).all() == ['refresh_stats']
+
+
+def test_worker_needs_the_database_backend(app):
+    result = app.test_cli_runner().invoke(args=['jobs-worker', '--once'])
+    assert result.exit_code != 0
+    assert 'JOBS_BACKEND=database' in result.output
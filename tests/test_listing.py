@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from app import listing
+from app.extensions import db
+from app.formatting import format_datetime
+from app.models import Show, ShowListing
+
+START = datetime(2026, 11, 1, 20)
+
+
+def listed():
+    return {row.id: row for row in db.session.scalars(select(ShowListing))}
+
+
+def test_show_writes_rewrite_their_rows(app, add_venue, add_artist, add_show):
+    venue, other_venue, artist = add_venue(), add_venue(name='The Dueling Pianos Bar'), add_artist()
+    show = add_show(venue, artist, START)
+    db.session.commit()
+
+    row = listed()[show.id]
+    assert (row.venue_name, row.artist_name, row.artist_genres) == (
+        'The Musical Hop', 'Guns N Petals', ['Rock n Roll'])
+    assert row.start_time_display == format_datetime(START, listing.DISPLAY_FORMAT)
+
+    show.venue_id = other_venue.id
+    db.session.commit()
+    assert listed()[show.id].venue_name == 'The Dueling Pianos Bar'
+
+    db.session.delete(show)
+    db.session.commit()
+    assert listed() == {}
+
+
+def test_owner_edits_reach_the_rows_of_its_shows(app, add_venue, add_artist, add_show):
+    venue, artist = add_venue(), add_artist()
+    show = add_show(venue, artist, START)
+    db.session.commit()
+
+    artist.name = 'The Wild Sax Band'
+    artist.genres = ['Jazz']
+    db.session.commit()
+    row = listed()[show.id]
+    assert (row.artist_name, row.artist_genres) == ('The Wild Sax Band', ['Jazz'])
+
+    db.session.delete(venue)
+    db.session.commit()
+    assert listed() == {}
+
+
+def test_rolled_back_shows_are_not_listed(app, add_venue, add_artist, add_show):
+    add_show(add_venue(), add_artist(), START)
+    db.session.rollback()
+    assert listed() == {}
+
+
+def test_rebuild_repairs_raw_writes(app, add_venue, add_artist, add_show):
+    show = add_show(add_venue(), add_artist(), START)
+    db.session.commit()
+    db.session.execute(update(Show).where(Show.id == show.id).values(
+        start_time=datetime(2026, 12, 1, 20)))
+    db.session.commit()
+    assert listed()[show.id].start_time == START
+
+    assert listing.rebuild() == 1
+    assert listed()[show.id].start_time == datetime(2026, 12, 1, 20)
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.matchmaking import TopK, coverage
+
+
+def test_top_k_keeps_the_best_entries_best_first():
+    top = TopK(3)
+    for item_id, score in enumerate([0.2, 0.9, 0.5, 0.1, 0.7, 0.3]):
+        top.push(score, item_id, f'item {item_id}')
+    assert top.ranked() == ['item 1', 'item 4', 'item 2']
+
+
+def test_top_k_breaks_ties_by_ascending_id():
+    top = TopK(2)
+    for item_id in (5, 3, 9, 1):
+        top.push(0.5, item_id, item_id)
+    assert top.ranked() == [1, 3]
+
+
+def test_top_k_with_fewer_entries_than_k():
+    top = TopK(5)
+    top.push(0.4, 1, 'a')
+    top.push(0.6, 2, 'b')
+    assert top.ranked() == ['b', 'a']
+    assert TopK(5).ranked() == []
+
+
+START = datetime(2026, 11, 1)
+
+
+def days(first, last):
+    return START + timedelta(days=first), START + timedelta(days=last)
+
+
+@pytest.mark.parametrize('windows, expected', [
+    ([], 0.0),
+    ([days(0, 10)], 1.0),
+    ([days(0, 5)], 0.5),
+    # Overlapping windows are counted once.
+    ([days(0, 4), days(2, 6)], 0.6),
+    ([days(2, 6), days(0, 4)], 0.6),
+    # Windows are clipped to the range.
+    ([days(-5, 2), days(8, 20)], 0.4),
+    ([days(-5, -1), days(10, 12)], 0.0),
+    # A window inside another adds nothing.
+    ([days(0, 8), days(1, 3)], 0.8),
+])
+def test_coverage(windows, expected):
+    assert coverage(windows, *days(0, 10)) == pytest.approx(expected)
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import ShowListing
+from app.pagination import decode_cursor, encode_cursor, keyset_paginate
+
+COLUMNS = (ShowListing.start_time, ShowListing.id)
+
+
+@pytest.fixture
+def shows(add_venue, add_artist, add_show):
+    """Seven shows, two of them at each start time so ids break the ties."""
+    venue, artist = add_venue(), add_artist()
+    start = datetime(2026, 11, 1, 20)
+    for index in range(7):
+        add_show(venue, artist, start + timedelta(days=index // 2))
+    db.session.commit()
+    return db.session.execute(
+        select(ShowListing.start_time, ShowListing.id)
+        .order_by(ShowListing.start_time, ShowListing.id)).all()
+
+
+def listing():
+    return select(ShowListing.id, ShowListing.start_time)
+
+
+def key(row):
+    return (row.start_time, row.id)
+
+
+def test_cursor_round_trip():
+    moment = datetime(2026, 11, 1, 20, 30)
+    assert decode_cursor(encode_cursor(moment, 42)) == (moment, 42)
+
+
+@pytest.mark.parametrize('cursor', ['', 'not a cursor', encode_cursor(datetime(2026, 1, 1), 1)[:-3]])
+def test_malformed_cursor_is_a_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_forward_pages_cover_every_row_once(shows):
+    seen, after = [], None
+    while True:
+        page = keyset_paginate(listing(), COLUMNS, 3, after=after)
+        seen.extend(key(row) for row in page.items)
+        if page.next_cursor is None:
+            break
+        after = decode_cursor(page.next_cursor)
+    assert seen == [key(row) for row in shows]
+
+
+def test_first_and_last_pages_have_one_cursor(shows):
+    first = keyset_paginate(listing(), COLUMNS, 3)
+    assert first.prev_cursor is None and first.next_cursor is not None
+
+    last = keyset_paginate(listing(), COLUMNS, 3, after=key(shows[-2]))
+    assert [key(row) for row in last.items] == [key(shows[-1])]
+    assert last.next_cursor is None and last.prev_cursor is not None
+
+
+def test_backward_page_mirrors_the_forward_one(shows):
+    second = keyset_paginate(listing(), COLUMNS, 3, after=key(shows[2]))
+    back = keyset_paginate(listing(), COLUMNS, 3, before=decode_cursor(second.prev_cursor))
+    assert [key(row) for row in back.items] == [key(row) for row in shows[:3]]
+    assert back.prev_cursor is None
+    assert decode_cursor(back.next_cursor) == key(shows[2])
+
+
+def test_descending_pages(shows):
+    newest = list(reversed(shows))
+    page = keyset_paginate(listing(), COLUMNS, 4, descending=True)
+    assert [key(row) for row in page.items] == [key(row) for row in newest[:4]]
+    rest = keyset_paginate(listing(), COLUMNS, 4, after=decode_cursor(page.next_cursor),
+                           descending=True)
+    assert [key(row) for row in rest.items] == [key(row) for row in newest[4:]]
+    assert rest.next_cursor is None
+
+
+def test_empty_listing(app):
+    assert keyset_paginate(listing(), COLUMNS, 3) == ([], None, None)
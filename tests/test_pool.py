@@ -0,0 +1,48 @@
+from sqlalchemy import create_engine, text
+
+from app.pool import PoolMetrics, engine_options, instrumented_pool_class
+
+POSTGRES = {'SQLALCHEMY_DATABASE_URI': 'postgresql://localhost/fyyur'}
+
+
+def test_sqlite_keeps_the_default_pool():
+    assert engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite:///fyyur.db'}) == {}
+
+
+def test_postgres_options_come_from_the_settings():
+    options = engine_options({**POSTGRES, 'DB_POOL_SIZE': 8, 'DB_MAX_OVERFLOW': 2,
+                              'DB_STATEMENT_TIMEOUT_MS': 5000, 'DB_APPLICATION_NAME': 'web'})
+    assert (options['pool_size'], options['max_overflow']) == (8, 2)
+    assert options['connect_args'] == {'application_name': 'web',
+                                       'options': '-c statement_timeout=5000'}
+
+
+def test_statement_timeout_zero_is_left_out():
+    options = engine_options({**POSTGRES, 'DB_STATEMENT_TIMEOUT_MS': 0})
+    assert 'options' not in options['connect_args']
+
+
+def test_metrics_count_checkouts_and_time_waits(tmp_path):
+    metrics = PoolMetrics()
+    engine = create_engine(f'sqlite:///{tmp_path / "pool.db"}', pool_size=2, max_overflow=1,
+                           poolclass=instrumented_pool_class(metrics))
+    metrics.attach(engine)
+    with engine.connect() as first, engine.connect() as second, engine.connect() as third:
+        for connection in (first, second, third):
+            connection.execute(text('SELECT 1'))
+        snapshot = metrics.snapshot()
+        assert (snapshot['checked_out'], snapshot['overflow']) == (3, 1)
+
+    snapshot = metrics.snapshot()
+    assert (snapshot['connects'], snapshot['checkouts'], snapshot['checkins']) == (3, 3, 3)
+    assert (snapshot['size'], snapshot['max_overflow'], snapshot['overflow_max']) == (2, 1, 1)
+    assert snapshot['pool'] == 'InstrumentedQueuePool'
+    assert snapshot['wait_seconds_max'] >= snapshot['wait_seconds_avg'] >= 0
+    engine.dispose()
+
+
+def test_metrics_are_served(client):
+    assert client.get('/venues/venues').status_code == 200
+    data = client.get('/internal/pool').get_json()
+    assert data['checkouts'] >= 1
+    assert data['pool'] is not None
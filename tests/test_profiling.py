@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import cache, db
+from app.profiling import QueryBudgetExceeded, statement_shape
+
+
+def test_statement_shape_collapses_literals_and_in_lists():
+    assert statement_shape("SELECT * FROM venue WHERE id IN (1, 2, 3) AND name = 'Hop'") == \
+        statement_shape('SELECT *  FROM venue WHERE id IN (?, ?) AND name = :name')
+
+
+def test_budget_counts_without_request_profiling(app, query_budget, add_venue):
+    assert not app.config['PROFILER_ENABLED']
+    with query_budget(10) as profile:
+        add_venue()
+    assert profile.count == 1
+
+
+def test_budget_exceeded_lists_the_shapes(app, query_budget, add_venue):
+    with pytest.raises(QueryBudgetExceeded, match='2 queries issued, budget is 1'):
+        with query_budget(1):
+            add_venue()
+            add_venue()
+
+
+@pytest.fixture
+def catalog(add_venue, add_artist, add_show):
+    """Three venues and artists, each pair with a past and an upcoming show."""
+    venues = [add_venue(name=f'Venue {index}') for index in range(3)]
+    artists = [add_artist(name=f'Artist {index}') for index in range(3)]
+    for venue in venues:
+        for artist in artists:
+            for days in (-3, 3):
+                add_show(venue, artist, datetime.now() + timedelta(days=days))
+    db.session.commit()
+    return venues[0].id, artists[0].id
+
+
+# A query per row would scale with the catalog, these stay flat.
+@pytest.mark.parametrize('url, budget', [
+    ('/venues/venues', 2),
+    ('/artists/artists', 2),
+    ('/shows/', 2),
+    ('/venues/{venue}', 2),
+    ('/artists/{artist}', 2),
+    ('/api/venues', 1),
+    ('/api/artists', 1),
+])
+def test_page_query_budget(app, client, query_budget, catalog, url, budget):
+    venue, artist = catalog
+    app.extensions['jobs'].wait(timeout=10)
+    cache.clear()
+    with query_budget(budget):
+        response = client.get(url.format(venue=venue, artist=artist))
+        response.get_data()
+        response.close()
+    assert response.status_code == 200
+
+
+def test_cached_page_issues_no_query(app, client, query_budget, catalog):
+    venue, _ = catalog
+    client.get(f'/venues/{venue}')
+    with query_budget(0):
+        assert client.get(f'/venues/{venue}').headers['X-Cache'] == 'HIT'
@@ -0,0 +1,130 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.scheduling import Booking, IntervalTree, check_booking, check_bookings
+
+HOUR = timedelta(hours=1)
+
+
+def test_interval_tree_matches_a_linear_scan():
+    generator = random.Random(7)
+    intervals = []
+    for index in range(300):
+        start = generator.randrange(1000)
+        intervals.append((start, start + generator.randrange(1, 50), index))
+    tree = IntervalTree(intervals)
+    assert len(tree) == 300
+
+    for _ in range(200):
+        start = generator.randrange(1000)
+        end = start + generator.randrange(1, 80)
+        expected = sorted(i for i in intervals if i[0] < end and i[1] > start)
+        assert sorted(tree.overlapping(start, end)) == expected
+        assert tree.overlaps(start, end) == bool(expected)
+        assert tree.covers(start, end) == any(s <= start and e >= end for s, e, _ in expected)
+
+
+def test_intervals_are_half_open():
+    tree = IntervalTree([(10, 20)])
+    assert not tree.overlaps(20, 30)
+    assert not tree.overlaps(0, 10)
+    assert tree.overlaps(19, 21)
+    assert tree.covers(10, 20)
+    assert not tree.covers(9, 20)
+
+
+def test_covers_needs_a_single_interval():
+    tree = IntervalTree([(0, 10), (10, 20)])
+    assert tree.overlaps(5, 15)
+    assert not tree.covers(5, 15)
+
+
+@pytest.fixture
+def season(add_venue, add_artist, add_show, add_window):
+    """An artist available for a week with one show already booked."""
+    venue, other_venue, artist = add_venue(), add_venue(name='The Dueling Pianos Bar'), add_artist()
+    start = datetime(2026, 11, 2)
+    add_window(artist, start, start + timedelta(days=7))
+    add_show(venue, artist, start + timedelta(days=1, hours=20))
+    db.session.commit()
+    return venue, other_venue, artist, start
+
+
+def test_check_booking(season):
+    venue, other_venue, artist, start = season
+
+    free = check_booking(artist.id, venue.id, start + timedelta(days=2, hours=20))
+    assert free.ok and free.reason is None
+
+    clash = check_booking(artist.id, other_venue.id, start + timedelta(days=1, hours=21))
+    assert clash.reason == 'artist_busy'
+
+    outside = check_booking(artist.id, venue.id, start + timedelta(days=6, hours=23))
+    assert outside.reason == 'artist_unavailable'
+
+
+def test_check_bookings_agrees_with_check_booking(season):
+    venue, other_venue, artist, start = season
+    proposals = [
+        Booking(artist.id, venue.id, start + timedelta(days=day, hours=hour), None)
+        for day in range(-1, 8) for hour in (0, 20, 21, 23)
+    ]
+    for proposal, batch in zip(proposals, check_bookings(proposals)):
+        single = check_booking(proposal.artist_id, proposal.venue_id, proposal.start_time)
+        assert batch.artist_available == single.artist_available
+        assert batch.venue_busy or not single.venue_busy
+
+
+def test_accepted_proposals_block_later_ones(season, add_artist):
+    venue, other_venue, artist, start = season
+    evening = start + timedelta(days=3, hours=20)
+    first, same_artist, same_venue = check_bookings([
+        Booking(artist.id, venue.id, evening, evening + 2 * HOUR),
+        Booking(artist.id, other_venue.id, evening + HOUR, None),
+        Booking(add_artist(name='Matt Quevedo').id, venue.id, evening + HOUR, None),
+    ])
+    assert first.ok
+    assert same_artist.reason == 'artist_busy'
+    # The second artist has no availability at all.
+    assert same_venue.reason == 'artist_unavailable' and same_venue.venue_busy
+
+
+def test_refused_proposals_block_nothing(season):
+    venue, other_venue, artist, start = season
+    evening = start + timedelta(days=1, hours=20)
+    refused, later = check_bookings([
+        Booking(artist.id, other_venue.id, evening, None),
+        Booking(artist.id, other_venue.id, evening + 3 * HOUR, None),
+    ])
+    assert refused.reason == 'artist_busy'
+    assert later.ok
+
+
+def test_no_bookings(app):
+    assert check_bookings([]) == []
+
+
+def test_create_show_books_a_free_slot(client, season):
+    venue, other_venue, artist, start = season
+    response = client.post('/shows/create', data={
+        'artist_id': artist.id, 'venue_id': other_venue.id, 'start_time': '2026-11-04T20:00'})
+    assert response.status_code == 302
+    assert check_booking(artist.id, other_venue.id, datetime(2026, 11, 4, 21)).artist_busy
+
+
+@pytest.mark.parametrize('data, message', [
+    ({'start_time': 'tomorrow'}, 'Error in start_time: This field is required.'),
+    ({'artist_id': 999}, 'There is no artist with ID 999.'),
+    ({'venue_id': 999}, 'There is no venue with ID 999.'),
+    ({'start_time': '2026-11-03T21:00'}, 'Guns N Petals is alas busy at this time'),
+])
+def test_create_show_rerenders_the_form(client, season, data, message):
+    venue, other_venue, artist, start = season
+    form = dict({'artist_id': artist.id, 'venue_id': other_venue.id,
+                 'start_time': '2026-11-04T20:00'}, **data)
+    response = client.post('/shows/create', data=form)
+    assert response.status_code == 200
+    assert message.encode() in response.data
@@ -0,0 +1,72 @@
+import pytest
+
+from app.extensions import db
+from app.search import get_backend, search_artists, search_venues
+from app.search.memory import MemorySearchBackend, TrigramIndex, similarity
+
+
+def test_sqlite_falls_back_to_the_memory_backend(app):
+    assert isinstance(get_backend(), MemorySearchBackend)
+
+
+@pytest.mark.parametrize('term, expected', [
+    ('hop', [1]),
+    ('HOP', [1]),
+    ('jazz', [1, 2]),
+    ('san', [1, 2]),
+    ('zz', [1, 2]),
+    ('100%', []),
+])
+def test_trigram_index_matches_substrings(term, expected):
+    index = TrigramIndex()
+    index.add(1, 'The Musical Hop', 'the musical hop san francisco ca jazz')
+    index.add(2, 'Park Square', 'park square san francisco ca jazz folk')
+    assert sorted(index.search(term)) == expected
+
+
+def test_names_starting_with_the_term_rank_first():
+    index = TrigramIndex()
+    index.add(1, 'The Jazz Bar', 'the jazz bar')
+    index.add(2, 'Jazz Club', 'jazz club')
+    index.add(3, 'Folk Hall', 'folk hall jazz')
+    assert index.search('jazz') == [2, 1, 3]
+    assert similarity('jazz', 'jazz') == 1.0
+
+
+def test_search_matches_name_city_and_genres(app, add_venue):
+    hop = add_venue(genres=('Jazz', 'Reggae'))
+    park = add_venue(name='Park Square Live Music & Coffee', city='Oakland', genres=('Folk',))
+    db.session.commit()
+
+    assert [row['id'] for row in search_venues('reggae')['data']] == [hop.id]
+    assert [row['id'] for row in search_venues('oakland')['data']] == [park.id]
+    assert search_venues('music')['count'] == 2
+
+
+def test_pages_report_the_next_offset(app, add_artist):
+    for index in range(5):
+        add_artist(name=f'Guns N Petals {index}')
+    db.session.commit()
+
+    first = search_artists('petals', limit=2)
+    last = search_artists('petals', limit=2, offset=4)
+    assert (first['count'], first['next_offset'], len(first['data'])) == (5, 2, 2)
+    assert (last['next_offset'], len(last['data'])) == (None, 1)
+
+
+def test_writes_drop_the_index(app, add_artist):
+    artist = add_artist()
+    db.session.commit()
+    assert search_artists('wild sax')['count'] == 0
+
+    artist.name = 'The Wild Sax Band'
+    db.session.commit()
+    assert search_artists('wild sax')['count'] == 1
+
+
+def test_search_page(app, client, add_venue):
+    add_venue()
+    db.session.commit()
+    response = client.post('/venues/search', data={'search_term': 'musical'})
+    assert response.status_code == 200
+    assert b'The Musical Hop' in response.data
@@ -0,0 +1,43 @@
+import pytest
+
+from app.extensions import db
+from app.serving import SelfCheckError, after_fork, prepare, self_check
+
+
+def test_production_refuses_a_per_process_shared_cache(production_app):
+    app = production_app(INTERNAL_TOKEN='s3cret', CACHE_SHARED_URL='memory://')
+    problems = self_check(app)
+    assert any(problem.startswith('CACHE_SHARED_URL is memory://') for problem in problems)
+
+
+def test_production_refuses_a_schema_behind_the_migrations(production_app):
+    app = production_app(INTERNAL_TOKEN='s3cret', CACHE_BACKEND='local')
+    with app.app_context():
+        db.create_all()
+    # create_all records no revision, as a database never upgraded.
+    [problem] = self_check(app)
+    assert 'run `flask db upgrade`' in problem
+
+    with pytest.raises(SelfCheckError) as raised:
+        prepare(app)
+    assert raised.value.problems == [problem]
+
+
+def test_unreachable_database(production_app, tmp_path):
+    app = production_app(INTERNAL_TOKEN='s3cret', CACHE_BACKEND='local',
+                         SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "missing" / "fyyur.db"}')
+    assert any(problem.startswith('database unreachable') for problem in self_check(app))
+
+
+def test_prepare_loads_the_templates_outside_production(app, caplog):
+    app.config['SECRET_KEY'] = ''
+    assert prepare(app) is app
+    assert 'Self-check: SECRET_KEY is not set' in caplog.text
+    assert len(app.jinja_env.cache) > 0
+
+
+def test_after_fork_restarts_the_job_threads(app):
+    backend = app.extensions['jobs']
+    executor = backend._executor
+    after_fork(app)
+    assert backend._executor is not executor
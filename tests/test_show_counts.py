@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import ShowCounts, Venue, Artist
+
+
+def test_show_counts(app, add_venue, add_artist, add_show):
+    venue, artist = add_venue(), add_artist()
+    for days in (-2, -1, 1):
+        add_show(venue, artist, datetime.now() + timedelta(days=days))
+    db.session.commit()
+
+    assert venue.show_counts() == ShowCounts(2, 1)
+    assert (artist.past_shows_count, artist.upcoming_shows_count) == (2, 1)
+
+
+def test_show_counts_for_many_records_in_one_query(app, query_budget, add_venue, add_artist,
+                                                   add_show):
+    busy, idle, artist = add_venue(), add_venue(name='The Dueling Pianos Bar'), add_artist()
+    add_show(busy, artist, datetime.now() + timedelta(days=1))
+    db.session.commit()
+    busy_id, idle_id = busy.id, idle.id
+
+    with query_budget(1):
+        counts = Venue.show_counts_for([busy_id, idle_id, 999])
+    assert counts == {busy_id: ShowCounts(0, 1), idle_id: ShowCounts(0, 0),
+                      999: ShowCounts(0, 0)}
+    assert Venue.show_counts_for([]) == {}
+
+
+def test_count_expressions_select_and_order(app, add_venue, add_artist, add_show):
+    venue = add_venue()
+    quiet, busy = add_artist(name='Matt Quevedo'), add_artist(name='The Wild Sax Band')
+    for days in (1, 2):
+        add_show(venue, busy, datetime.now() + timedelta(days=days))
+    db.session.commit()
+
+    rows = db.session.execute(
+        select(Artist.name, Artist.upcoming_shows_count, Artist.past_shows_count)
+        .order_by(Artist.upcoming_shows_count.desc())).all()
+    assert [tuple(row) for row in rows] == [('The Wild Sax Band', 2, 0), ('Matt Quevedo', 0, 0)]
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app import stats
+from app.extensions import db
+from app.models import VenueStats, ArtistStats
+
+
+def summary(model):
+    """Summary rows as {owner id: (total, past, upcoming, next show)}."""
+    fk = model.venue_id if model is VenueStats else model.artist_id
+    return {row[0]: tuple(row[1:]) for row in db.session.execute(select(
+        fk, model.total_shows, model.past_shows, model.upcoming_shows, model.next_show_time))}
+
+
+def rebuilt(model):
+    current = summary(model)
+    stats.rebuild()
+    return current == summary(model)
+
+
+def test_writes_keep_the_summaries_in_step(app, add_venue, add_artist, add_show):
+    first, second, artist = add_venue(), add_venue(name='The Dueling Pianos Bar'), add_artist()
+    soon = datetime.now() + timedelta(days=1)
+    later = soon + timedelta(days=1)
+    add_show(first, artist, datetime.now() - timedelta(days=1))
+    show = add_show(first, artist, soon)
+    add_show(first, artist, later)
+    db.session.commit()
+    assert summary(VenueStats)[first.id] == (3, 1, 2, soon)
+
+    # Moving a show updates both venues.
+    show.venue_id = second.id
+    db.session.commit()
+    assert summary(VenueStats)[first.id] == (2, 1, 1, later)
+    assert summary(VenueStats)[second.id] == (1, 0, 1, soon)
+
+    db.session.delete(show)
+    db.session.commit()
+    assert summary(VenueStats)[second.id][:3] == (0, 0, 0)
+    assert summary(ArtistStats)[artist.id][:3] == (2, 1, 1)
+    assert rebuilt(ArtistStats)
+
+
+def test_refresh_moves_started_shows_to_the_past(app, add_venue, add_artist, add_show):
+    venue, artist = add_venue(), add_artist()
+    start = datetime.now() + timedelta(hours=1)
+    add_show(venue, artist, start)
+    db.session.commit()
+    assert summary(VenueStats)[venue.id] == (1, 0, 1, start)
+
+    assert stats.refresh(now=start + timedelta(minutes=1)) == 2
+    assert summary(VenueStats)[venue.id] == (1, 1, 0, None)
+    # Nothing else is due.
+    assert stats.refresh(now=start + timedelta(minutes=2)) == 0
+
+
+def test_deleting_an_owner_deletes_its_summary(app, add_venue, add_artist, add_show):
+    venue, artist = add_venue(), add_artist()
+    add_show(venue, artist, datetime.now() + timedelta(days=1))
+    db.session.commit()
+
+    db.session.delete(artist)
+    db.session.commit()
+    assert artist.id not in summary(ArtistStats)
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from app.timeline import CalendarRange, bucket_starts, month_range, parse_range
+
+
+def test_day_buckets_start_at_midnight():
+    span = CalendarRange(datetime(2026, 10, 30, 18), datetime(2026, 11, 2), 'day')
+    assert bucket_starts(span) == [
+        datetime(2026, 10, 30), datetime(2026, 10, 31), datetime(2026, 11, 1)]
+
+
+def test_day_buckets_include_a_partial_last_day():
+    span = CalendarRange(datetime(2026, 10, 30), datetime(2026, 10, 31, 6), 'day')
+    assert bucket_starts(span) == [datetime(2026, 10, 30), datetime(2026, 10, 31)]
+
+
+def test_week_buckets_start_on_monday():
+    # 2026-10-14 is a Wednesday.
+    span = CalendarRange(datetime(2026, 10, 14), datetime(2026, 10, 27), 'week')
+    starts = bucket_starts(span)
+    assert starts == [datetime(2026, 10, 12), datetime(2026, 10, 19), datetime(2026, 10, 26)]
+    assert all(start.weekday() == 0 for start in starts)
+
+
+def test_month_range_wraps_the_year():
+    assert month_range(datetime(2026, 12, 15)) == (datetime(2026, 12, 1), datetime(2027, 1, 1))
+
+
+def test_parse_range_defaults_to_the_current_month(app):
+    span = parse_range(MultiDict(), now=datetime(2026, 10, 14, 12))
+    assert span == CalendarRange(datetime(2026, 10, 1), datetime(2026, 11, 1), 'day')
+
+
+def test_parse_range_converts_offsets_to_local_time(app):
+    moment = datetime(2026, 10, 1, tzinfo=timezone(timedelta(hours=2)))
+    span = parse_range(MultiDict({'from': moment.isoformat(), 'to': '2026-10-03'}))
+    assert span.start == moment.astimezone().replace(tzinfo=None)
+    assert span.start.tzinfo is None
+
+
+@pytest.mark.parametrize('args', [
+    {'from': 'yesterday'},
+    {'from': '2026-10-03', 'to': '2026-10-01'},
+    {'from': '2026-10-01', 'to': '2026-10-01'},
+    {'from': '2026-10-01', 'to': '2028-10-01'},
+    {'bucket': 'month'},
+])
+def test_parse_range_rejects(app, args):
+    with pytest.raises(ValueError):
+        parse_range(MultiDict(args))
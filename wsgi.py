@@ -0,0 +1,22 @@
+from app import create_app
+from app.serving import after_fork, prepare
+import os
+
+""" WSGI entry point for production servers. The app is created once, at
+    import, so preloading servers build it before forking their workers:
+
+    SECRET_KEY=... gunicorn -c gunicorn.conf.py wsgi:app
+    SECRET_KEY=... uwsgi --http :8000 --master --processes 4 --threads 4 --module wsgi:app
+
+    FYYUR_ENV defaults to 'production' here, see `app.serving`.
+"""
+
+app = prepare(create_app(env=os.environ.get('FYYUR_ENV', 'production')))
+
+try:
+    # Under uWSGI (without lazy-apps) workers are forked after this import.
+    from uwsgidecorators import postfork
+except ImportError:
+    pass
+else:
+    postfork(lambda: after_fork(app))